@@ -0,0 +1,54 @@
+"""
+Measures the cost of `import hipporag` in a fresh interpreter: wall time, which heavy optional
+backends got imported, and whether any helper processes were started.
+
+Usage:
+    python benchmarks/import_time.py --repeats 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["torch", "transformers", "sentence_transformers", "vllm", "litellm", "gritlm", "boto3"]
+
+PROBE = """
+import json, multiprocessing, sys, time
+start = time.perf_counter()
+import hipporag
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "heavy_modules": [m for m in %r if m in sys.modules],
+    "child_processes": len(multiprocessing.active_children()),
+}))
+""" % (HEAVY_MODULES,)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the hipporag package")
+    parser.add_argument("--repeats", type=int, default=5, help="Number of fresh interpreters to time")
+    args = parser.parse_args()
+
+    src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src_dir, os.environ.get("PYTHONPATH")])))
+
+    runs = []
+    for _ in range(args.repeats):
+        output = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    times = [run["seconds"] for run in runs]
+    print(json.dumps({
+        "repeats": args.repeats,
+        "median_seconds": statistics.median(times),
+        "min_seconds": min(times),
+        "heavy_modules": runs[-1]["heavy_modules"],
+        "child_processes": runs[-1]["child_processes"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
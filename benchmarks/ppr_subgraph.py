@@ -0,0 +1,154 @@
+"""
+Compares subgraph-restricted PPR (`ppr_subgraph_hops`) with full-graph PPR: latency per query and how much of
+the full-graph top-k passages the subgraph ranking recovers, for a grid of hop counts and node budgets.
+
+Runs on a synthetic HippoRAG-shaped graph (passages linked to Zipf-distributed entities, fact edges between
+the entities of a passage, a few synonymy edges) or on a graph snapshot of an existing index (`graph/v<N>`).
+Queries are seeded like `HippoRAG.graph_search_with_fact_entities`: a handful of phrase nodes of one target
+passage plus dense retrieval weights (scaled by `passage_node_weight`) on every passage.
+
+Usage:
+    python benchmarks/ppr_subgraph.py --num_passages 20000 --hops 1 2 3 --max_nodes 5000 50000
+    python benchmarks/ppr_subgraph.py --graph_dir outputs/<run>/<llm>_<embedding>/graph/v3
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import igraph as ig
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from hipporag.utils.graph_utils import load_graph_snapshot, subgraph_personalized_pagerank
+
+
+def build_synthetic_graph(num_passages: int, num_entities: int, entities_per_passage: int, seed: int) -> ig.Graph:
+    rng = np.random.default_rng(seed)
+    # Zipf-distributed entity occurrences give a few hub entities, as in real corpora
+    popularity = 1.0 / np.arange(1, num_entities + 1) ** 1.1
+    popularity /= popularity.sum()
+
+    edges = []
+    for passage in range(num_passages):
+        passage_vertex = num_entities + passage
+        entities = np.unique(rng.choice(num_entities, size=entities_per_passage, p=popularity))
+        edges.extend((passage_vertex, entity) for entity in entities)
+        edges.extend(zip(entities[:-1], entities[1:]))
+    synonyms = rng.choice(num_entities, size=(num_entities // 10, 2))
+    edges.extend(tuple(pair) for pair in synonyms if pair[0] != pair[1])
+
+    graph = ig.Graph(n=num_entities + num_passages, edges=edges, directed=False)
+    graph.es["weight"] = 1.0
+    graph.simplify(combine_edges={"weight": "sum"})
+    graph.vs["is_passage"] = [False] * num_entities + [True] * num_passages
+    return graph
+
+
+def make_query(graph: ig.Graph, entity_set: set, passage_idxs: np.ndarray, passage_node_weight: float,
+               rng: np.random.Generator) -> np.ndarray:
+    reset_prob = np.zeros(graph.vcount())
+    target = int(rng.choice(passage_idxs))
+    phrases = [vertex for vertex in graph.neighbors(target) if vertex in entity_set]
+    for phrase in rng.permutation(phrases)[:5]:
+        reset_prob[phrase] = rng.uniform(0.3, 1.0)
+
+    dpr_scores = rng.normal(size=len(passage_idxs))
+    dpr_scores[np.searchsorted(passage_idxs, target)] += 3.0
+    dpr_scores = (dpr_scores - dpr_scores.min()) / (dpr_scores.max() - dpr_scores.min())
+    reset_prob[passage_idxs] = dpr_scores * passage_node_weight
+    return reset_prob
+
+
+def seed_vertices(reset_prob: np.ndarray, entity_idxs: np.ndarray, passage_idxs: np.ndarray, passage_seeds: int):
+    """Seed selection of `HippoRAG.run_ppr`."""
+    top_passages = passage_idxs[np.argsort(reset_prob[passage_idxs])[::-1][:passage_seeds]]
+    return entity_idxs[reset_prob[entity_idxs] > 0].tolist() + top_passages[reset_prob[top_passages] > 0].tolist()
+
+
+def top_passages(scores: np.ndarray, reset_prob: np.ndarray, passage_idxs: np.ndarray, k: int) -> set:
+    order = np.lexsort((reset_prob[passage_idxs], scores[passage_idxs]))[::-1]
+    return set(passage_idxs[order[:k]].tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark subgraph-restricted PPR against full-graph PPR")
+    parser.add_argument("--graph_dir", type=str, default=None, help="Graph snapshot directory of an existing index; a synthetic graph is built if not given")
+    parser.add_argument("--num_passages", type=int, default=20000)
+    parser.add_argument("--num_entities", type=int, default=30000)
+    parser.add_argument("--entities_per_passage", type=int, default=6)
+    parser.add_argument("--num_queries", type=int, default=50)
+    parser.add_argument("--hops", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--max_nodes", type=int, nargs="+", default=[5000, 50000])
+    parser.add_argument("--passage_seeds", type=int, default=50)
+    parser.add_argument("--passage_node_weight", type=float, default=0.05)
+    parser.add_argument("--damping", type=float, default=0.5)
+    parser.add_argument("--top_k", type=int, nargs="+", default=[5, 10, 50])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="Write the results JSON to this file as well")
+    args = parser.parse_args()
+
+    if args.graph_dir is not None:
+        graph = load_graph_snapshot(args.graph_dir)
+        if graph is None:
+            raise FileNotFoundError(f"No graph snapshot found in {args.graph_dir}")
+        if "deleted" in graph.vs.attributes():
+            graph.vs["is_passage"] = [is_passage and not deleted for is_passage, deleted in zip(graph.vs["is_passage"], graph.vs["deleted"])]
+    else:
+        graph = build_synthetic_graph(args.num_passages, args.num_entities, args.entities_per_passage, args.seed)
+
+    is_passage = np.array(graph.vs["is_passage"], dtype=bool)
+    passage_idxs, entity_idxs = np.nonzero(is_passage)[0], np.nonzero(~is_passage)[0]
+    entity_set = set(entity_idxs.tolist())
+
+    rng = np.random.default_rng(args.seed)
+    queries = [make_query(graph, entity_set, passage_idxs, args.passage_node_weight, rng) for _ in range(args.num_queries)]
+
+    full_times, full_scores = [], []
+    for reset_prob in queries:
+        start = time.perf_counter()
+        scores = np.array(graph.personalized_pagerank(damping=args.damping, directed=False, weights="weight",
+                                                      reset=reset_prob, implementation="prpack"))
+        full_times.append(time.perf_counter() - start)
+        full_scores.append(scores)
+
+    results = {
+        "graph": {"vertices": graph.vcount(), "edges": graph.ecount(), "passages": len(passage_idxs),
+                  "source": args.graph_dir or "synthetic"},
+        "full": {"median_ms": 1000 * statistics.median(full_times)},
+        "subgraph": [],
+    }
+
+    for hops in args.hops:
+        for max_nodes in args.max_nodes:
+            times, sizes, recalls = [], [], {k: [] for k in args.top_k}
+            for reset_prob, reference in zip(queries, full_scores):
+                seeds = seed_vertices(reset_prob, entity_idxs, passage_idxs, args.passage_seeds)
+                start = time.perf_counter()
+                scores = subgraph_personalized_pagerank(graph, reset_prob, seeds, hops=hops, max_nodes=max_nodes,
+                                                        damping=args.damping)
+                times.append(time.perf_counter() - start)
+                sizes.append(int(np.count_nonzero(scores)))
+                for k in args.top_k:
+                    expected = top_passages(reference, reset_prob, passage_idxs, k)
+                    recalls[k].append(len(top_passages(scores, reset_prob, passage_idxs, k) & expected) / len(expected))
+            results["subgraph"].append({
+                "hops": hops,
+                "max_nodes": max_nodes,
+                "median_ms": 1000 * statistics.median(times),
+                "speedup": statistics.median(full_times) / statistics.median(times),
+                "median_reached_nodes": statistics.median(sizes),
+                "recall_vs_full": {f"@{k}": float(np.mean(recalls[k])) for k in args.top_k},
+            })
+
+    print(json.dumps(results, indent=2))
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
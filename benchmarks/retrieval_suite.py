@@ -0,0 +1,256 @@
+"""
+Reproducible end-to-end benchmark of indexing and retrieval, for regression comparison between commits and
+configurations.
+
+Indexes are built with the deterministic local stand-ins of `benchmarks/stubs.py` (a hashed bag-of-words embedding
+model and a stub LLM with a response cache) instead of model servers, from
+- `reproduce/dataset/<name>_corpus.json` corpora; queries and gold passages come from `<name>.json` if present,
+  otherwise passage titles are used as known-item queries, and
+- synthetic corpora of any size (e.g. 10k / 100k / 1M passages): sentences linking Zipf-distributed entities,
+  queried by pairs of entities of one passage.
+
+For each corpus it reports indexing throughput with the per-phase profile of `profile_indexing`, load time, QPS
+and recall@k of `retrieve` and `retrieve_dpr`, per-stage latency percentiles from `HippoRAG.retrieval_metrics`,
+and peak RSS, as JSON. Use `--config key=value` to benchmark other settings, e.g. `--config ppr_subgraph_hops=2`.
+
+Usage:
+    python benchmarks/retrieval_suite.py --datasets sample 2wikimultihopqa --output results/base.json
+    python benchmarks/retrieval_suite.py --datasets --synthetic_sizes 10000 100000 1000000 --output results/scale.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hipporag import HippoRAG
+from hipporag.utils.config_utils import BaseConfig
+from hipporag.utils.profiling_utils import current_rss, process_peak_rss
+
+from stubs import HashEmbeddingModel, StubLLM
+
+MB = 1024 * 1024
+
+_SYLLABLES = ["ka", "lo", "ra", "ve", "ni", "th", "bri", "sa", "to", "lm", "mar", "en", "di", "qu", "os", "el",
+              "fa", "ru", "zen", "ya", "po", "li", "dor", "an"]
+_VERBS = ["founded", "married", "defeated", "succeeded", "visited", "employed", "studied with", "wrote about",
+          "was born near", "sponsored", "painted", "competed against"]
+
+
+def load_reproduce_dataset(name: str, num_queries: int, rng: np.random.Generator) -> Tuple[List[str], List[str], List[List[str]]]:
+    dataset_dir = os.path.join(REPO_DIR, "reproduce", "dataset")
+    with open(os.path.join(dataset_dir, f"{name}_corpus.json")) as f:
+        corpus = json.load(f)
+    docs = [f"{doc['title']}\n{doc['text']}" for doc in corpus]
+
+    samples_path = os.path.join(dataset_dir, f"{name}.json")
+    if not os.path.exists(samples_path):
+        # Known-item queries: a passage title should retrieve its passage
+        picked = rng.choice(len(corpus), size=min(num_queries, len(corpus)), replace=False)
+        return docs, [corpus[idx]["title"] for idx in picked], [[docs[idx]] for idx in picked]
+
+    with open(samples_path) as f:
+        samples = json.load(f)[:num_queries]
+    queries, gold_docs = [], []
+    for sample in samples:
+        if "paragraphs" in sample:
+            gold = [f"{p['title']}\n{p.get('text', p.get('paragraph_text'))}" for p in sample["paragraphs"] if p.get("is_supporting", True)]
+        elif "contexts" in sample:
+            gold = [f"{c['title']}\n{c['text']}" for c in sample["contexts"] if c["is_supporting"]]
+        else:
+            gold_titles = set(fact[0] for fact in sample["supporting_facts"])
+            gold = [f"{title}\n{''.join(sentences)}" for title, sentences in sample["context"] if title in gold_titles]
+        queries.append(sample["question"])
+        gold_docs.append(gold)
+    return docs, queries, gold_docs
+
+
+def synthetic_corpus(num_passages: int, num_queries: int, seed: int) -> Tuple[List[str], List[str], List[List[str]]]:
+    rng = np.random.default_rng(seed)
+    num_entities = max(1000, num_passages // 2)
+    names = set()
+    while len(names) < num_entities:
+        parts = rng.choice(_SYLLABLES, size=(2, int(rng.integers(2, 4))))
+        names.add(" ".join("".join(part).capitalize() for part in parts))
+    names = sorted(names)
+    popularity = 1.0 / np.arange(1, num_entities + 1) ** 1.1
+    popularity /= popularity.sum()
+
+    docs, passage_entities = [], []
+    entity_draws = rng.choice(num_entities, size=(num_passages, 4), p=popularity)
+    verb_draws = rng.integers(len(_VERBS), size=(num_passages, 3))
+    years = rng.integers(1700, 2020, size=num_passages)
+    for idx in range(num_passages):
+        entities = [names[e] for e in dict.fromkeys(entity_draws[idx].tolist())]
+        sentences = [f"{subject} {_VERBS[verb]} {obj}." for subject, obj, verb in zip(entities, entities[1:], verb_draws[idx])]
+        sentences.append(f"{entities[0]} was recorded in {years[idx]}.")
+        docs.append(f"Record {idx}\n" + " ".join(sentences))
+        passage_entities.append(entities)
+
+    queries, gold_docs = [], []
+    for idx in rng.choice(num_passages, size=min(num_queries, num_passages), replace=False):
+        entities = passage_entities[idx]
+        pair = rng.choice(len(entities), size=min(2, len(entities)), replace=False)
+        queries.append("How are " + " and ".join(entities[p] for p in pair) + " connected?")
+        gold_docs.append([docs[idx]])
+    return docs, queries, gold_docs
+
+
+def recall_at_k(results, gold_docs: List[List[str]], k_list: List[int]) -> Dict[str, float]:
+    recalls = {}
+    for k in k_list:
+        recalls[f"@{k}"] = float(np.mean([len(set(result.docs[:k]) & set(gold)) / len(gold)
+                                          for result, gold in zip(results, gold_docs) if gold]))
+    return recalls
+
+
+def time_retrieval(retrieve_fn, queries: List[str], gold_docs: List[List[str]], batch_size: int, k_list: List[int]) -> Dict[str, Any]:
+    results = []
+    start = time.perf_counter()
+    for batch_start in range(0, len(queries), batch_size):
+        results.extend(retrieve_fn(queries[batch_start:batch_start + batch_size], num_to_retrieve=max(k_list)))
+    wall_time = time.perf_counter() - start
+    return {"queries": len(queries),
+            "wall_time_s": round(wall_time, 4),
+            "qps": round(len(queries) / wall_time, 2),
+            "recall": recall_at_k(results, gold_docs, k_list)}
+
+
+def benchmark_corpus(name: str, docs: List[str], queries: List[str], gold_docs: List[List[str]], save_dir: str,
+                     args, config_overrides: Dict[str, Any]) -> Dict[str, Any]:
+    # The index is rebuilt on every run, while the stub LLM cache next to it is kept when `--save_dir` is given
+    index_dir = os.path.join(save_dir, "index")
+    shutil.rmtree(index_dir, ignore_errors=True)
+    llm_cache_path = os.path.join(save_dir, "stub_llm_cache.json")
+
+    def make_hipporag() -> HippoRAG:
+        config = BaseConfig(save_dir=index_dir,
+                            llm_name="stub-llm",
+                            embedding_model_name="hash-embedding",
+                            profile_indexing=True,
+                            **config_overrides)
+        return HippoRAG(global_config=config,
+                        embedding_model=HashEmbeddingModel(config, embedding_dim=args.embedding_dim),
+                        llm_model=StubLLM(config, cache_path=llm_cache_path, replay_sqlite_path=args.llm_replay))
+
+    print(f"[{name}] indexing {len(docs)} passages", file=sys.stderr)
+    hipporag = make_hipporag()
+    start = time.perf_counter()
+    hipporag.index(docs)
+    indexing_time = time.perf_counter() - start
+    reports = sorted(glob.glob(os.path.join(hipporag.working_dir, "profiles", "*.json")))
+    with open(reports[-1]) as f:
+        profile = json.load(f)
+    llm_model = hipporag.llm_model
+    llm_model.save()
+    result = {
+        "name": name,
+        "passages": len(docs),
+        "graph": {"vertices": hipporag.graph.vcount(), "edges": hipporag.graph.ecount()},
+        "indexing": {"wall_time_s": round(indexing_time, 4),
+                     "passages_per_s": round(len(docs) / indexing_time, 2),
+                     "llm_cache_hits": llm_model.hits,
+                     "llm_cache_misses": llm_model.misses,
+                     "phases": profile["phases"],
+                     "rss_after_mb": round((current_rss() or 0) / MB, 1)},
+    }
+    del hipporag
+
+    # Retrieval is measured on a freshly loaded index, like a serving process
+    start = time.perf_counter()
+    hipporag = make_hipporag()
+    hipporag.prepare_retrieval_objects()
+    result["load_time_s"] = round(time.perf_counter() - start, 4)
+
+    print(f"[{name}] retrieving {len(queries)} queries", file=sys.stderr)
+    result["retrieval"] = {}
+    for mode, retrieve_fn in (("hipporag", hipporag.retrieve), ("dpr", hipporag.retrieve_dpr)):
+        hipporag.retrieval_metrics.reset()
+        result["retrieval"][mode] = time_retrieval(retrieve_fn, queries, gold_docs, args.batch_size, args.top_k)
+        result["retrieval"][mode]["stages"] = hipporag.retrieval_metrics.summary()
+    result["rss_after_retrieval_mb"] = round((current_rss() or 0) / MB, 1)
+    return result
+
+
+def parse_config_overrides(overrides: List[str]) -> Dict[str, Any]:
+    parsed = {}
+    for override in overrides:
+        key, value = override.split("=", 1)
+        try:
+            parsed[key] = json.loads(value)
+        except json.JSONDecodeError:
+            parsed[key] = value
+    return parsed
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import igraph
+    return {"commit": commit, "python_hash_seed": os.environ.get("PYTHONHASHSEED"),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "igraph": igraph.__version__, "platform": platform.platform(), "cpu_count": os.cpu_count()}
+
+
+def main():
+    # Graph construction iterates over sets of strings, so vertex order and PPR tie-breaking depend on the hash seed
+    if "PYTHONHASHSEED" not in os.environ:
+        os.execve(sys.executable, [sys.executable] + sys.argv, dict(os.environ, PYTHONHASHSEED="0"))
+
+    parser = argparse.ArgumentParser(description="Benchmark HippoRAG indexing and retrieval with local stand-in models")
+    parser.add_argument("--datasets", type=str, nargs="*", default=["sample", "2wikimultihopqa"], help="Names of reproduce/dataset/<name>_corpus.json corpora")
+    parser.add_argument("--synthetic_sizes", type=int, nargs="*", default=[10000], help="Passage counts of synthetic corpora")
+    parser.add_argument("--num_queries", type=int, default=200)
+    parser.add_argument("--batch_size", type=int, default=32, help="Queries per retrieve call")
+    parser.add_argument("--top_k", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--embedding_dim", type=int, default=256)
+    parser.add_argument("--llm_replay", type=str, default=None, help="SQLite LLM response cache of a real run to replay")
+    parser.add_argument("--config", type=str, nargs="*", default=[], help="BaseConfig overrides as key=value (JSON values)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save_dir", type=str, default=None, help="Directory for the indexes and stub LLM caches; a temporary one is removed afterwards if not given")
+    parser.add_argument("--output", type=str, default=None, help="Write the results JSON to this file as well")
+    args = parser.parse_args()
+
+    config_overrides = parse_config_overrides(args.config)
+    save_dir = args.save_dir or tempfile.mkdtemp(prefix="hipporag_bench_")
+    os.makedirs(save_dir, exist_ok=True)
+    rng = np.random.default_rng(args.seed)
+
+    corpora = [(name, lambda name=name: load_reproduce_dataset(name, args.num_queries, rng)) for name in args.datasets]
+    corpora += [(f"synthetic_{size}", lambda size=size: synthetic_corpus(size, args.num_queries, args.seed))
+                for size in args.synthetic_sizes]
+
+    results = {"environment": environment(), "config_overrides": config_overrides, "corpora": []}
+    try:
+        for name, load in corpora:
+            docs, queries, gold_docs = load()
+            results["corpora"].append(benchmark_corpus(name, docs, queries, gold_docs, os.path.join(save_dir, name),
+                                                       args, config_overrides))
+    finally:
+        if args.save_dir is None:
+            shutil.rmtree(save_dir, ignore_errors=True)
+    results["process_peak_rss_mb"] = round(process_peak_rss() / MB, 1)
+
+    print(json.dumps(results, indent=2))
+    if args.output is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Deterministic local stand-ins for the embedding model and the LLM, so benchmarks measure HippoRAG itself rather
+than model servers, run offline and give the same index and rankings on every run.
+
+- `HashEmbeddingModel` embeds a text as its signed feature-hashed bag of words (lowercased word unigrams),
+  L2-normalized. Texts sharing words get similar vectors, so dense retrieval, synonymy edges and fact scoring
+  behave sensibly on real corpora.
+- `StubLLM` answers from a response cache. Prompts it has not seen are answered by cheap heuristics (capitalized
+  spans as named entities, consecutive entities as triples, the first candidate facts as the recognition memory
+  output) and the answer is cached. The cache can be seeded from the SQLite cache of a real `CacheOpenAI` run,
+  whose keys it shares, to replay recorded responses.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from hipporag.embedding_model.base import BaseEmbeddingModel, EmbeddingConfig
+from hipporag.llm.base import BaseLLM, LLMConfig
+from hipporag.utils.config_utils import BaseConfig
+
+_WORD = re.compile(r"\w+")
+_CAPITALIZED_SPAN = re.compile(r"\b(?:[A-Z][\w'.-]*|\d{3,4})(?:\s+(?:of\s+|de\s+|the\s+)?[A-Z][\w'.-]*)*")
+
+
+class HashEmbeddingModel(BaseEmbeddingModel):
+    instruction_sensitive = False
+
+    def __init__(self, global_config: Optional[BaseConfig] = None, embedding_dim: int = 256) -> None:
+        super().__init__(global_config=global_config)
+        self.embedding_dim = embedding_dim
+        self.embedding_config = EmbeddingConfig.from_dict({"embedding_model_name": self.embedding_model_name,
+                                                           "embedding_dim": embedding_dim})
+        self._token_slots: Dict[str, Tuple[int, float]] = {}
+
+    def _slot(self, token: str) -> Tuple[int, float]:
+        slot = self._token_slots.get(token)
+        if slot is None:
+            digest = int.from_bytes(hashlib.md5(token.encode("utf-8")).digest()[:8], "little")
+            slot = (digest % self.embedding_dim, 1.0 if (digest >> 63) & 1 else -1.0)
+            self._token_slots[token] = slot
+        return slot
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _WORD.findall(text.lower()):
+                column, sign = self._slot(token)
+                embeddings[row, column] += sign
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.where(norms > 0, norms, 1.0)
+
+    def batch_encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        return self.encode(texts)
+
+
+class StubLLM(BaseLLM):
+
+    def __init__(self, global_config: Optional[BaseConfig] = None, cache_path: Optional[str] = None,
+                 replay_sqlite_path: Optional[str] = None) -> None:
+        """
+        Parameters:
+            global_config: The global configuration; `llm_name`, `seed` and `temperature` enter the cache key.
+            cache_path: JSON file the response cache is loaded from and saved to with `save()`.
+            replay_sqlite_path: SQLite response cache of a `CacheOpenAI` run to seed the cache with.
+        """
+        super().__init__(global_config=global_config)
+        self._init_llm_config()
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[str, dict]] = {}
+        self.hits = 0
+        self.misses = 0
+
+        if replay_sqlite_path is not None:
+            with sqlite3.connect(replay_sqlite_path) as conn:
+                for key, message, metadata in conn.execute("SELECT key, message, metadata FROM cache"):
+                    self._cache[key] = (message, json.loads(metadata))
+        if cache_path is not None and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                self._cache.update({key: (message, metadata) for key, (message, metadata) in json.load(f).items()})
+
+    def _init_llm_config(self) -> None:
+        self.llm_config = LLMConfig.from_dict({"llm_name": self.llm_name,
+                                               "generate_params": {"model": self.global_config.llm_name,
+                                                                   "seed": self.global_config.seed,
+                                                                   "temperature": self.global_config.temperature}})
+
+    def _key(self, messages: List[dict]) -> str:
+        """The key `CacheOpenAI` stores the response of `messages` under."""
+        generate_params = self.llm_config.generate_params
+        key_data = {"messages": messages, "model": generate_params["model"], "seed": generate_params["seed"],
+                    "temperature": generate_params["temperature"]}
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def infer(self, messages: List[dict], **kwargs) -> Tuple[str, dict, bool]:
+        key = self._key(messages)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached[0], dict(cached[1]), True
+            self.misses += 1
+
+        response = self._respond(messages)
+        metadata = {"prompt_tokens": sum(len(message["content"]) for message in messages) // 4,
+                    "completion_tokens": len(response) // 4,
+                    "finish_reason": "stop"}
+        with self._lock:
+            self._cache[key] = (response, metadata)
+        return response, dict(metadata), False
+
+    def save(self) -> None:
+        if self.cache_path is None:
+            return
+        with self._lock:
+            with open(self.cache_path, "w") as f:
+                json.dump(self._cache, f)
+
+    def _respond(self, messages: List[dict]) -> str:
+        system = messages[0]["content"] if messages[0]["role"] == "system" else ""
+        prompt = messages[-1]["content"]
+        if "[[ ## fact_before_filter ## ]]" in prompt:
+            return self._filter_facts(prompt)
+        if system.startswith("Your task is to extract named entities"):
+            return json.dumps({"named_entities": self._entities(prompt)})
+        if system.startswith("Your task is to construct an RDF"):
+            return json.dumps({"triples": self._triples(prompt)})
+        return "Answer: unknown"
+
+    @staticmethod
+    def _entities(passage: str) -> List[str]:
+        return list(dict.fromkeys(match.group().strip() for match in _CAPITALIZED_SPAN.finditer(passage)))
+
+    def _triples(self, prompt: str) -> List[List[str]]:
+        """Links each named entity to the next one in the passage, with up to three words in between as predicate."""
+        match = re.search(r'\{"named_entities":\s*(\[.*?\])\}', prompt, re.DOTALL)
+        named_entities = json.loads(match.group(1)) if match else []
+        passage = prompt[:match.start()] if match else prompt
+        positions = sorted((passage.find(entity), entity) for entity in named_entities if passage.find(entity) >= 0)
+        triples = []
+        for (start, subject), (next_start, obj) in zip(positions, positions[1:]):
+            words = _WORD.findall(passage[start + len(subject):next_start].lower())
+            triples.append([subject, " ".join(words[:3]) or "related to", obj])
+        return triples
+
+    @staticmethod
+    def _filter_facts(prompt: str) -> str:
+        """Keeps the first four candidate facts, in the output format `DSPyFilter` parses."""
+        facts = []
+        match = re.search(r"\[\[ ## fact_before_filter ## \]\]\n(.*?)\n\n", prompt, re.DOTALL)
+        if match:
+            try:
+                facts = json.loads(match.group(1))["fact"][:4]
+            except (ValueError, KeyError):
+                pass
+        return f"[[ ## fact_after_filter ## ]]\n{json.dumps({'fact': facts})}\n\n[[ ## completed ## ]]"
@@ -99,7 +99,7 @@ def main():
     hipporag = HippoRAG(global_config=config)
     
     # 如果没有现有的知识图谱，先创建一个简单的示例
-    if not os.path.exists(hipporag._graph_pickle_filename):
+    if hipporag._manifest is None:
         print("⚠️  未找到现有知识图谱，创建示例数据...")
         
         # 示例文档
@@ -3,12 +3,12 @@ import os
 import logging
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
-from typing import Union, Optional, List, Set, Dict, Any, Tuple, Literal
+from typing import Union, Optional, List, Set, Dict, Any, Tuple, Literal, Iterator
 import numpy as np
 import importlib
 from collections import defaultdict
-from transformers import HfArgumentParser
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager, nullcontext
 from tqdm import tqdm
 from igraph import Graph
 import igraph as ig
@@ -16,21 +16,26 @@ import numpy as np
 from collections import defaultdict
 import re
 import time
+import threading
 
 from .llm import _get_llm_class, BaseLLM
 from .embedding_model import _get_embedding_model_class, BaseEmbeddingModel
 from .embedding_store import EmbeddingStore
+from .index_snapshot import IndexSnapshot, SnapshotPin, snapshot_attribute, pinned_to_snapshot
 from .information_extraction import OpenIE
-from .information_extraction.openie_vllm_offline import VLLMOfflineOpenIE
-from .information_extraction.openie_transformers_offline import TransformersOfflineOpenIE
 from .evaluation.retrieval_eval import RetrievalRecall
 from .evaluation.qa_eval import QAExactMatch, QAF1Score
 from .prompts.linking import get_query_instruction
 from .prompts.prompt_template_manager import PromptTemplateManager
-from .rerank import DSPyFilter
+from .rerank import _get_rerank_filter
 from .utils.misc_utils import *
 from .utils.misc_utils import NerRawOutput, TripleRawOutput
-from .utils.embed_utils import retrieve_knn
+from .utils.embed_utils import retrieve_knn, QueryEmbeddingCache
+from .utils.graph_utils import save_graph_snapshot, load_graph_snapshot, migrate_graph_vertex_attributes, subgraph_personalized_pagerank
+from .utils.ppr_basis import PPRBasis
+from .utils.metrics_utils import RetrievalMetrics
+from .utils.profiling_utils import IndexingProfiler, profile_phase
+from .utils.manifest_utils import load_manifest, commit_manifest, collect_garbage, atomic_write_json, versioned_filename
 from .utils.typing import Triple
 from .utils.config_utils import BaseConfig
 
@@ -38,6 +43,27 @@ logger = logging.getLogger(__name__)
 
 class HippoRAG:
 
+    # Index state lives in an `IndexSnapshot`; these resolve against the snapshot of the current thread
+    _manifest = snapshot_attribute("_manifest", "manifest")
+    graph = snapshot_attribute("graph")
+    chunk_embedding_store = snapshot_attribute("chunk_embedding_store")
+    entity_embedding_store = snapshot_attribute("entity_embedding_store")
+    fact_embedding_store = snapshot_attribute("fact_embedding_store")
+    entity_node_keys = snapshot_attribute("entity_node_keys")
+    passage_node_keys = snapshot_attribute("passage_node_keys")
+    fact_node_keys = snapshot_attribute("fact_node_keys")
+    node_name_to_vertex_idx = snapshot_attribute("node_name_to_vertex_idx")
+    entity_node_idxs = snapshot_attribute("entity_node_idxs")
+    passage_node_idxs = snapshot_attribute("passage_node_idxs")
+    entity_embeddings = snapshot_attribute("entity_embeddings")
+    passage_embeddings = snapshot_attribute("passage_embeddings")
+    fact_embeddings = snapshot_attribute("fact_embeddings")
+    chunk_to_openie_info = snapshot_attribute("chunk_to_openie_info")
+    proc_triples_to_docs = snapshot_attribute("proc_triples_to_docs")
+    ent_node_to_chunk_ids = snapshot_attribute("ent_node_to_chunk_ids")
+    ppr_basis = snapshot_attribute("ppr_basis")
+    ready_to_retrieve = snapshot_attribute("ready_to_retrieve")
+
     def __init__(self,
                  global_config=None,
                  save_dir=None,
@@ -46,7 +72,10 @@ class HippoRAG:
                  embedding_model_name=None,
                  embedding_base_url=None,
                  azure_endpoint=None,
-                 azure_embedding_endpoint=None):
+                 azure_embedding_endpoint=None,
+                 read_only=None,
+                 embedding_model=None,
+                 llm_model=None):
         """
         Initializes an instance of the class and its related components.
 
@@ -56,9 +85,9 @@ class HippoRAG:
             saving_dir (str): The directory where specific HippoRAG instances will be stored. This defaults
                 to `outputs` if no value is provided.
             llm_model (BaseLLM): The language model used for processing based on the global
-                configuration settings.
+                configuration settings. Created on first use.
             openie (Union[OpenIE, VLLMOfflineOpenIE]): The Open Information Extraction module
-                configured in either online or offline mode based on the global settings.
+                configured in either online or offline mode based on the global settings. Created on first use.
             graph: The graph instance initialized by the `initialize_graph` method.
             embedding_model (BaseEmbeddingModel): The embedding model associated with the current
                 configuration.
@@ -66,14 +95,21 @@ class HippoRAG:
             entity_embedding_store (EmbeddingStore): The embedding store handling entity embeddings.
             fact_embedding_store (EmbeddingStore): The embedding store handling fact embeddings.
             prompt_template_manager (PromptTemplateManager): The manager for handling prompt templates
-                and roles mappings.
+                and roles mappings. Created on first use.
             openie_results_path (str): The file path for storing Open Information Extraction results
                 based on the dataset and LLM name in the global configuration.
-            rerank_filter (Optional[DSPyFilter]): The filter responsible for reranking information
-                when a rerank file path is specified in the global configuration.
+            rerank_filter (Union[DSPyFilter, CrossEncoderFilter, EmbeddingFilter]): The recognition memory
+                filter selected by `rerank_filter_name` in the global configuration. Created on first use.
+            read_only (bool): Whether this instance only serves retrieval/QA over an existing index. Write
+                operations (`index`, `delete`, saving the graph or OpenIE results) raise a RuntimeError.
             ready_to_retrieve (bool): A flag indicating whether the system is ready for retrieval
                 operations.
 
+            The graph, embedding stores and retrieval objects belong to the active `IndexSnapshot`; a serving
+            instance switches to a newly committed index version with `refresh` (see `open_snapshot`). Writes
+            modify the active snapshot in place, so retrievals are only isolated from updates in read-only
+            instances that use `refresh`.
+
         Parameters:
             global_config: The global configuration object. Defaults to None, leading to initialization
                 of a new BaseConfig object.
@@ -82,7 +118,15 @@ class HippoRAG:
             llm_model_name: LLM model name, can be inserted directly as well as through configuration file.
             embedding_model_name: Embedding model name, can be inserted directly as well as through configuration file.
             llm_base_url: LLM URL for a deployed LLM model, can be inserted directly as well as through configuration file.
+            read_only: Load an existing index for serving only, can be inserted directly as well as through configuration file.
+            embedding_model: A ready embedding model (e.g. a local stand-in for benchmarks) used instead of the one named
+                by `embedding_model_name`, which then only labels the working directory.
+            llm_model: A ready LLM used instead of the one named by `llm_name`, which then only labels the working directory.
         """
+        self._snapshot = IndexSnapshot()
+        self._snapshot_pin = SnapshotPin()
+        self._snapshot_lock = threading.RLock()
+
         if global_config is None:
             self.global_config = BaseConfig()
         else:
@@ -110,6 +154,10 @@ class HippoRAG:
         if azure_embedding_endpoint is not None:
             self.global_config.azure_embedding_endpoint = azure_embedding_endpoint
 
+        if read_only is not None:
+            self.global_config.read_only = read_only
+        self.read_only = self.global_config.read_only
+
         _print_config = ",\n  ".join([f"{k} = {v}" for k, v in asdict(self.global_config).items()])
         logger.debug(f"HippoRAG init with config:\n  {_print_config}\n")
 
@@ -119,21 +167,27 @@ class HippoRAG:
         self.working_dir = os.path.join(self.global_config.save_dir, f"{llm_label}_{embedding_label}")
 
         if not os.path.exists(self.working_dir):
+            if self.read_only:
+                raise FileNotFoundError(f"No index found at {self.working_dir}, a read-only HippoRAG needs an existing index.")
             logger.info(f"Creating working directory: {self.working_dir}")
             os.makedirs(self.working_dir, exist_ok=True)
 
-        self.llm_model: BaseLLM = _get_llm_class(self.global_config)
+        # Last committed index version; None for a new index or one written before manifests were introduced
+        self._manifest = load_manifest(self.working_dir)
 
-        if self.global_config.openie_mode == 'online':
-            self.openie = OpenIE(llm_model=self.llm_model)
-        elif self.global_config.openie_mode == 'offline':
-            self.openie = VLLMOfflineOpenIE(self.global_config)
-        elif self.global_config.openie_mode ==  'Transformers-offline':
-            self.openie = TransformersOfflineOpenIE(self.global_config)
+        # The LLM, OpenIE module, prompt manager and rerank filter are only built when first used, so a process
+        # that only serves retrieval does not pay for them
+        self._lazy_init_lock = threading.RLock()
+        self._llm_model = llm_model
+        self._openie = None
+        self._prompt_template_manager = None
+        self._rerank_filter = None
 
         self.graph = self.initialize_graph()
 
-        if self.global_config.openie_mode == 'offline':
+        if embedding_model is not None:
+            self.embedding_model: BaseEmbeddingModel = embedding_model
+        elif self.global_config.openie_mode == 'offline':
             self.embedding_model = None
         else:
             self.embedding_model: BaseEmbeddingModel = _get_embedding_model_class(
@@ -141,37 +195,234 @@ class HippoRAG:
                                                                               embedding_model_name=self.global_config.embedding_model_name)
         self.chunk_embedding_store = EmbeddingStore(self.embedding_model,
                                                     os.path.join(self.working_dir, "chunk_embeddings"),
-                                                    self.global_config.embedding_batch_size, 'chunk')
+                                                    self.global_config.embedding_batch_size, 'chunk',
+                                                    read_only=self.read_only,
+                                                    compaction_ratio=self.global_config.delete_compaction_ratio,
+                                                    **self._get_manifest_store_files("chunk_embeddings", 'chunk'))
         self.entity_embedding_store = EmbeddingStore(self.embedding_model,
                                                      os.path.join(self.working_dir, "entity_embeddings"),
-                                                     self.global_config.embedding_batch_size, 'entity')
+                                                     self.global_config.embedding_batch_size, 'entity',
+                                                     read_only=self.read_only,
+                                                     compaction_ratio=self.global_config.delete_compaction_ratio,
+                                                     **self._get_manifest_store_files("entity_embeddings", 'entity'))
         self.fact_embedding_store = EmbeddingStore(self.embedding_model,
                                                    os.path.join(self.working_dir, "fact_embeddings"),
-                                                   self.global_config.embedding_batch_size, 'fact')
-
-        self.prompt_template_manager = PromptTemplateManager(role_mapping={"system": "system", "user": "user", "assistant": "assistant"})
+                                                   self.global_config.embedding_batch_size, 'fact',
+                                                   read_only=self.read_only,
+                                                   compaction_ratio=self.global_config.delete_compaction_ratio,
+                                                   **self._get_manifest_store_files("fact_embeddings", 'fact'))
 
         self.openie_results_path = os.path.join(self.global_config.save_dir,f'openie_results_ner_{self.global_config.llm_name.replace("/", "_")}.json')
 
-        self.rerank_filter = DSPyFilter(self)
+        self.query_embedding_cache = QueryEmbeddingCache(
+            model_name=self.global_config.embedding_model_name,
+            max_size=self.global_config.query_embedding_cache_size,
+            persist_path=os.path.join(self.working_dir, "query_embedding_cache.npz") if self.global_config.query_embedding_cache_persist else None,
+            instruction_sensitive=getattr(self.embedding_model, "instruction_sensitive", True))
 
         self.ready_to_retrieve = False
 
-        self.ppr_time = 0
-        self.rerank_time = 0
-        self.all_retrieval_time = 0
+        self.retrieval_metrics = RetrievalMetrics(window_size=self.global_config.retrieval_metrics_window_size)
 
         self.ent_node_to_chunk_ids = None
+        self.synonymy_edges = set()
+
+    @property
+    def llm_model(self) -> BaseLLM:
+        if self._llm_model is None:
+            with self._lazy_init_lock:
+                if self._llm_model is None:
+                    self._llm_model = _get_llm_class(self.global_config)
+        return self._llm_model
+
+    @llm_model.setter
+    def llm_model(self, llm_model: BaseLLM):
+        self._llm_model = llm_model
+
+    @property
+    def openie(self):
+        if self._openie is None:
+            with self._lazy_init_lock:
+                if self._openie is None:
+                    if self.global_config.openie_mode == 'online':
+                        self._openie = OpenIE(llm_model=self.llm_model)
+                    elif self.global_config.openie_mode == 'offline':
+                        from .information_extraction.openie_vllm_offline import VLLMOfflineOpenIE
+                        self._openie = VLLMOfflineOpenIE(self.global_config)
+                    elif self.global_config.openie_mode ==  'Transformers-offline':
+                        from .information_extraction.openie_transformers_offline import TransformersOfflineOpenIE
+                        self._openie = TransformersOfflineOpenIE(self.global_config)
+        return self._openie
+
+    @openie.setter
+    def openie(self, openie):
+        self._openie = openie
+
+    @property
+    def prompt_template_manager(self) -> PromptTemplateManager:
+        if self._prompt_template_manager is None:
+            with self._lazy_init_lock:
+                if self._prompt_template_manager is None:
+                    self._prompt_template_manager = PromptTemplateManager(role_mapping={"system": "system", "user": "user", "assistant": "assistant"})
+        return self._prompt_template_manager
+
+    @prompt_template_manager.setter
+    def prompt_template_manager(self, prompt_template_manager: PromptTemplateManager):
+        self._prompt_template_manager = prompt_template_manager
+
+    @property
+    def rerank_filter(self):
+        if self._rerank_filter is None:
+            with self._lazy_init_lock:
+                if self._rerank_filter is None:
+                    self._rerank_filter = _get_rerank_filter(self)
+        return self._rerank_filter
+
+    @rerank_filter.setter
+    def rerank_filter(self, rerank_filter):
+        self._rerank_filter = rerank_filter
+
+    def _check_writable(self, operation: str):
+        if self.read_only:
+            raise RuntimeError(f"HippoRAG was loaded read-only, {operation} is not allowed.")
+
+    def _get_manifest_store_files(self, artifact_name: str, namespace: str,
+                                  manifest: Optional[Dict[str, Any]] = None) -> Dict[str, Optional[str]]:
+        """
+        `EmbeddingStore` file arguments for the committed version of a store (in `manifest`, default: the manifest
+        of the current snapshot). A store without a (tombstone) file in the manifest points to the versioned name it
+        would have had, which does not exist. Without a manifest the stores use their default (legacy) files.
+        """
+        manifest = manifest if manifest is not None else self._manifest
+        if manifest is None:
+            return {}
+        store_files = {}
+        for key, argument, default_name in (("data", "filename", f"vdb_{namespace}.parquet"),
+                                            ("tombstones", "tombstone_filename", f"vdb_{namespace}_tombstones.json")):
+            rel_path = manifest["artifacts"][artifact_name][key]
+            if rel_path is None:
+                rel_path = versioned_filename(os.path.join(artifact_name, default_name), manifest["version"])
+            store_files[argument] = os.path.join(self.working_dir, rel_path)
+        return store_files
+
+    @property
+    def snapshot(self) -> IndexSnapshot:
+        """The active index snapshot, which new retrieval calls use."""
+        return self._snapshot
+
+    def _current_snapshot(self) -> IndexSnapshot:
+        pinned = self._snapshot_pin.snapshot
+        return pinned if pinned is not None else self._snapshot
+
+    @contextmanager
+    def pin_snapshot(self, snapshot: Optional[IndexSnapshot] = None):
+        """
+        Pins the calling thread to `snapshot` (default: the snapshot it currently uses): inside the context, index
+        attributes resolve against it even if another snapshot is swapped in meanwhile. `retrieve`, `rag_qa` and
+        their DPR variants pin themselves, so an in-flight call finishes on the snapshot it started on.
+        """
+        previous = self._snapshot_pin.snapshot
+        self._snapshot_pin.snapshot = snapshot if snapshot is not None else self._current_snapshot()
+        try:
+            yield self._snapshot_pin.snapshot
+        finally:
+            self._snapshot_pin.snapshot = previous
+
+    def _call_pinned(self, snapshot: IndexSnapshot, fn, *args):
+        with self.pin_snapshot(snapshot):
+            return fn(*args)
+
+    def open_snapshot(self, version: Optional[int] = None) -> IndexSnapshot:
+        """
+        Opens a committed index version (default: the latest; the previous version is retained as well) as a new
+        snapshot with its retrieval objects prepared, without changing the active snapshot.
 
+        Segments shared with the active snapshot are not loaded again: embedding stores and the graph whose
+        files did not change are reused as they are, together with their keys, embedding matrices and OpenIE
+        posting maps, and a store whose parquet file is unchanged only reads its new tombstones.
+
+        Parameters:
+            version: Index version to open.
+
+        Returns:
+            IndexSnapshot: The opened snapshot; pass it to `swap_snapshot` to serve it.
+        """
+        manifest = load_manifest(self.working_dir, version=version)
+        if manifest is None:
+            raise FileNotFoundError(f"No committed index version found at {self.working_dir}")
+
+        current = self._snapshot
+        current_artifacts = current.manifest["artifacts"] if current.manifest is not None else {}
+        snapshot = IndexSnapshot(manifest=manifest)
+
+        for artifact_name, store_name, namespace in (("chunk_embeddings", "chunk_embedding_store", "chunk"),
+                                                     ("entity_embeddings", "entity_embedding_store", "entity"),
+                                                     ("fact_embeddings", "fact_embedding_store", "fact")):
+            current_store = getattr(current, store_name)
+            if manifest["artifacts"][artifact_name] == current_artifacts.get(artifact_name):
+                embedding_store = current_store
+            else:
+                embedding_store = current_store.open_version(
+                    **self._get_manifest_store_files(artifact_name, namespace, manifest=manifest))
+            setattr(snapshot, store_name, embedding_store)
+
+        if manifest["artifacts"]["graph"] == current_artifacts.get("graph"):
+            snapshot.graph = current.graph
+        else:
+            graph_source = os.path.join(self.working_dir, manifest["artifacts"]["graph"])
+            snapshot.graph = load_graph_snapshot(graph_source)
+            if snapshot.graph is None:
+                raise FileNotFoundError(f"Graph snapshot of index version {manifest['version']} not found at {graph_source}")
+
+        with self.pin_snapshot(snapshot):
+            self.prepare_retrieval_objects(reuse_from=current)
+
+        logger.info(f"Opened index version {manifest['version']}")
+        return snapshot
+
+    def swap_snapshot(self, snapshot: IndexSnapshot) -> IndexSnapshot:
+        """
+        Atomically makes `snapshot` the active one: calls that start afterwards use it, while calls already pinned
+        to the previous snapshot finish on it.
+
+        Returns:
+            IndexSnapshot: The previously active snapshot.
+        """
+        with self._snapshot_lock:
+            previous, self._snapshot = self._snapshot, snapshot
+        logger.info(f"Swapped index snapshot: version {previous.version} -> {snapshot.version}")
+        return previous
+
+    def refresh(self) -> bool:
+        """
+        Opens and swaps in the latest committed index version if it is newer than the active snapshot, e.g. in a
+        read-only serving process after a writer committed an update. Concurrent calls open it only once.
+
+        Returns:
+            bool: Whether a new snapshot was swapped in.
+        """
+        with self._snapshot_lock:
+            manifest = load_manifest(self.working_dir)
+            if manifest is None or manifest["version"] == self._snapshot.version:
+                return False
+            self.swap_snapshot(self.open_snapshot(version=manifest["version"]))
+            return True
+
+    def close(self):
+        """Stops the encode worker processes of the embedding model, if it started any."""
+        if self.embedding_model is not None:
+            self.embedding_model.close_encode_pool()
 
     def initialize_graph(self):
         """
-        Initializes a graph using a Pickle file if available or creates a new graph.
+        Initializes a graph from a saved snapshot if available or creates a new graph.
 
-        The function attempts to load a pre-existing graph stored in a Pickle file. If the file
-        is not present or the graph needs to be created from scratch, it initializes a new directed
-        or undirected graph based on the global configuration. If the graph is loaded successfully
-        from the file, pertinent information about the graph (number of nodes and edges) is logged.
+        The function loads the graph snapshot of the committed index version named by the manifest. For indexes
+        written before manifests were introduced, it attempts to load the columnar graph snapshot in `graph/` and
+        falls back to a graph stored in a Pickle file. If neither is present or the graph needs to be
+        created from scratch, it initializes a new directed or undirected graph based on the global configuration.
+        If the graph is loaded successfully, pertinent information about the graph (number of nodes and edges)
+        is logged.
 
         Returns:
             ig.Graph: A pre-loaded or newly initialized graph.
@@ -179,25 +430,38 @@ class HippoRAG:
         Raises:
             None
         """
+        self._graph_snapshot_dir = os.path.join(
+            self.working_dir, f"graph"
+        )
         self._graph_pickle_filename = os.path.join(
             self.working_dir, f"graph.pickle"
         )
 
         preloaded_graph = None
-
-        if not self.global_config.force_index_from_scratch:
-            if os.path.exists(self._graph_pickle_filename):
+        graph_source = None
+
+        if not self.global_config.force_index_from_scratch and self._manifest is not None:
+            graph_source = os.path.join(self.working_dir, self._manifest["artifacts"]["graph"])
+            preloaded_graph = load_graph_snapshot(graph_source)
+        elif not self.global_config.force_index_from_scratch:
+            preloaded_graph = load_graph_snapshot(self._graph_snapshot_dir)
+            graph_source = self._graph_snapshot_dir
+            if preloaded_graph is None and os.path.exists(self._graph_pickle_filename):
                 preloaded_graph = ig.Graph.Read_Pickle(self._graph_pickle_filename)
+                graph_source = self._graph_pickle_filename
 
         if preloaded_graph is None:
             return ig.Graph(directed=self.global_config.is_directed_graph)
         else:
             logger.info(
-                f"Loaded graph from {self._graph_pickle_filename} with {preloaded_graph.vcount()} nodes, {preloaded_graph.ecount()} edges"
+                f"Loaded graph from {graph_source} with {preloaded_graph.vcount()} nodes, {preloaded_graph.ecount()} edges"
             )
+            # Persisted with the next committed index version
+            migrate_graph_vertex_attributes(preloaded_graph)
             return preloaded_graph
 
     def pre_openie(self,  docs: List[str]):
+        self._check_writable("pre_openie")
         logger.info(f"Indexing Documents")
         logger.info(f"Performing OpenIE Offline")
 
@@ -219,12 +483,30 @@ class HippoRAG:
         """
         Indexes the given documents based on the HippoRAG 2 framework which generates an OpenIE knowledge graph
         based on the given documents and encodes passages, entities and facts separately for later retrieval.
+        The updated stores and graph are committed together as a new index version (see `_commit_index_version`).
 
         Parameters:
             docs : List[str]
                 A list of documents to be indexed.
         """
+        self._check_writable("index")
+
+        self._apply_document_changes(docs_to_delete=[], docs_to_add=docs)
+
+    def _index_documents(self, docs: List[str], all_openie_info: Optional[List[dict]] = None) -> List[dict]:
+        """
+        Runs `index` for the given documents in memory; the OpenIE results file, a cache of extractions that is
+        only read for chunks in the chunk store, is saved right after extraction.
 
+        Parameters:
+            docs : List[str]
+                A list of documents to be indexed.
+            all_openie_info : Optional[List[dict]]
+                OpenIE results of the already indexed chunks. If None, they are loaded from the OpenIE results file.
+
+        Returns:
+            List[dict]: All OpenIE results, including the new ones.
+        """
         logger.info(f"Indexing Documents")
 
         logger.info(f"Performing OpenIE")
@@ -232,10 +514,15 @@ class HippoRAG:
         if self.global_config.openie_mode == 'offline':
             self.pre_openie(docs)
 
-        self.chunk_embedding_store.insert_strings(docs)
+        with profile_phase("chunk_encoding"):
+            self.chunk_embedding_store.insert_strings(docs)
         chunk_to_rows = self.chunk_embedding_store.get_all_id_to_rows()
 
-        all_openie_info, chunk_keys_to_process = self.load_existing_openie(chunk_to_rows.keys())
+        if all_openie_info is None:
+            all_openie_info, chunk_keys_to_process = self.load_existing_openie(chunk_to_rows.keys())
+        else:
+            existing_openie_keys = set(openie_info['idx'] for openie_info in all_openie_info)
+            chunk_keys_to_process = [chunk_key for chunk_key in chunk_to_rows if chunk_key not in existing_openie_keys]
         new_openie_rows = {k : chunk_to_rows[k] for k in chunk_keys_to_process}
 
         if len(chunk_keys_to_process) > 0:
@@ -243,9 +530,11 @@ class HippoRAG:
             self.merge_openie_results(all_openie_info, new_openie_rows, new_ner_results_dict, new_triple_results_dict)
 
         if self.global_config.save_openie:
-            self.save_openie_results(all_openie_info)
+            with profile_phase("persistence"):
+                self.save_openie_results(all_openie_info)
 
-        ner_results_dict, triple_results_dict = reformat_openie_results(all_openie_info)
+        ner_results_dict, triple_results_dict = reformat_openie_results(
+            [openie_info for openie_info in all_openie_info if openie_info['idx'] in chunk_to_rows])
 
         assert len(chunk_to_rows) == len(ner_results_dict) == len(triple_results_dict), f"len(chunk_to_rows): {len(chunk_to_rows)}, len(ner_results_dict): {len(ner_results_dict)}, len(triple_results_dict): {len(triple_results_dict)}"
 
@@ -257,109 +546,317 @@ class HippoRAG:
         facts = flatten_facts(chunk_triples)
 
         logger.info(f"Encoding Entities")
-        self.entity_embedding_store.insert_strings(entity_nodes)
+        with profile_phase("entity_encoding"):
+            self.entity_embedding_store.insert_strings(entity_nodes)
 
         logger.info(f"Encoding Facts")
-        self.fact_embedding_store.insert_strings([str(fact) for fact in facts])
+        with profile_phase("fact_encoding"):
+            self.fact_embedding_store.insert_strings([str(fact) for fact in facts])
 
         logger.info(f"Constructing Graph")
 
         self.node_to_node_stats = {}
         self.ent_node_to_chunk_ids = {}
 
-        self.add_fact_edges(chunk_ids, chunk_triples)
-        num_new_chunks = self.add_passage_edges(chunk_ids, chunk_triple_entities)
+        with profile_phase("graph_build", num_items=len(chunk_ids)):
+            self.add_fact_edges(chunk_ids, chunk_triples)
+            num_new_chunks = self.add_passage_edges(chunk_ids, chunk_triple_entities)
 
         if num_new_chunks > 0:
             logger.info(f"Found {num_new_chunks} new chunks to save into graph.")
-            self.add_synonymy_edges()
+            with profile_phase("synonymy_knn", num_items=len(self.entity_embedding_store.get_all_ids())):
+                self.add_synonymy_edges()
 
-            self.augment_graph()
-            self.save_igraph()
+            with profile_phase("graph_build"):
+                self.augment_graph()
+
+        self.ready_to_retrieve = False
+
+        return all_openie_info
 
     def delete(self, docs_to_delete: List[str]):
         """
         Deletes the given documents from all data structures within the HippoRAG class.
         Note that triples and entities which are indexed from chunks that are not being removed will not be removed.
 
+        Deletes are driven by the in-memory posting maps built in `prepare_retrieval_objects` (chunk -> OpenIE
+        results, triple -> chunks, entity -> chunks) and applied as tombstones: store rows are tombstoned and graph
+        vertices lose their edges and are flagged `deleted`, so the cost scales with what is deleted. The stores and
+        the graph are compacted once tombstones exceed `delete_compaction_ratio`; results of deleted chunks stay in
+        the OpenIE results file (which is only read for chunks in the chunk store) until the chunk store is compacted.
+        The changes are committed as a new index version.
+
         Parameters:
             docs : List[str]
                 A list of documents to be deleted.
         """
+        self._check_writable("delete")
 
-        #Making sure that all the necessary structures have been built.
-        if not self.ready_to_retrieve:
-            self.prepare_retrieval_objects()
+        self._apply_document_changes(docs_to_delete=docs_to_delete, docs_to_add=[])
 
-        current_docs = set(self.chunk_embedding_store.get_all_texts())
-        docs_to_delete = [doc for doc in docs_to_delete if doc in current_docs]
-
-        #Get ids for chunks to delete
-        chunk_ids_to_delete = set(
-            [self.chunk_embedding_store.text_to_hash_id[chunk] for chunk in docs_to_delete])
-
-        #Find triples in chunks to delete
-        all_openie_info, chunk_keys_to_process = self.load_existing_openie([])
-        triples_to_delete = []
+    def _delete_documents(self, docs_to_delete: List[str]) -> Tuple[List[dict], bool]:
+        """
+        Runs `delete` for the given documents in memory; requires the retrieval objects (posting maps) to be prepared.
 
-        all_openie_info_with_deletes = []
+        Parameters:
+            docs_to_delete : List[str]
+                A list of documents to be deleted.
 
-        for openie_doc in all_openie_info:
-            if openie_doc['idx'] in chunk_ids_to_delete:
-                triples_to_delete.append(openie_doc['extracted_triples'])
-            else:
-                all_openie_info_with_deletes.append(openie_doc)
+        Returns:
+            Tuple[List[dict], bool]: The OpenIE results of the deleted chunks and whether the chunk store was
+            compacted, i.e. the OpenIE results file should drop deleted chunks.
+        """
 
-        triples_to_delete = flatten_facts(triples_to_delete)
+        #Get ids for chunks to delete
+        chunk_ids_to_delete = set(self.chunk_embedding_store.text_to_hash_id[doc] for doc in docs_to_delete
+                                  if doc in self.chunk_embedding_store.text_to_hash_id)
+
+        #Find triples and entities in chunks to delete
+        deleted_openie_info = [self.chunk_to_openie_info.pop(chunk_id) for chunk_id in chunk_ids_to_delete
+                               if chunk_id in self.chunk_to_openie_info]
+        triples_to_delete = flatten_facts([openie_doc['extracted_triples'] for openie_doc in deleted_openie_info])
+        _, deleted_triple_results_dict = reformat_openie_results(deleted_openie_info)
+        deleted_chunk_entities = set(
+            compute_mdhash_id(entity, prefix="entity-")
+            for triple_output in deleted_triple_results_dict.values()
+            for triple in triple_output.triples
+            for entity in text_processing([triple[0], triple[2]])
+        )
 
         #Filter out triples that appear in unaltered chunks
-        true_triples_to_delete = []
-
+        triple_ids_to_delete = set()
         for triple in triples_to_delete:
-            proc_triple = tuple(text_processing(list(triple)))
+            proc_triple = str(tuple(text_processing(list(triple))))
 
-            doc_ids = self.proc_triples_to_docs[str(proc_triple)]
+            doc_ids = self.proc_triples_to_docs.get(proc_triple, set())
+            doc_ids -= chunk_ids_to_delete
 
-            non_deleted_docs = doc_ids.difference(chunk_ids_to_delete)
-
-            if len(non_deleted_docs) == 0:
-                true_triples_to_delete.append(triple)
-
-        processed_true_triples_to_delete = [[text_processing(list(triple)) for triple in true_triples_to_delete]]
-        entities_to_delete, _ = extract_entity_nodes(processed_true_triples_to_delete)
-        processed_true_triples_to_delete = flatten_facts(processed_true_triples_to_delete)
-
-        triple_ids_to_delete = set([self.fact_embedding_store.text_to_hash_id[str(triple)] for triple in processed_true_triples_to_delete])
+            if len(doc_ids) == 0:
+                self.proc_triples_to_docs.pop(proc_triple, None)
+                if proc_triple in self.fact_embedding_store.text_to_hash_id:
+                    triple_ids_to_delete.add(self.fact_embedding_store.text_to_hash_id[proc_triple])
 
         #Filter out entities that appear in unaltered chunks
-        ent_ids_to_delete = [self.entity_embedding_store.text_to_hash_id[ent] for ent in entities_to_delete]
-
         filtered_ent_ids_to_delete = []
+        for ent_node in deleted_chunk_entities:
+            doc_ids = self.ent_node_to_chunk_ids.get(ent_node, set())
+            doc_ids -= chunk_ids_to_delete
 
-        for ent_node in ent_ids_to_delete:
-            doc_ids = self.ent_node_to_chunk_ids[ent_node]
-
-            non_deleted_docs = doc_ids.difference(chunk_ids_to_delete)
-
-            if len(non_deleted_docs) == 0:
+            if len(doc_ids) == 0:
+                self.ent_node_to_chunk_ids.pop(ent_node, None)
                 filtered_ent_ids_to_delete.append(ent_node)
 
         logger.info(f"Deleting {len(chunk_ids_to_delete)} Chunks")
         logger.info(f"Deleting {len(triple_ids_to_delete)} Triples")
         logger.info(f"Deleting {len(filtered_ent_ids_to_delete)} Entities")
 
-        self.save_openie_results(all_openie_info_with_deletes)
-
         self.entity_embedding_store.delete(filtered_ent_ids_to_delete)
         self.fact_embedding_store.delete(triple_ids_to_delete)
-        self.chunk_embedding_store.delete(chunk_ids_to_delete)
+        chunk_store_compacted = self.chunk_embedding_store.delete(chunk_ids_to_delete)
 
-        #Delete Nodes from Graph
-        self.graph.delete_vertices(list(filtered_ent_ids_to_delete) + list(chunk_ids_to_delete))
-        self.save_igraph()
+        #Remove the deleted chunks' fact edge weights and tombstone nodes in the graph
+        self.subtract_fact_edges([[text_processing(triple) for triple in triple_output.triples]
+                                  for triple_output in deleted_triple_results_dict.values()])
+        self.delete_graph_nodes(filtered_ent_ids_to_delete + list(chunk_ids_to_delete))
 
         self.ready_to_retrieve = False
 
+        return deleted_openie_info, chunk_store_compacted
+
+    def update(self, old_to_new: Dict[str, str]):
+        """
+        Replaces indexed documents with new versions in a single pass. Documents are diffed by their chunk hash:
+        unchanged documents are skipped, the triples, entities and edges only found in the old versions are deleted
+        and only the new versions go through OpenIE. Synonymy edges are rebuilt once and the stores, the OpenIE
+        results and the graph are saved once at the end, instead of once for `delete` and once for `index`.
+
+        Parameters:
+            old_to_new : Dict[str, str]
+                A mapping from the text of each indexed document to its new text.
+        """
+        self._check_writable("update")
+
+        changed = {old_doc: new_doc for old_doc, new_doc in old_to_new.items()
+                   if compute_mdhash_id(old_doc, prefix="chunk-") != compute_mdhash_id(new_doc, prefix="chunk-")}
+        logger.info(f"Updating {len(changed)} documents, {len(old_to_new) - len(changed)} are unchanged.")
+
+        self._apply_document_changes(docs_to_delete=list(changed.keys()), docs_to_add=list(changed.values()))
+
+    def upsert(self, docs: List[str]):
+        """
+        Indexes the documents that are not in the index yet; documents already indexed (same chunk hash) are left
+        untouched. Equivalent to `index`, provided next to `update`.
+
+        Parameters:
+            docs : List[str]
+                A list of documents to be indexed.
+        """
+        self._check_writable("upsert")
+
+        self._apply_document_changes(docs_to_delete=[], docs_to_add=docs)
+
+    def _apply_document_changes(self, docs_to_delete: List[str], docs_to_add: List[str]):
+        """
+        Deletes and indexes documents in memory, then commits the changed stores and the graph as one new index
+        version. Nothing is committed if either step fails.
+
+        The changes are applied in place to the active snapshot, including objects it shares with snapshots opened
+        earlier, so retrievals running in this instance meanwhile, pinned or not, may see a half-applied update.
+
+        With `profile_indexing`, the phases of the run are recorded by an `IndexingProfiler` and its report is
+        written to `<working_dir>/profiles`, also when the run fails.
+        """
+        version = self._next_index_version()
+        profiler = IndexingProfiler(report_dir=os.path.join(self.working_dir, "profiles"),
+                                    run_label=f"v{version}",
+                                    profile_phase_name=self.global_config.profile_indexing_phase,
+                                    profiler_backend=self.global_config.profile_indexing_backend) \
+            if self.global_config.profile_indexing else None
+
+        with profiler.activate() if profiler is not None else nullcontext():
+            try:
+                self._run_document_changes(version, docs_to_delete, docs_to_add)
+            finally:
+                if profiler is not None:
+                    profiler.save_report(extra={"version": version,
+                                                "docs_to_add": len(docs_to_add),
+                                                "docs_to_delete": len(docs_to_delete),
+                                                "committed": self._manifest is not None and self._manifest["version"] == version})
+
+    def _run_document_changes(self, version: int, docs_to_delete: List[str], docs_to_add: List[str]):
+        if len(docs_to_delete) > 0 and not self.ready_to_retrieve:
+            self.prepare_retrieval_objects()
+
+        store_files = self._get_store_files()
+        chunk_store_compacted = False
+        all_openie_info = None
+        with ExitStack() as persistence:
+            with ExitStack() as stack:
+                for embedding_store in (self.chunk_embedding_store, self.entity_embedding_store, self.fact_embedding_store):
+                    stack.enter_context(embedding_store.deferred_save(version=version))
+
+                if len(docs_to_delete) > 0:
+                    with profile_phase("delete", num_items=len(docs_to_delete)):
+                        deleted_openie_info, chunk_store_compacted = self._delete_documents(docs_to_delete)
+                    # Extractions of deleted chunks stay cached until the deletion is committed
+                    all_openie_info = list(self.chunk_to_openie_info.values()) + deleted_openie_info
+
+                if len(docs_to_add) > 0:
+                    all_openie_info = self._index_documents(docs_to_add, all_openie_info=all_openie_info)
+
+                # The deferred store writes on leaving `stack` count as persistence
+                persistence.enter_context(profile_phase("persistence"))
+
+            if self._get_store_files() == store_files:
+                logger.info("No changes to commit.")
+                return
+
+            self._commit_index_version(version)
+
+            if chunk_store_compacted:
+                self.save_openie_results([openie_info for openie_info in all_openie_info
+                                          if openie_info['idx'] in self.chunk_embedding_store.hash_id_to_row])
+
+    def _next_index_version(self) -> int:
+        return self._manifest["version"] + 1 if self._manifest is not None else 1
+
+    def _get_store_files(self) -> Dict[str, Dict[str, Optional[str]]]:
+        """Files of each embedding store relative to the working dir, as recorded in the index manifest."""
+        store_files = {}
+        for artifact_name, embedding_store in (("chunk_embeddings", self.chunk_embedding_store),
+                                               ("entity_embeddings", self.entity_embedding_store),
+                                               ("fact_embeddings", self.fact_embedding_store)):
+            store_files[artifact_name] = {
+                "data": os.path.relpath(embedding_store.filename, self.working_dir)
+                if os.path.exists(embedding_store.filename) else None,
+                "tombstones": os.path.relpath(embedding_store.tombstone_filename, self.working_dir)
+                if os.path.exists(embedding_store.tombstone_filename) else None,
+            }
+        return store_files
+
+    def _commit_index_version(self, version: int):
+        """
+        Commits the current embedding store files and the graph as index version `version`: the graph is written
+        as a snapshot in `graph/v<version>` (the stores were already written under versioned names by
+        `EmbeddingStore.deferred_save`), then `manifest.json` is atomically replaced, which is the commit point.
+        Readers load whichever version the manifest named when they opened it; artifacts no longer referenced by
+        the last two versions are removed afterwards.
+        """
+        graph_dir = os.path.join("graph", f"v{version}")
+        save_graph_snapshot(self.graph, os.path.join(self.working_dir, graph_dir))
+
+        artifacts = self._get_store_files()
+        artifacts["graph"] = graph_dir
+        self._manifest = commit_manifest(self.working_dir, version, artifacts, previous_manifest=self._manifest)
+        collect_garbage(self.working_dir, self._manifest)
+
+    def subtract_fact_edges(self, chunk_triples: List[List[Tuple]]):
+        """
+        Reverses `add_fact_edges` for the given chunks: every triple takes 1 off the weight of its entity pair in each
+        direction, and edges left without weight are removed. Edges are looked up in bulk with `get_eids`.
+        A synonymy edge between the same pair may be removed too; it is restored by the next `index` call, which
+        recomputes synonymy edges over all entities.
+
+        Parameters:
+            chunk_triples : List[List[Tuple]]
+                Processed triples of each deleted chunk.
+        """
+        directed = self.graph.is_directed()
+        weight_deltas = defaultdict(float)
+        for triples in chunk_triples:
+            for triple in triples:
+                source_idx = self.node_name_to_vertex_idx.get(compute_mdhash_id(content=triple[0], prefix="entity-"))
+                target_idx = self.node_name_to_vertex_idx.get(compute_mdhash_id(content=triple[2], prefix="entity-"))
+                if source_idx is None or target_idx is None or source_idx == target_idx:
+                    continue
+                if directed:
+                    weight_deltas[(source_idx, target_idx)] += 1
+                    weight_deltas[(target_idx, source_idx)] += 1
+                else:
+                    weight_deltas[(min(source_idx, target_idx), max(source_idx, target_idx))] += 2
+
+        if len(weight_deltas) == 0:
+            return
+
+        edge_keys = list(weight_deltas.keys())
+        edge_ids = self.graph.get_eids(pairs=edge_keys, directed=directed, error=False)
+        updated_ids, updated_weights, removed_ids = [], [], []
+        for edge_key, edge_id in zip(edge_keys, edge_ids):
+            if edge_id < 0:
+                continue
+            weight = self.graph.es[edge_id]["weight"] - weight_deltas[edge_key]
+            if weight <= 1e-9:
+                removed_ids.append(edge_id)
+            else:
+                updated_ids.append(edge_id)
+                updated_weights.append(weight)
+
+        if len(updated_ids) > 0:
+            self.graph.es.select(updated_ids)["weight"] = updated_weights
+        self.graph.delete_edges(removed_ids)
+
+    def delete_graph_nodes(self, node_keys: List[str]):
+        """
+        Tombstones graph vertices: all their edges are removed and they are flagged `deleted`, which keeps every
+        other vertex index stable. The flag is cleared by `add_new_nodes` if the node is indexed again. Once more
+        than `delete_compaction_ratio` of all vertices are tombstones, they are removed from the graph.
+
+        Parameters:
+            node_keys : List[str]
+                Hash ids (vertex names) of the nodes to delete.
+        """
+        vertex_idxs = [self.node_name_to_vertex_idx[node_key] for node_key in node_keys
+                       if node_key in self.node_name_to_vertex_idx]
+        if len(vertex_idxs) > 0:
+            self.graph.delete_edges(self.graph.es.select(_incident=vertex_idxs))
+            self.graph.vs.select(vertex_idxs)["deleted"] = True
+
+        deleted_idxs = [idx for idx, deleted in enumerate(self.graph.vs["deleted"]) if deleted] if self.graph.vcount() > 0 else []
+        if len(deleted_idxs) > self.global_config.delete_compaction_ratio * self.graph.vcount():
+            logger.info(f"Compacting graph: removing {len(deleted_idxs)} deleted vertices.")
+            self.graph.delete_vertices(deleted_idxs)
+
+    @pinned_to_snapshot
     def retrieve(self,
                  queries: List[str],
                  num_to_retrieve: int = None,
@@ -390,9 +887,9 @@ class HippoRAG:
         Notes
         -----
         - Long queries with no relevant facts after reranking will default to results from dense passage retrieval.
+        - The seconds spent in each retrieval stage are attached to every QuerySolution as `timings` and collected
+          in `self.retrieval_metrics`.
         """
-        retrieve_start_time = time.time()  # Record start time
-
         if num_to_retrieve is None:
             num_to_retrieve = self.global_config.retrieval_top_k
 
@@ -402,41 +899,53 @@ class HippoRAG:
         if not self.ready_to_retrieve:
             self.prepare_retrieval_objects()
 
-        self.get_query_embeddings(queries)
-
-        retrieval_results = []
-
-        for q_idx, query in tqdm(enumerate(queries), desc="Retrieving", total=len(queries)):
-            rerank_start = time.time()
-            query_fact_scores = self.get_fact_scores(query)
-            top_k_fact_indices, top_k_facts, rerank_log = self.rerank_facts(query, query_fact_scores)
-            rerank_end = time.time()
-
-            self.rerank_time += rerank_end - rerank_start
-
-            if len(top_k_facts) == 0:
-                logger.info('No facts found after reranking, return DPR results')
-                sorted_doc_ids, sorted_doc_scores = self.dense_passage_retrieval(query)
-            else:
-                sorted_doc_ids, sorted_doc_scores = self.graph_search_with_fact_entities(query=query,
-                                                                                         link_top_k=self.global_config.linking_top_k,
-                                                                                         query_fact_scores=query_fact_scores,
-                                                                                         top_k_facts=top_k_facts,
-                                                                                         top_k_fact_indices=top_k_fact_indices,
-                                                                                         passage_node_weight=self.global_config.passage_node_weight)
-
-            top_k_docs = [self.chunk_embedding_store.get_row(self.passage_node_keys[idx])["content"] for idx in sorted_doc_ids[:num_to_retrieve]]
-
-            retrieval_results.append(QuerySolution(question=query, docs=top_k_docs, doc_scores=sorted_doc_scores[:num_to_retrieve]))
-
-        retrieve_end_time = time.time()  # Record end time
-
-        self.all_retrieval_time += retrieve_end_time - retrieve_start_time
-
-        logger.info(f"Total Retrieval Time {self.all_retrieval_time:.2f}s")
-        logger.info(f"Total Recognition Memory Time {self.rerank_time:.2f}s")
-        logger.info(f"Total PPR Time {self.ppr_time:.2f}s")
-        logger.info(f"Total Misc Time {self.all_retrieval_time - (self.rerank_time + self.ppr_time):.2f}s")
+        query_embeddings, all_timings = self.encode_queries_timed(queries)
+
+        retrieval_results = [None] * len(queries)
+
+        all_query_fact_scores = []
+        for q_idx, (query, timings) in enumerate(zip(queries, all_timings)):
+            with self.retrieval_metrics.span("fact_scoring", timings):
+                all_query_fact_scores.append(self.get_fact_scores(query, query_embeddings['query_to_fact'][q_idx]))
+
+        # Recognition memory LLM calls for the whole batch are in flight together; graph search for each
+        # query starts as soon as its filtered facts arrive, while the remaining calls are still running.
+        pbar = tqdm(total=len(queries), desc="Retrieving")
+        for q_idx, (top_k_fact_indices, top_k_facts, rerank_log) in self.rerank_facts_batch(queries, all_query_fact_scores):
+            with self.retrieval_metrics.track_query(all_timings[q_idx]):
+                self.retrieval_metrics.record("reranking", rerank_log.get('latency', 0.0))
+
+                query = queries[q_idx]
+                query_fact_scores = all_query_fact_scores[q_idx]
+
+                if len(top_k_facts) == 0:
+                    logger.info('No facts found after reranking, return DPR results')
+                    sorted_doc_ids, sorted_doc_scores = self.dense_passage_retrieval(query, query_embeddings['query_to_passage'][q_idx])
+                else:
+                    sorted_doc_ids, sorted_doc_scores = self.graph_search_with_fact_entities(query=query,
+                                                                                             link_top_k=self.global_config.linking_top_k,
+                                                                                             query_fact_scores=query_fact_scores,
+                                                                                             top_k_facts=top_k_facts,
+                                                                                             top_k_fact_indices=top_k_fact_indices,
+                                                                                             passage_node_weight=self.global_config.passage_node_weight,
+                                                                                             passage_query_embedding=query_embeddings['query_to_passage'][q_idx])
+
+                with self.retrieval_metrics.span("doc_materialization"):
+                    top_k_docs = [self.chunk_embedding_store.get_row(self.passage_node_keys[idx])["content"] for idx in sorted_doc_ids[:num_to_retrieve]]
+
+            retrieval_results[q_idx] = QuerySolution(question=query, docs=top_k_docs, doc_scores=sorted_doc_scores[:num_to_retrieve],
+                                                     timings=all_timings[q_idx])
+
+            pbar.update(1)
+        pbar.close()
+
+        self.retrieval_metrics.log_summary()
+        rerank_stats = self.rerank_filter.get_rerank_stats()
+        logger.info(f"Recognition Memory LLM Calls {rerank_stats['num_calls']}, avg latency {rerank_stats['avg_latency']:.2f}s, "
+                    f"{rerank_stats['cached_prompt_tokens']}/{rerank_stats['prompt_tokens']} prompt tokens reused from prefix cache")
+        self.log_query_embedding_cache_stats()
+        if not self.read_only:
+            self.query_embedding_cache.save()
 
         # Evaluate retrieval
         if gold_docs is not None:
@@ -448,6 +957,7 @@ class HippoRAG:
         else:
             return retrieval_results
 
+    @pinned_to_snapshot
     def rag_qa(self,
                queries: List[str|QuerySolution],
                gold_docs: List[List[str]] = None,
@@ -522,6 +1032,7 @@ class HippoRAG:
         else:
             return queries_solutions, all_response_message, all_metadata
 
+    @pinned_to_snapshot
     def retrieve_dpr(self,
                      queries: List[str],
                      num_to_retrieve: int = None,
@@ -549,9 +1060,9 @@ class HippoRAG:
         Notes
         -----
         - Long queries with no relevant facts after reranking will default to results from dense passage retrieval.
+        - The seconds spent in each retrieval stage are attached to every QuerySolution as `timings` and collected
+          in `self.retrieval_metrics`.
         """
-        retrieve_start_time = time.time()  # Record start time
-
         if num_to_retrieve is None:
             num_to_retrieve = self.global_config.retrieval_top_k
 
@@ -561,25 +1072,27 @@ class HippoRAG:
         if not self.ready_to_retrieve:
             self.prepare_retrieval_objects()
 
-        self.get_query_embeddings(queries)
+        query_embeddings, all_timings = self.encode_queries_timed(queries)
 
         retrieval_results = []
 
         for q_idx, query in tqdm(enumerate(queries), desc="Retrieving", total=len(queries)):
-            logger.info('No facts found after reranking, return DPR results')
-            sorted_doc_ids, sorted_doc_scores = self.dense_passage_retrieval(query)
+            with self.retrieval_metrics.track_query(all_timings[q_idx]):
+                logger.info('No facts found after reranking, return DPR results')
+                sorted_doc_ids, sorted_doc_scores = self.dense_passage_retrieval(query, query_embeddings['query_to_passage'][q_idx])
 
-            top_k_docs = [self.chunk_embedding_store.get_row(self.passage_node_keys[idx])["content"] for idx in
-                          sorted_doc_ids[:num_to_retrieve]]
+                with self.retrieval_metrics.span("doc_materialization"):
+                    top_k_docs = [self.chunk_embedding_store.get_row(self.passage_node_keys[idx])["content"] for idx in
+                                  sorted_doc_ids[:num_to_retrieve]]
 
             retrieval_results.append(
-                QuerySolution(question=query, docs=top_k_docs, doc_scores=sorted_doc_scores[:num_to_retrieve]))
+                QuerySolution(question=query, docs=top_k_docs, doc_scores=sorted_doc_scores[:num_to_retrieve],
+                              timings=all_timings[q_idx]))
 
-        retrieve_end_time = time.time()  # Record end time
-
-        self.all_retrieval_time += retrieve_end_time - retrieve_start_time
-
-        logger.info(f"Total Retrieval Time {self.all_retrieval_time:.2f}s")
+        self.retrieval_metrics.log_summary()
+        self.log_query_embedding_cache_stats()
+        if not self.read_only:
+            self.query_embedding_cache.save()
 
         # Evaluate retrieval
         if gold_docs is not None:
@@ -593,6 +1106,7 @@ class HippoRAG:
         else:
             return retrieval_results
 
+    @pinned_to_snapshot
     def rag_qa_dpr(self,
                queries: List[str|QuerySolution],
                gold_docs: List[List[str]] = None,
@@ -746,10 +1260,7 @@ class HippoRAG:
             Does not explicitly raise exceptions within the provided function logic.
         """
 
-        if "name" in self.graph.vs:
-            current_graph_nodes = set(self.graph.vs["name"])
-        else:
-            current_graph_nodes = set()
+        current_graph_nodes = self.get_live_graph_node_names()
 
         logger.info(f"Adding OpenIE triples to graph.")
 
@@ -797,10 +1308,7 @@ class HippoRAG:
                 The number of new passage nodes added to the graph.
         """
 
-        if "name" in self.graph.vs.attribute_names():
-            current_graph_nodes = set(self.graph.vs["name"])
-        else:
-            current_graph_nodes = set()
+        current_graph_nodes = self.get_live_graph_node_names()
 
         num_new_chunks = 0
 
@@ -837,6 +1345,8 @@ class HippoRAG:
         """
         logger.info(f"Expanding graph with synonymy edges")
 
+        self.synonymy_edges = set()
+
         self.entity_id_to_row = self.entity_embedding_store.get_all_id_to_rows()
         entity_node_keys = list(self.entity_id_to_row.keys())
 
@@ -877,6 +1387,7 @@ class HippoRAG:
                         num_synonym_triple += 1
 
                         self.node_to_node_stats[sim_edge] = score  # Need to seriously discuss on this
+                        self.synonymy_edges.add(sim_edge)
                         num_nns += 1
 
             synonym_candidates.append((node_key, synonyms))
@@ -982,6 +1493,7 @@ class HippoRAG:
                 List of dictionaries, where each dictionary represents information from OpenIE, including
                 extracted entities.
         """
+        self._check_writable("save_openie_results")
 
         sum_phrase_chars = sum([len(e) for chunk in all_openie_info for e in chunk['extracted_entities']])
         sum_phrase_words = sum([len(e.split()) for chunk in all_openie_info for e in chunk['extracted_entities']])
@@ -1002,8 +1514,7 @@ class HippoRAG:
                 'avg_ent_words': avg_ent_words
             }
             
-            with open(self.openie_results_path, 'w') as f:
-                json.dump(openie_dict, f)
+            atomic_write_json(self.openie_results_path, openie_dict)
             logger.info(f"OpenIE results saved to {self.openie_results_path}")
 
     def augment_graph(self):
@@ -1019,77 +1530,106 @@ class HippoRAG:
         logger.info(f"Graph construction completed!")
         print(self.get_graph_info())
 
+    def get_live_graph_node_names(self) -> Set[str]:
+        """Names of the graph vertices that are not tombstoned (see `delete_graph_nodes`)."""
+        if "name" not in self.graph.vs.attributes():
+            return set()
+        if "deleted" not in self.graph.vs.attributes():
+            return set(self.graph.vs["name"])
+        return set(name for name, deleted in zip(self.graph.vs["name"], self.graph.vs["deleted"]) if not deleted)
+
     def add_new_nodes(self):
         """
-        Adds new nodes to the graph from entity and passage embedding stores based on their attributes.
+        Adds new nodes to the graph for entities and passages in the embedding stores that are not in the graph yet.
 
-        This method identifies and adds new nodes to the graph by comparing existing nodes
-        in the graph and nodes retrieved from the entity embedding store and the passage
-        embedding store. The method checks attributes and ensures no duplicates are added.
-        New nodes are prepared and added in bulk to optimize graph updates.
+        Vertices only carry their `name` (the embedding store hash id, used to join back to the stores), an
+        `is_passage` type flag and a `deleted` tombstone flag; passage and entity text is resolved from the embedding
+        stores when needed. Tombstoned vertices whose node is back in the stores are revived in place.
+        New nodes are added in bulk to optimize graph updates.
         """
 
-        existing_nodes = {v["name"]: v for v in self.graph.vs if "name" in v.attributes()}
-
-        entity_to_row = self.entity_embedding_store.get_all_id_to_rows()
-        passage_to_row = self.chunk_embedding_store.get_all_id_to_rows()
+        existing_nodes = {name: idx for idx, name in enumerate(self.graph.vs["name"])} if "name" in self.graph.vs.attributes() else {}
+        deleted_flags = self.graph.vs["deleted"] if "deleted" in self.graph.vs.attributes() else [False] * self.graph.vcount()
 
-        node_to_rows = entity_to_row
-        node_to_rows.update(passage_to_row)
+        new_nodes = {"name": [], "is_passage": [], "deleted": []}
+        revived_idxs = []
+        for is_passage, node_ids in [(False, self.entity_embedding_store.get_all_ids()),
+                                     (True, self.chunk_embedding_store.get_all_ids())]:
+            for node_id in node_ids:
+                idx = existing_nodes.get(node_id)
+                if idx is None:
+                    new_nodes["name"].append(node_id)
+                    new_nodes["is_passage"].append(is_passage)
+                    new_nodes["deleted"].append(False)
+                elif deleted_flags[idx]:
+                    revived_idxs.append(idx)
 
-        new_nodes = {}
-        for node_id, node in node_to_rows.items():
-            node['name'] = node_id
-            if node_id not in existing_nodes:
-                for k, v in node.items():
-                    if k not in new_nodes:
-                        new_nodes[k] = []
-                    new_nodes[k].append(v)
-
-        if len(new_nodes) > 0:
-            self.graph.add_vertices(n=len(next(iter(new_nodes.values()))), attributes=new_nodes)
+        if len(revived_idxs) > 0:
+            self.graph.vs.select(revived_idxs)["deleted"] = False
+        if len(new_nodes["name"]) > 0:
+            self.graph.add_vertices(n=len(new_nodes["name"]), attributes=new_nodes)
 
     def add_new_edges(self):
         """
-        Processes edges from `node_to_node_stats` to add them into a graph object while
-        managing adjacency lists, validating edges, and logging invalid edge cases.
+        Merges the edges collected in `node_to_node_stats` into the graph as a delta against its current edges.
+
+        Each node pair is kept as a single edge (both directions of a pair are summed in an undirected graph).
+        Fact and passage edge weights are added to the weight of an existing edge, since they are only collected
+        for chunks new to the graph; synonymy edges are recomputed over all entities on every indexing call, so
+        their weight replaces the existing one. Weights of existing edges are updated in one assignment and new
+        edges are added in one `add_edges` call.
         """
 
-        graph_adj_list = defaultdict(dict)
-        graph_inverse_adj_list = defaultdict(dict)
-        edge_source_node_keys = []
-        edge_target_node_keys = []
-        edge_metadata = []
+        if self.graph.ecount() > 0 and self.graph.has_multiple():
+            # Graphs built before delta updates hold one edge per direction / re-index; summing them keeps PPR unchanged
+            logger.info("Merging parallel edges in the graph.")
+            self.graph.simplify(multiple=True, loops=False, combine_edges={"weight": "sum"})
+
+        directed = self.graph.is_directed()
+        node_name_to_idx = {name: idx for idx, name in enumerate(self.graph.vs["name"])}
+
+        added_weights, replaced_weights = defaultdict(float), defaultdict(float)
         for edge, weight in self.node_to_node_stats.items():
             if edge[0] == edge[1]: continue
-            graph_adj_list[edge[0]][edge[1]] = weight
-            graph_inverse_adj_list[edge[1]][edge[0]] = weight
-
-            edge_source_node_keys.append(edge[0])
-            edge_target_node_keys.append(edge[1])
-            edge_metadata.append({
-                "weight": weight
-            })
-
-        valid_edges, valid_weights = [], {"weight": []}
-        current_node_ids = set(self.graph.vs["name"])
-        for source_node_id, target_node_id, edge_d in zip(edge_source_node_keys, edge_target_node_keys, edge_metadata):
-            if source_node_id in current_node_ids and target_node_id in current_node_ids:
-                valid_edges.append((source_node_id, target_node_id))
-                weight = edge_d.get("weight", 1.0)
-                valid_weights["weight"].append(weight)
+            source_idx, target_idx = node_name_to_idx.get(edge[0]), node_name_to_idx.get(edge[1])
+            if source_idx is None or target_idx is None:
+                logger.warning(f"Edge {edge[0]} -> {edge[1]} is not valid.")
+                continue
+            edge_key = (source_idx, target_idx) if directed else (min(source_idx, target_idx), max(source_idx, target_idx))
+            if edge in self.synonymy_edges:
+                replaced_weights[edge_key] += weight
             else:
-                logger.warning(f"Edge {source_node_id} -> {target_node_id} is not valid.")
-        self.graph.add_edges(
-            valid_edges,
-            attributes=valid_weights
-        )
+                added_weights[edge_key] += weight
+
+        existing_edges = {edge_key: edge_id for edge_id, edge_key in enumerate(self.graph.get_edgelist())}
+        weights = self.graph.es["weight"] if self.graph.ecount() > 0 else []
+        new_edges, new_weights = [], []
+        num_updated = 0
+        for edge_key in added_weights.keys() | replaced_weights.keys():
+            edge_id = existing_edges.get(edge_key)
+            base_weight = replaced_weights[edge_key] if edge_key in replaced_weights else (
+                weights[edge_id] if edge_id is not None else 0.0)
+            weight = base_weight + added_weights.get(edge_key, 0.0)
+            if edge_id is None:
+                new_edges.append(edge_key)
+                new_weights.append(weight)
+            elif weights[edge_id] != weight:
+                weights[edge_id] = weight
+                num_updated += 1
+
+        if num_updated > 0:
+            self.graph.es["weight"] = weights
+        if len(new_edges) > 0:
+            self.graph.add_edges(new_edges, attributes={"weight": new_weights})
+        logger.info(f"Added {len(new_edges)} new edges and updated the weights of {num_updated} existing edges.")
 
     def save_igraph(self):
+        """Commits a new index version with the current graph; the embedding stores are committed as they are."""
+        self._check_writable("save_igraph")
         logger.info(
             f"Writing graph with {len(self.graph.vs())} nodes, {len(self.graph.es())} edges"
         )
-        self.graph.write_pickle(self._graph_pickle_filename)
+        self._commit_index_version(self._next_index_version())
         logger.info(f"Saving graph completed!")
 
     def export_knowledge_graph(self, export_format='json', output_path=None):
@@ -1109,16 +1649,17 @@ class HippoRAG:
         logger.info(f"Exporting knowledge graph to {export_format} format: {output_path}")
         
         try:
+            graph = self._live_graph()
             if export_format.lower() == 'json':
-                self._export_to_json(output_path)
+                self._export_to_json(output_path, graph)
             elif export_format.lower() == 'graphml':
-                self.graph.write_graphml(output_path)
+                graph.write_graphml(output_path)
             elif export_format.lower() == 'gml':
-                self.graph.write_gml(output_path)
+                graph.write_gml(output_path)
             elif export_format.lower() == 'edgelist':
-                self.graph.write_edgelist(output_path)
+                graph.write_edgelist(output_path)
             elif export_format.lower() == 'pajek':
-                self.graph.write_pajek(output_path)
+                graph.write_pajek(output_path)
             else:
                 raise ValueError(f"Unsupported export format: {export_format}")
             
@@ -1129,13 +1670,25 @@ class HippoRAG:
             logger.error(f"Error exporting knowledge graph: {str(e)}")
             raise
 
-    def _export_to_json(self, output_path):
+    def _live_graph(self) -> ig.Graph:
         """
-        导出知识图谱到JSON格式，包含详细的节点和边信息
+        The graph without tombstoned (`deleted`) vertices and their edges, for exports; vertex ids are renumbered
+        if any vertex is dropped.
+        """
+        if "deleted" not in self.graph.vs.attributes() or not any(self.graph.vs["deleted"]):
+            return self.graph
+        return self.graph.induced_subgraph([v.index for v in self.graph.vs if not v["deleted"]])
+
+    def _export_to_json(self, output_path, graph=None):
         """
+        导出知识图谱到JSON格式，包含详细的节点和边信息（不含已删除的节点）
+        """
+        if graph is None:
+            graph = self._live_graph()
+
         # 准备节点数据
         nodes = []
-        for v in self.graph.vs:
+        for v in graph.vs:
             node_data = {
                 'id': v.index,
                 'name': v['name'] if 'name' in v.attributes() else f"node_{v.index}",
@@ -1155,7 +1708,7 @@ class HippoRAG:
         
         # 准备边数据
         edges = []
-        for e in self.graph.es:
+        for e in graph.es:
             edge_data = {
                 'source': e.source,
                 'target': e.target,
@@ -1264,7 +1817,7 @@ class HippoRAG:
         try:
             # 1. 保存图结构（多种格式）
             saved_files['graph_pickle'] = os.path.join(export_dir, "graph.pickle")
-            self.graph.write_pickle(saved_files['graph_pickle'])
+            self._live_graph().write_pickle(saved_files['graph_pickle'])
             
             saved_files['graph_json'] = self.export_knowledge_graph('json', 
                                                                    os.path.join(export_dir, "graph.json"))
@@ -1379,34 +1932,78 @@ class HippoRAG:
 
         return graph_info
 
-    def prepare_retrieval_objects(self):
+    def prepare_retrieval_objects(self, reuse_from: Optional[IndexSnapshot] = None):
         """
         Prepares various in-memory objects and attributes necessary for fast retrieval processes, such as embedding data and graph relationships, ensuring consistency
         and alignment with the underlying graph structure.
+
+        If a prepared snapshot `reuse_from` is given, the keys and embedding matrices of every embedding store it
+        shares with the current snapshot, the node index mapping of a shared graph and the OpenIE posting maps of
+        a shared chunk store are taken over from it instead of being rebuilt.
         """
 
         logger.info("Preparing for fast retrieval.")
 
-        logger.info("Loading keys.")
-        self.query_to_embedding: Dict = {'triple': {}, 'passage': {}}
+        reused = set()
+        if reuse_from is not None and reuse_from.ready_to_retrieve:
+            reused = {name for name in ("graph", "chunk_embedding_store", "entity_embedding_store", "fact_embedding_store")
+                      if getattr(self, name) is getattr(reuse_from, name)}
 
-        self.entity_node_keys: List = list(self.entity_embedding_store.get_all_ids()) # a list of phrase node keys
-        self.passage_node_keys: List = list(self.chunk_embedding_store.get_all_ids()) # a list of passage node keys
-        self.fact_node_keys: List = list(self.fact_embedding_store.get_all_ids())
+        logger.info("Loading keys.")
+        self.entity_node_keys: List = reuse_from.entity_node_keys if "entity_embedding_store" in reused else list(self.entity_embedding_store.get_all_ids()) # a list of phrase node keys
+        self.passage_node_keys: List = reuse_from.passage_node_keys if "chunk_embedding_store" in reused else list(self.chunk_embedding_store.get_all_ids()) # a list of passage node keys
+        self.fact_node_keys: List = reuse_from.fact_node_keys if "fact_embedding_store" in reused else list(self.fact_embedding_store.get_all_ids())
 
         # Check if the graph has the expected number of nodes
         expected_node_count = len(self.entity_node_keys) + len(self.passage_node_keys)
-        actual_node_count = self.graph.vcount()
+        actual_node_count = len(self.get_live_graph_node_names())
         
         if expected_node_count != actual_node_count:
             logger.warning(f"Graph node count mismatch: expected {expected_node_count}, got {actual_node_count}")
-            # If the graph is empty but we have nodes, we need to add them
-            if actual_node_count == 0 and expected_node_count > 0:
+            # If the graph is empty but we have nodes, we need to add them. Only indexes written before manifests were
+            # introduced can be left in this state; a committed version always has matching stores and graph.
+            if self._manifest is None and actual_node_count == 0 and expected_node_count > 0:
                 logger.info(f"Initializing graph with {expected_node_count} nodes")
                 self.add_new_nodes()
-                self.save_igraph()
+                if not self.read_only:
+                    self.save_igraph()
 
         # Create mapping from node name to vertex index
+        if {"graph", "chunk_embedding_store", "entity_embedding_store"} <= reused:
+            self.node_name_to_vertex_idx = reuse_from.node_name_to_vertex_idx
+            self.entity_node_idxs = reuse_from.entity_node_idxs
+            self.passage_node_idxs = reuse_from.passage_node_idxs
+        else:
+            self._build_node_index_mapping()
+
+        logger.info("Loading embeddings.")
+        self.entity_embeddings = reuse_from.entity_embeddings if "entity_embedding_store" in reused else np.array(self.entity_embedding_store.get_embeddings(self.entity_node_keys))
+        self.passage_embeddings = reuse_from.passage_embeddings if "chunk_embedding_store" in reused else np.array(self.chunk_embedding_store.get_embeddings(self.passage_node_keys))
+
+        self.fact_embeddings = reuse_from.fact_embeddings if "fact_embedding_store" in reused else np.array(self.fact_embedding_store.get_embeddings(self.fact_node_keys))
+
+        if "chunk_embedding_store" in reused:
+            self.chunk_to_openie_info = reuse_from.chunk_to_openie_info
+            self.proc_triples_to_docs = reuse_from.proc_triples_to_docs
+            self.ent_node_to_chunk_ids = reuse_from.ent_node_to_chunk_ids
+        else:
+            live_chunk_ids = self.chunk_embedding_store.hash_id_to_row
+            if reuse_from is not None and reuse_from.ready_to_retrieve and all(chunk_id in reuse_from.chunk_to_openie_info for chunk_id in live_chunk_ids):
+                # No new chunks: the extractions are already in memory
+                all_openie_info = [reuse_from.chunk_to_openie_info[chunk_id] for chunk_id in live_chunk_ids]
+            else:
+                all_openie_info, chunk_keys_to_process = self.load_existing_openie([])
+                # The OpenIE results file may hold extractions of chunks that are deleted or not committed yet
+                all_openie_info = [openie_info for openie_info in all_openie_info if openie_info['idx'] in live_chunk_ids]
+            self.build_openie_posting_maps(all_openie_info)
+
+        if self.global_config.use_ppr_basis:
+            self.ppr_basis = reuse_from.ppr_basis if "graph" in reused else self.load_ppr_basis()
+
+        self.ready_to_retrieve = True
+
+    def _build_node_index_mapping(self):
+        """Maps graph node names to vertex indices and the entity / passage node keys to their vertices."""
         try:
             igraph_name_to_idx = {node["name"]: idx for idx, node in enumerate(self.graph.vs)} # from node key to the index in the backbone graph
             self.node_name_to_vertex_idx = igraph_name_to_idx
@@ -1415,11 +2012,12 @@ class HippoRAG:
             missing_entity_nodes = [node_key for node_key in self.entity_node_keys if node_key not in igraph_name_to_idx]
             missing_passage_nodes = [node_key for node_key in self.passage_node_keys if node_key not in igraph_name_to_idx]
             
-            if missing_entity_nodes or missing_passage_nodes:
+            if (missing_entity_nodes or missing_passage_nodes) and self._manifest is None:
                 logger.warning(f"Missing nodes in graph: {len(missing_entity_nodes)} entity nodes, {len(missing_passage_nodes)} passage nodes")
                 # If nodes are missing, rebuild the graph
                 self.add_new_nodes()
-                self.save_igraph()
+                if not self.read_only:
+                    self.save_igraph()
                 # Update the mapping
                 igraph_name_to_idx = {node["name"]: idx for idx, node in enumerate(self.graph.vs)}
                 self.node_name_to_vertex_idx = igraph_name_to_idx
@@ -1433,13 +2031,86 @@ class HippoRAG:
             self.entity_node_idxs = []
             self.passage_node_idxs = []
 
-        logger.info("Loading embeddings.")
-        self.entity_embeddings = np.array(self.entity_embedding_store.get_embeddings(self.entity_node_keys))
-        self.passage_embeddings = np.array(self.chunk_embedding_store.get_embeddings(self.passage_node_keys))
+    def _ppr_basis_path(self, version: Optional[int]) -> str:
+        filename = os.path.join(self.working_dir, "ppr_basis.npz")
+        return filename if version is None else versioned_filename(filename, version)
+
+    def load_ppr_basis(self) -> Optional[PPRBasis]:
+        """
+        Loads the PPR basis precomputed for the index version of the current snapshot, or returns None if there is
+        none or it does not match the graph and damping factor in use.
+        """
+        version = self._current_snapshot().version
+        path = self._ppr_basis_path(version)
+        ppr_basis = PPRBasis.load(path)
+        if ppr_basis is None:
+            logger.warning(f"No PPR basis found at {path}, run precompute_ppr_basis to build it.")
+            return None
+        damping = self.global_config.damping if self.global_config.damping is not None else 0.5
+        if ppr_basis.version != version or ppr_basis.num_vertices != self.graph.vcount() or ppr_basis.damping != damping:
+            logger.warning(f"PPR basis at {path} does not match the loaded index (version {version}, damping {damping}), ignoring it.")
+            return None
+        logger.info(f"Loaded PPR basis of {len(ppr_basis.hub_vertices)} hub entities from {path}")
+        return ppr_basis
+
+    def precompute_ppr_basis(self, num_hubs: Optional[int] = None, top_k: Optional[int] = None) -> PPRBasis:
+        """
+        Offline job: computes the PPR vector of each of the `num_hubs` highest-degree entity nodes (countries,
+        years and similar entities that seed many queries), keeps its `top_k` passage scores and stores them as
+        `ppr_basis.v<version>.npz` in the working dir for the current index version. Retrieval uses them when
+        `use_ppr_basis` is set; the basis has to be recomputed after the index changes.
+
+        Parameters:
+            num_hubs: Number of hub entities, defaults to `ppr_basis_num_hubs` in the global configuration.
+            top_k: Passage scores kept per hub, defaults to `ppr_basis_top_k` in the global configuration.
 
-        self.fact_embeddings = np.array(self.fact_embedding_store.get_embeddings(self.fact_node_keys))
+        Returns:
+            PPRBasis: The computed basis, also made available to retrieval on this instance.
+        """
+        self._check_writable("precompute_ppr_basis")
+        num_hubs = num_hubs if num_hubs is not None else self.global_config.ppr_basis_num_hubs
+        top_k = top_k if top_k is not None else self.global_config.ppr_basis_top_k
+        if not self.ready_to_retrieve:
+            self.prepare_retrieval_objects()
 
-        all_openie_info, chunk_keys_to_process = self.load_existing_openie([])
+        damping = self.global_config.damping if self.global_config.damping is not None else 0.5
+        entity_idxs = np.array(self.entity_node_idxs, dtype=np.int64)
+        degrees = np.array(self.graph.degree(entity_idxs.tolist()))
+        hub_vertices = entity_idxs[np.argsort(degrees, kind="stable")[::-1][:num_hubs]]
+
+        vectors = (self.graph.personalized_pagerank(damping=damping,
+                                                    directed=False,
+                                                    weights='weight',
+                                                    reset_vertices=[hub_vertex],
+                                                    implementation='prpack')
+                   for hub_vertex in tqdm(hub_vertices.tolist(), desc="Computing PPR basis"))
+        version = self._current_snapshot().version
+        ppr_basis = PPRBasis.from_vectors(version, damping, self.graph.vcount(), hub_vertices, vectors,
+                                          np.array(self.passage_node_idxs, dtype=np.int64), top_k)
+        ppr_basis.save(self._ppr_basis_path(version))
+        self.ppr_basis = ppr_basis
+
+        # Bases of index versions that are no longer retained are of no use
+        retained = {os.path.basename(self._ppr_basis_path(version))}
+        if self._manifest is not None and self._manifest.get("previous_version") is not None:
+            retained.add(os.path.basename(self._ppr_basis_path(self._manifest["previous_version"])))
+        for name in os.listdir(self.working_dir):
+            if re.match(r"^ppr_basis(\.v\d+)?\.npz$", name) and name not in retained:
+                os.remove(os.path.join(self.working_dir, name))
+
+        return ppr_basis
+
+    def build_openie_posting_maps(self, all_openie_info: List[dict]):
+        """
+        Builds the in-memory OpenIE posting maps used by retrieval and `delete` for every indexed chunk:
+        `chunk_to_openie_info` (chunk id -> OpenIE result), `proc_triples_to_docs` (processed triple -> chunk ids)
+        and `ent_node_to_chunk_ids` (entity node key -> chunk ids).
+
+        Parameters:
+            all_openie_info : List[dict]
+                OpenIE results of all indexed chunks, as returned by `load_existing_openie`.
+        """
+        self.chunk_to_openie_info = {doc['idx']: doc for doc in all_openie_info}
 
         self.proc_triples_to_docs = {}
 
@@ -1448,78 +2119,90 @@ class HippoRAG:
             for triple in triples:
                 if len(triple) == 3:
                     proc_triple = tuple(text_processing(list(triple)))
-                    self.proc_triples_to_docs[str(proc_triple)] = self.proc_triples_to_docs.get(str(proc_triple), set()).union(set([doc['idx']]))
+                    self.proc_triples_to_docs.setdefault(str(proc_triple), set()).add(doc['idx'])
 
-        if self.ent_node_to_chunk_ids is None:
-            ner_results_dict, triple_results_dict = reformat_openie_results(all_openie_info)
+        _, triple_results_dict = reformat_openie_results(all_openie_info)
 
-            # Check if the lengths match
-            if not (len(self.passage_node_keys) == len(ner_results_dict) == len(triple_results_dict)):
-                logger.warning(f"Length mismatch: passage_node_keys={len(self.passage_node_keys)}, ner_results_dict={len(ner_results_dict)}, triple_results_dict={len(triple_results_dict)}")
-                
-                # If there are missing keys, create empty entries for them
-                for chunk_id in self.passage_node_keys:
-                    if chunk_id not in ner_results_dict:
-                        ner_results_dict[chunk_id] = NerRawOutput(
-                            chunk_id=chunk_id,
-                            response=None,
-                            metadata={},
-                            unique_entities=[]
-                        )
-                    if chunk_id not in triple_results_dict:
-                        triple_results_dict[chunk_id] = TripleRawOutput(
-                            chunk_id=chunk_id,
-                            response=None,
-                            metadata={},
-                            triples=[]
-                        )
-
-            # prepare data_store
-            chunk_triples = [[text_processing(t) for t in triple_results_dict[chunk_id].triples] for chunk_id in self.passage_node_keys]
-
-            self.node_to_node_stats = {}
-            self.ent_node_to_chunk_ids = {}
-            self.add_fact_edges(self.passage_node_keys, chunk_triples)
+        self.ent_node_to_chunk_ids = {}
 
-        self.ready_to_retrieve = True
+        for chunk_id, triple_output in triple_results_dict.items():
+            for triple in triple_output.triples:
+                for entity in text_processing([triple[0], triple[2]]):
+                    self.ent_node_to_chunk_ids.setdefault(compute_mdhash_id(entity, prefix="entity-"), set()).add(chunk_id)
 
-    def get_query_embeddings(self, queries: List[str] | List[QuerySolution]):
+    def get_query_embeddings(self, queries: List[str] | List[QuerySolution]) -> Dict[str, np.ndarray]:
         """
-        Retrieves embeddings for given queries and updates the internal query-to-embedding mapping. The method determines whether each query
-        is already present in the `self.query_to_embedding` dictionary under the keys 'triple' and 'passage'. If a query is not present in
-        either, it is encoded into embeddings using the embedding model and stored.
+        Computes the embeddings of the given queries under the 'query_to_fact' and 'query_to_passage' instructions.
+        Each query is looked up in `self.query_embedding_cache` first; the misses for each instruction are encoded
+        in one batch and stored in the cache. If the embedding model ignores instructions, queries are encoded once
+        and the vectors are shared by both instructions.
 
         Args:
-            queries List[str] | List[QuerySolution]: A list of query strings or QuerySolution objects. Each query is checked for
-            its presence in the query-to-embedding mappings.
-        """
-
-        all_query_strings = []
-        for query in queries:
-            if isinstance(query, QuerySolution) and (
-                    query.question not in self.query_to_embedding['triple'] or query.question not in
-                    self.query_to_embedding['passage']):
-                all_query_strings.append(query.question)
-            elif query not in self.query_to_embedding['triple'] or query not in self.query_to_embedding['passage']:
-                all_query_strings.append(query)
-
-        if len(all_query_strings) > 0:
-            # get all query embeddings
-            logger.info(f"Encoding {len(all_query_strings)} queries for query_to_fact.")
-            query_embeddings_for_triple = self.embedding_model.batch_encode(all_query_strings,
-                                                                            instruction=get_query_instruction('query_to_fact'),
-                                                                            norm=True)
-            for query, embedding in zip(all_query_strings, query_embeddings_for_triple):
-                self.query_to_embedding['triple'][query] = embedding
-
-            logger.info(f"Encoding {len(all_query_strings)} queries for query_to_passage.")
-            query_embeddings_for_passage = self.embedding_model.batch_encode(all_query_strings,
-                                                                             instruction=get_query_instruction('query_to_passage'),
-                                                                             norm=True)
-            for query, embedding in zip(all_query_strings, query_embeddings_for_passage):
-                self.query_to_embedding['passage'][query] = embedding
-
-    def get_fact_scores(self, query: str) -> np.ndarray:
+            queries List[str] | List[QuerySolution]: A list of query strings or QuerySolution objects.
+
+        Returns:
+            Dict[str, np.ndarray]: Per instruction name, the (#queries, dim) query embeddings in the order of
+            `queries`, to pass on to `get_fact_scores` / `dense_passage_retrieval`; they do not depend on the
+            cache still holding them.
+        """
+        query_strings = [query.question if isinstance(query, QuerySolution) else query for query in queries]
+
+        instruction_names = ['query_to_fact', 'query_to_passage'] if self.embedding_model.instruction_sensitive else ['query_to_fact']
+        all_query_embeddings = {}
+        for instruction_name in instruction_names:
+            instruction = get_query_instruction(instruction_name)
+            embeddings = {}
+            for query in query_strings:
+                if query not in embeddings:
+                    embeddings[query] = self.query_embedding_cache.get(query, instruction)
+            missing_query_strings = [query for query, embedding in embeddings.items() if embedding is None]
+
+            if len(missing_query_strings) > 0:
+                logger.info(f"Encoding {len(missing_query_strings)} queries for {instruction_name}.")
+                query_embeddings = self.embedding_model.batch_encode(missing_query_strings,
+                                                                     instruction=instruction,
+                                                                     norm=True)
+                for query, embedding in zip(missing_query_strings, query_embeddings):
+                    embeddings[query] = embedding
+                    self.query_embedding_cache.put(query, instruction, embedding)
+            all_query_embeddings[instruction_name] = np.array([embeddings[query] for query in query_strings])
+
+        if 'query_to_passage' not in all_query_embeddings:
+            all_query_embeddings['query_to_passage'] = all_query_embeddings['query_to_fact']
+        return all_query_embeddings
+
+    def encode_queries_timed(self, queries: List[str]) -> Tuple[Dict[str, np.ndarray], List[Dict[str, float]]]:
+        """
+        Runs `get_query_embeddings` for a batch of queries and returns its embeddings together with a per-query
+        timings dict for each query, holding the batch encoding time as its `query_encoding` stage.
+        """
+        all_timings = [{} for _ in queries]
+        start = time.perf_counter()
+        query_embeddings = self.get_query_embeddings(queries)
+        query_encoding_time = time.perf_counter() - start
+        for timings in all_timings:
+            self.retrieval_metrics.record("query_encoding", query_encoding_time, timings)
+        return query_embeddings, all_timings
+
+    def log_query_embedding_cache_stats(self):
+        cache_stats = self.query_embedding_cache.get_stats()
+        logger.info(f"Query Embedding Cache {cache_stats['size']}/{cache_stats['max_size']} entries, "
+                    f"hit rate {cache_stats['hit_rate']:.2%} ({cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                    f"{cache_stats['evictions']} evictions)")
+
+    def get_query_embedding(self, query: str, instruction_name: str) -> np.ndarray:
+        """
+        Returns the embedding of `query` under the given query instruction, encoding and caching it if it is not
+        in the query embedding cache. Batch retrieval passes on the embeddings of `get_query_embeddings` instead.
+        """
+        instruction = get_query_instruction(instruction_name)
+        query_embedding = self.query_embedding_cache.get(query, instruction, update_stats=False)
+        if query_embedding is None:
+            query_embedding = self.embedding_model.batch_encode([query], instruction=instruction, norm=True)[0]
+            self.query_embedding_cache.put(query, instruction, query_embedding)
+        return query_embedding
+
+    def get_fact_scores(self, query: str, query_embedding: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Retrieves and computes normalized similarity scores between the given query and pre-stored fact embeddings.
 
@@ -1527,6 +2210,8 @@ class HippoRAG:
         query : str
             The input query text for which similarity scores with fact embeddings
             need to be computed.
+        query_embedding : numpy.ndarray, optional
+            The 'query_to_fact' embedding of the query, looked up or encoded if not given.
 
         Returns:
         numpy.ndarray
@@ -1539,11 +2224,8 @@ class HippoRAG:
             If no embedding is found for the provided query in the stored query
             embeddings dictionary.
         """
-        query_embedding = self.query_to_embedding['triple'].get(query, None)
         if query_embedding is None:
-            query_embedding = self.embedding_model.batch_encode(query,
-                                                                instruction=get_query_instruction('query_to_fact'),
-                                                                norm=True)
+            query_embedding = self.get_query_embedding(query, 'query_to_fact')
 
         # Check if there are any facts
         if len(self.fact_embeddings) == 0:
@@ -1559,7 +2241,7 @@ class HippoRAG:
             logger.error(f"Error computing fact scores: {str(e)}")
             return np.array([])
 
-    def dense_passage_retrieval(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+    def dense_passage_retrieval(self, query: str, query_embedding: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Conduct dense passage retrieval to find relevant documents for a query.
 
@@ -1574,6 +2256,8 @@ class HippoRAG:
         ----------
         query : str
             The input query for which relevant passages should be retrieved.
+        query_embedding : np.ndarray, optional
+            The 'query_to_passage' embedding of the query, looked up or encoded if not given.
 
         Returns
         -------
@@ -1583,17 +2267,15 @@ class HippoRAG:
             - A numpy array of the normalized similarity scores for the corresponding
               documents.
         """
-        query_embedding = self.query_to_embedding['passage'].get(query, None)
-        if query_embedding is None:
-            query_embedding = self.embedding_model.batch_encode(query,
-                                                                instruction=get_query_instruction('query_to_passage'),
-                                                                norm=True)
-        query_doc_scores = np.dot(self.passage_embeddings, query_embedding.T)
-        query_doc_scores = np.squeeze(query_doc_scores) if query_doc_scores.ndim == 2 else query_doc_scores
-        query_doc_scores = min_max_normalize(query_doc_scores)
-
-        sorted_doc_ids = np.argsort(query_doc_scores)[::-1]
-        sorted_doc_scores = query_doc_scores[sorted_doc_ids.tolist()]
+        with self.retrieval_metrics.span("dpr"):
+            if query_embedding is None:
+                query_embedding = self.get_query_embedding(query, 'query_to_passage')
+            query_doc_scores = np.dot(self.passage_embeddings, query_embedding.T)
+            query_doc_scores = np.squeeze(query_doc_scores) if query_doc_scores.ndim == 2 else query_doc_scores
+            query_doc_scores = min_max_normalize(query_doc_scores)
+
+            sorted_doc_ids = np.argsort(query_doc_scores)[::-1]
+            sorted_doc_scores = query_doc_scores[sorted_doc_ids.tolist()]
         return sorted_doc_ids, sorted_doc_scores
 
 
@@ -1641,7 +2323,8 @@ class HippoRAG:
                                         query_fact_scores: np.ndarray,
                                         top_k_facts: List[Tuple],
                                         top_k_fact_indices: List[str],
-                                        passage_node_weight: float = 0.05) -> Tuple[np.ndarray, np.ndarray]:
+                                        passage_node_weight: float = 0.05,
+                                        passage_query_embedding: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Computes document scores based on fact-based similarity and relevance using personalized
         PageRank (PPR) and dense retrieval models. This function combines the signal from the relevant
@@ -1666,71 +2349,75 @@ class HippoRAG:
                 - The second array consists of the PPR scores associated with the sorted document IDs.
         """
 
-        #Assigning phrase weights based on selected facts from previous steps.
-        linking_score_map = {}  # from phrase to the average scores of the facts that contain the phrase
-        phrase_scores = {}  # store all fact scores for each phrase regardless of whether they exist in the knowledge graph or not
-        phrase_weights = np.zeros(len(self.graph.vs['name']))
-        passage_weights = np.zeros(len(self.graph.vs['name']))
-        number_of_occurs = np.zeros(len(self.graph.vs['name']))
+        with self.retrieval_metrics.span("phrase_weighting"):
+            #Assigning phrase weights based on selected facts from previous steps.
+            linking_score_map = {}  # from phrase to the average scores of the facts that contain the phrase
+            phrase_scores = {}  # store all fact scores for each phrase regardless of whether they exist in the knowledge graph or not
+            phrase_weights = np.zeros(len(self.graph.vs['name']))
+            passage_weights = np.zeros(len(self.graph.vs['name']))
+            number_of_occurs = np.zeros(len(self.graph.vs['name']))
 
-        phrases_and_ids = set()
+            phrases_and_ids = set()
 
-        for rank, f in enumerate(top_k_facts):
-            subject_phrase = f[0].lower()
-            predicate_phrase = f[1].lower()
-            object_phrase = f[2].lower()
-            fact_score = query_fact_scores[
-                top_k_fact_indices[rank]] if query_fact_scores.ndim > 0 else query_fact_scores
+            for rank, f in enumerate(top_k_facts):
+                subject_phrase = f[0].lower()
+                predicate_phrase = f[1].lower()
+                object_phrase = f[2].lower()
+                fact_score = query_fact_scores[
+                    top_k_fact_indices[rank]] if query_fact_scores.ndim > 0 else query_fact_scores
 
-            for phrase in [subject_phrase, object_phrase]:
-                phrase_key = compute_mdhash_id(
-                    content=phrase,
-                    prefix="entity-"
-                )
-                phrase_id = self.node_name_to_vertex_idx.get(phrase_key, None)
+                for phrase in [subject_phrase, object_phrase]:
+                    phrase_key = compute_mdhash_id(
+                        content=phrase,
+                        prefix="entity-"
+                    )
+                    phrase_id = self.node_name_to_vertex_idx.get(phrase_key, None)
 
-                if phrase_id is not None:
-                    weighted_fact_score = fact_score
+                    if phrase_id is not None:
+                        weighted_fact_score = fact_score
 
-                    if len(self.ent_node_to_chunk_ids.get(phrase_key, set())) > 0:
-                        weighted_fact_score /= len(self.ent_node_to_chunk_ids[phrase_key])
+                        if len(self.ent_node_to_chunk_ids.get(phrase_key, set())) > 0:
+                            weighted_fact_score /= len(self.ent_node_to_chunk_ids[phrase_key])
 
-                    phrase_weights[phrase_id] += weighted_fact_score
-                    number_of_occurs[phrase_id] += 1
+                        phrase_weights[phrase_id] += weighted_fact_score
+                        number_of_occurs[phrase_id] += 1
 
-                phrases_and_ids.add((phrase, phrase_id))
+                    phrases_and_ids.add((phrase, phrase_id))
 
-        phrase_weights /= number_of_occurs
+            phrase_weights /= number_of_occurs
 
-        for phrase, phrase_id in phrases_and_ids:
-            if phrase not in phrase_scores:
-                phrase_scores[phrase] = []
+            for phrase, phrase_id in phrases_and_ids:
+                if phrase not in phrase_scores:
+                    phrase_scores[phrase] = []
 
-            phrase_scores[phrase].append(phrase_weights[phrase_id])
+                phrase_scores[phrase].append(phrase_weights[phrase_id])
 
-        # calculate average fact score for each phrase
-        for phrase, scores in phrase_scores.items():
-            linking_score_map[phrase] = float(np.mean(scores))
+            # calculate average fact score for each phrase
+            for phrase, scores in phrase_scores.items():
+                linking_score_map[phrase] = float(np.mean(scores))
 
-        if link_top_k:
-            phrase_weights, linking_score_map = self.get_top_k_weights(link_top_k,
-                                                                           phrase_weights,
-                                                                           linking_score_map)  # at this stage, the length of linking_scope_map is determined by link_top_k
+            if link_top_k:
+                phrase_weights, linking_score_map = self.get_top_k_weights(link_top_k,
+                                                                               phrase_weights,
+                                                                               linking_score_map)  # at this stage, the length of linking_scope_map is determined by link_top_k
 
         #Get passage scores according to chosen dense retrieval model
-        dpr_sorted_doc_ids, dpr_sorted_doc_scores = self.dense_passage_retrieval(query)
-        normalized_dpr_sorted_scores = min_max_normalize(dpr_sorted_doc_scores)
+        dpr_sorted_doc_ids, dpr_sorted_doc_scores = self.dense_passage_retrieval(query, passage_query_embedding)
+
+        # Spreading the passage scores over the graph nodes counts as phrase weighting as well
+        with self.retrieval_metrics.span("phrase_weighting"):
+            normalized_dpr_sorted_scores = min_max_normalize(dpr_sorted_doc_scores)
 
-        for i, dpr_sorted_doc_id in enumerate(dpr_sorted_doc_ids.tolist()):
-            passage_node_key = self.passage_node_keys[dpr_sorted_doc_id]
-            passage_dpr_score = normalized_dpr_sorted_scores[i]
-            passage_node_id = self.node_name_to_vertex_idx[passage_node_key]
-            passage_weights[passage_node_id] = passage_dpr_score * passage_node_weight
-            passage_node_text = self.chunk_embedding_store.get_row(passage_node_key)["content"]
-            linking_score_map[passage_node_text] = passage_dpr_score * passage_node_weight
+            for i, dpr_sorted_doc_id in enumerate(dpr_sorted_doc_ids.tolist()):
+                passage_node_key = self.passage_node_keys[dpr_sorted_doc_id]
+                passage_dpr_score = normalized_dpr_sorted_scores[i]
+                passage_node_id = self.node_name_to_vertex_idx[passage_node_key]
+                passage_weights[passage_node_id] = passage_dpr_score * passage_node_weight
+                passage_node_text = self.chunk_embedding_store.get_row(passage_node_key)["content"]
+                linking_score_map[passage_node_text] = passage_dpr_score * passage_node_weight
 
-        #Combining phrase and passage scores into one array for PPR
-        node_weights = phrase_weights + passage_weights
+            #Combining phrase and passage scores into one array for PPR
+            node_weights = phrase_weights + passage_weights
 
         #Recording top 30 facts in linking_score_map
         if len(linking_score_map) > 30:
@@ -1739,11 +2426,8 @@ class HippoRAG:
         assert sum(node_weights) > 0, f'No phrases found in the graph for the given facts: {top_k_facts}'
 
         #Running PPR algorithm based on the passage and phrase weights previously assigned
-        ppr_start = time.time()
-        ppr_sorted_doc_ids, ppr_sorted_doc_scores = self.run_ppr(node_weights, damping=self.global_config.damping)
-        ppr_end = time.time()
-
-        self.ppr_time += (ppr_end - ppr_start)
+        with self.retrieval_metrics.span("ppr"):
+            ppr_sorted_doc_ids, ppr_sorted_doc_scores = self.run_ppr(node_weights, damping=self.global_config.damping)
 
         assert len(ppr_sorted_doc_ids) == len(
             self.passage_node_idxs), f"Doc prob length {len(ppr_sorted_doc_ids)} != corpus length {len(self.passage_node_idxs)}"
@@ -1751,6 +2435,34 @@ class HippoRAG:
         return ppr_sorted_doc_ids, ppr_sorted_doc_scores
 
 
+    def get_candidate_facts(self, query_fact_scores: np.ndarray) -> Tuple[List[int], List[Tuple]]:
+        """
+        Selects the `linking_top_k` highest scoring facts for a query as candidates for recognition memory.
+
+        Args:
+            query_fact_scores (np.ndarray): Query-fact similarity scores over all facts.
+
+        Returns:
+            Tuple[List[int], List[Tuple]]: indices of the candidate facts in `self.fact_node_keys` (highest
+            score first) and the corresponding facts as (subject, predicate, object) tuples.
+        """
+        link_top_k: int = self.global_config.linking_top_k
+
+        # Get the top k facts by score
+        if len(query_fact_scores) <= link_top_k:
+            # If we have fewer facts than requested, use all of them
+            candidate_fact_indices = np.argsort(query_fact_scores)[::-1].tolist()
+        else:
+            # Otherwise get the top k
+            candidate_fact_indices = np.argsort(query_fact_scores)[-link_top_k:][::-1].tolist()
+
+        # Get the actual fact IDs
+        real_candidate_fact_ids = [self.fact_node_keys[idx] for idx in candidate_fact_indices]
+        fact_row_dict = self.fact_embedding_store.get_rows(real_candidate_fact_ids)
+        candidate_facts = [eval(fact_row_dict[id]['content']) for id in real_candidate_fact_ids]
+
+        return candidate_fact_indices, candidate_facts
+
     def rerank_facts(self, query: str, query_fact_scores: np.ndarray) -> Tuple[List[int], List[Tuple], dict]:
         """
 
@@ -1759,33 +2471,24 @@ class HippoRAG:
         Returns:
             top_k_fact_indicies:
             top_k_facts:
-            rerank_log (dict): {'facts_before_rerank': candidate_facts, 'facts_after_rerank': top_k_facts}
+            rerank_log (dict): {'facts_before_rerank': candidate_facts, 'facts_after_rerank': top_k_facts, 'latency': seconds}
                 - candidate_facts (list): list of link_top_k facts (each fact is a relation triple in tuple data type).
                 - top_k_facts:
+                - latency (float): seconds spent reranking this query.
 
 
         """
         # load args
         link_top_k: int = self.global_config.linking_top_k
+        rerank_start = time.perf_counter()
         
         # Check if there are any facts to rerank
         if len(query_fact_scores) == 0 or len(self.fact_node_keys) == 0:
             logger.warning("No facts available for reranking. Returning empty lists.")
-            return [], [], {'facts_before_rerank': [], 'facts_after_rerank': []}
+            return [], [], {'facts_before_rerank': [], 'facts_after_rerank': [], 'latency': 0.0}
             
         try:
-            # Get the top k facts by score
-            if len(query_fact_scores) <= link_top_k:
-                # If we have fewer facts than requested, use all of them
-                candidate_fact_indices = np.argsort(query_fact_scores)[::-1].tolist()
-            else:
-                # Otherwise get the top k
-                candidate_fact_indices = np.argsort(query_fact_scores)[-link_top_k:][::-1].tolist()
-                
-            # Get the actual fact IDs
-            real_candidate_fact_ids = [self.fact_node_keys[idx] for idx in candidate_fact_indices]
-            fact_row_dict = self.fact_embedding_store.get_rows(real_candidate_fact_ids)
-            candidate_facts = [eval(fact_row_dict[id]['content']) for id in real_candidate_fact_ids]
+            candidate_fact_indices, candidate_facts = self.get_candidate_facts(query_fact_scores)
             
             # Rerank the facts
             top_k_fact_indices, top_k_facts, reranker_dict = self.rerank_filter(query,
@@ -1793,14 +2496,96 @@ class HippoRAG:
                                                                                 candidate_fact_indices,
                                                                                 len_after_rerank=link_top_k)
             
-            rerank_log = {'facts_before_rerank': candidate_facts, 'facts_after_rerank': top_k_facts}
+            rerank_log = {'facts_before_rerank': candidate_facts, 'facts_after_rerank': top_k_facts,
+                          'latency': time.perf_counter() - rerank_start}
             
             return top_k_fact_indices, top_k_facts, rerank_log
             
         except Exception as e:
             logger.error(f"Error in rerank_facts: {str(e)}")
-            return [], [], {'facts_before_rerank': [], 'facts_after_rerank': [], 'error': str(e)}
-    
+            return [], [], {'facts_before_rerank': [], 'facts_after_rerank': [], 'error': str(e),
+                            'latency': time.perf_counter() - rerank_start}
+
+    def rerank_facts_batch(self,
+                           queries: List[str],
+                           all_query_fact_scores: List[np.ndarray]) -> Iterator[Tuple[int, Tuple[List[int], List[Tuple], dict]]]:
+        """
+        Runs recognition memory for a batch of queries, yielding each query's `rerank_facts` result as soon as it
+        is available.
+
+        For LLM backends with native batch inference (local vLLM / Transformers), all prompts are sent in one
+        `batch_infer` call. Otherwise up to `rerank_max_workers` `rerank_facts` calls run concurrently and
+        results are yielded in completion order.
+
+        Args:
+            queries (List[str]): The query strings.
+            all_query_fact_scores (List[np.ndarray]): Query-fact similarity scores for each query.
+
+        Yields:
+            Tuple[int, Tuple[List[int], List[Tuple], dict]]: the query's position in `queries` and its
+            (top_k_fact_indices, top_k_facts, rerank_log) tuple.
+        """
+        if len(queries) == 0:
+            return
+
+        if self.rerank_filter.supports_batch_rerank:
+            yield from self._rerank_facts_native_batch(queries, all_query_fact_scores)
+            return
+
+        max_workers = max(1, min(self.global_config.rerank_max_workers, len(queries)))
+        # Worker threads read the index through the snapshot of the calling thread
+        snapshot = self._current_snapshot()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            rerank_futures = {
+                executor.submit(self._call_pinned, snapshot, self.rerank_facts, query, query_fact_scores): q_idx
+                for q_idx, (query, query_fact_scores) in enumerate(zip(queries, all_query_fact_scores))
+            }
+            for future in as_completed(rerank_futures):
+                yield rerank_futures[future], future.result()
+
+    def _rerank_facts_native_batch(self,
+                                   queries: List[str],
+                                   all_query_fact_scores: List[np.ndarray]) -> Iterator[Tuple[int, Tuple[List[int], List[Tuple], dict]]]:
+        link_top_k: int = self.global_config.linking_top_k
+
+        batch_q_idxs, batch_candidate_indices, batch_candidate_facts = [], [], []
+        for q_idx, query_fact_scores in enumerate(all_query_fact_scores):
+            if len(query_fact_scores) == 0 or len(self.fact_node_keys) == 0:
+                logger.warning("No facts available for reranking. Returning empty lists.")
+                yield q_idx, ([], [], {'facts_before_rerank': [], 'facts_after_rerank': [], 'latency': 0.0})
+                continue
+            try:
+                candidate_fact_indices, candidate_facts = self.get_candidate_facts(query_fact_scores)
+            except Exception as e:
+                logger.error(f"Error in rerank_facts_batch: {str(e)}")
+                yield q_idx, ([], [], {'facts_before_rerank': [], 'facts_after_rerank': [], 'error': str(e), 'latency': 0.0})
+                continue
+            batch_q_idxs.append(q_idx)
+            batch_candidate_indices.append(candidate_fact_indices)
+            batch_candidate_facts.append(candidate_facts)
+
+        if len(batch_q_idxs) == 0:
+            return
+
+        # Every query of the batch waits for the whole batch_rerank call
+        rerank_start = time.perf_counter()
+        try:
+            batch_results = self.rerank_filter.batch_rerank([queries[q_idx] for q_idx in batch_q_idxs],
+                                                            batch_candidate_facts,
+                                                            batch_candidate_indices,
+                                                            len_after_rerank=link_top_k)
+        except Exception as e:
+            logger.error(f"Error in rerank_facts_batch: {str(e)}")
+            latency = time.perf_counter() - rerank_start
+            for q_idx in batch_q_idxs:
+                yield q_idx, ([], [], {'facts_before_rerank': [], 'facts_after_rerank': [], 'error': str(e), 'latency': latency})
+            return
+        latency = time.perf_counter() - rerank_start
+
+        for q_idx, candidate_facts, (top_k_fact_indices, top_k_facts, reranker_dict) in zip(batch_q_idxs, batch_candidate_facts, batch_results):
+            rerank_log = {'facts_before_rerank': candidate_facts, 'facts_after_rerank': top_k_facts, 'latency': latency}
+            yield q_idx, (top_k_fact_indices, top_k_facts, rerank_log)
+
     def run_ppr(self,
                 reset_prob: np.ndarray,
                 damping: float =0.5) -> Tuple[np.ndarray, np.ndarray]:
@@ -1810,6 +2595,11 @@ class HippoRAG:
         factor for teleportation during rank computation and can take a reset
         probability array to influence the starting state of the computation.
 
+        If `ppr_subgraph_hops` is set in the global configuration, PPR runs only on the neighbourhood of the seed
+        phrase nodes and the top dense retrieval passages (see `subgraph_personalized_pagerank`).
+        If `use_ppr_basis` is set and a PPR basis was precomputed for the index version (see `precompute_ppr_basis`),
+        the contribution of hub entity seeds is read from their cached vectors and PPR only runs for the other seeds.
+
         Parameters:
             reset_prob (np.ndarray): A 1-dimensional array specifying the reset
                 probability distribution for each node. The array must have a size
@@ -1828,17 +2618,48 @@ class HippoRAG:
 
         if damping is None: damping = 0.5 # for potential compatibility
         reset_prob = np.where(np.isnan(reset_prob) | (reset_prob < 0), 0, reset_prob)
-        pagerank_scores = self.graph.personalized_pagerank(
-            vertices=range(len(self.node_name_to_vertex_idx)),
-            damping=damping,
-            directed=False,
-            weights='weight',
-            reset=reset_prob,
-            implementation='prpack'
-        )
+        passage_reset = reset_prob[self.passage_node_idxs]
+
+        # Seeds with a precomputed PPR vector are taken out of the reset vector and added back in `compose`
+        ppr_basis = self.ppr_basis if self.global_config.use_ppr_basis else None
+        hub_weights = None
+        if ppr_basis is not None:
+            hub_weights, residual_reset = ppr_basis.split_reset(reset_prob)
+            if hub_weights.any():
+                reset_prob = residual_reset
+            else:
+                hub_weights = None
+
+        if self.global_config.ppr_subgraph_hops is not None:
+            entity_idxs = np.array(self.entity_node_idxs, dtype=np.int64)
+            passage_seeds = np.array(self.passage_node_idxs, dtype=np.int64)[
+                np.argsort(passage_reset)[::-1][:self.global_config.ppr_subgraph_passage_seeds]]
+            seeds = entity_idxs[reset_prob[entity_idxs] > 0].tolist() + passage_seeds[reset_prob[passage_seeds] > 0].tolist()
+            pagerank_scores = subgraph_personalized_pagerank(self.graph, reset_prob, seeds,
+                                                             hops=self.global_config.ppr_subgraph_hops,
+                                                             max_nodes=self.global_config.ppr_subgraph_max_nodes,
+                                                             damping=damping)
+        elif reset_prob.sum() > 0:
+            pagerank_scores = np.array(self.graph.personalized_pagerank(
+                vertices=range(len(self.node_name_to_vertex_idx)),
+                damping=damping,
+                directed=False,
+                weights='weight',
+                reset=reset_prob,
+                implementation='prpack'
+            ))
+        else:
+            pagerank_scores = np.zeros(self.graph.vcount())
+
+        if hub_weights is not None:
+            pagerank_scores = ppr_basis.compose(hub_weights, pagerank_scores, residual_weight=reset_prob.sum())
 
-        doc_scores = np.array([pagerank_scores[idx] for idx in self.passage_node_idxs])
-        sorted_doc_ids = np.argsort(doc_scores)[::-1]
+        doc_scores = pagerank_scores[self.passage_node_idxs]
+        if self.global_config.ppr_subgraph_hops is not None:
+            # Passages outside the subgraph score 0 and keep their dense retrieval order
+            sorted_doc_ids = np.lexsort((passage_reset, doc_scores))[::-1]
+        else:
+            sorted_doc_ids = np.argsort(doc_scores)[::-1]
         sorted_doc_scores = doc_scores[sorted_doc_ids.tolist()]
 
         return sorted_doc_ids, sorted_doc_scores
\ No newline at end of file
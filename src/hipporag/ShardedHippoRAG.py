@@ -0,0 +1,565 @@
+import os
+import ast
+import time
+import logging
+import traceback
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
+import igraph as ig
+
+from .HippoRAG import HippoRAG
+from .evaluation.retrieval_eval import RetrievalRecall
+from .evaluation.qa_eval import QAExactMatch, QAF1Score
+from .utils.misc_utils import QuerySolution, compute_mdhash_id
+from .utils.graph_utils import neighbourhood_vertices
+from .utils.config_utils import BaseConfig
+from .utils.metrics_utils import RetrievalMetrics
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for_chunk(chunk_id: str, num_shards: int) -> int:
+    """Shard a passage is indexed in, derived from its chunk hash id so every process agrees without a lookup table."""
+    return int(chunk_id.split("-", 1)[1], 16) % num_shards
+
+
+class _IndexShard:
+    """
+    Shard side of `ShardedHippoRAG`: a `HippoRAG` over one partition of the passages, answering the scatter
+    requests of the coordinator. Runs in its own process (see `_shard_worker`).
+    """
+
+    def __init__(self, global_config: BaseConfig):
+        self.hipporag = HippoRAG(global_config=global_config)
+
+    def _prepared(self) -> HippoRAG:
+        if not self.hipporag.ready_to_retrieve:
+            self.hipporag.prepare_retrieval_objects()
+        return self.hipporag
+
+    def index(self, docs: List[str]):
+        self.hipporag.index(docs)
+
+    def delete(self, docs: List[str]):
+        self.hipporag.delete(docs)
+
+    def refresh(self) -> bool:
+        return self.hipporag.refresh()
+
+    def score_queries(self,
+                      fact_query_embeddings: Optional[np.ndarray],
+                      passage_query_embeddings: np.ndarray,
+                      fact_top_k: int,
+                      passage_top_k: int) -> List[Dict[str, Any]]:
+        """
+        Scores every query against the facts and passages of this shard. Raw dot-product scores are returned with
+        their min / max over the whole shard, so the coordinator can min-max normalize over all shards at once.
+        Facts are not scored if `fact_query_embeddings` is None.
+
+        Returns:
+            List[Dict[str, Any]]: Per query, `facts` / `passages` as (fact content or chunk id, raw score) pairs of
+            the top `fact_top_k` / `passage_top_k`, and `fact_range` / `passage_range` as (min, max) or None.
+        """
+        hipporag = self._prepared()
+        with hipporag.pin_snapshot():
+            fact_keys, passage_keys = hipporag.fact_node_keys, hipporag.passage_node_keys
+            fact_scores = None
+            if fact_query_embeddings is not None and len(fact_keys) > 0:
+                fact_scores = np.dot(hipporag.fact_embeddings, fact_query_embeddings.T)
+            passage_scores = np.dot(hipporag.passage_embeddings, passage_query_embeddings.T) if len(passage_keys) > 0 else None
+
+            results = []
+            for q_idx in range(len(passage_query_embeddings)):
+                result = {"facts": [], "fact_range": None, "passages": [], "passage_range": None}
+                if fact_scores is not None:
+                    scores = fact_scores[:, q_idx]
+                    top = _top_k_indices(scores, fact_top_k)
+                    rows = hipporag.fact_embedding_store.get_rows([fact_keys[idx] for idx in top])
+                    result["facts"] = [(rows[fact_keys[idx]]["content"], float(scores[idx])) for idx in top]
+                    result["fact_range"] = (float(scores.min()), float(scores.max()))
+                if passage_scores is not None:
+                    scores = passage_scores[:, q_idx]
+                    top = _top_k_indices(scores, passage_top_k)
+                    result["passages"] = [(passage_keys[idx], float(scores[idx])) for idx in top]
+                    result["passage_range"] = (float(scores.min()), float(scores.max()))
+                results.append(result)
+        return results
+
+    def get_subgraphs(self, all_seed_names: List[List[str]], hops: int, max_nodes: int) -> List[Dict[str, Any]]:
+        """
+        Extracts the `hops`-hop neighbourhood of each query's seed nodes present in this shard's graph.
+
+        Returns:
+            List[Dict[str, Any]]: Per query, the subgraph `names`, `is_passage` flags, `edges` (pairs of positions in
+            `names`) and edge `weights`, plus `entity_chunk_counts`: the number of this shard's passages each seed
+            entity occurs in.
+        """
+        hipporag = self._prepared()
+        with hipporag.pin_snapshot():
+            graph = hipporag.graph
+            subgraphs = []
+            for seed_names in all_seed_names:
+                seeds = [hipporag.node_name_to_vertex_idx[name] for name in seed_names
+                         if name in hipporag.node_name_to_vertex_idx]
+                vertices = neighbourhood_vertices(graph, seeds, hops, max_nodes=max_nodes)
+                subgraph = graph.induced_subgraph(vertices)
+                subgraphs.append({
+                    "names": subgraph.vs["name"] if subgraph.vcount() > 0 else [],
+                    "is_passage": subgraph.vs["is_passage"] if subgraph.vcount() > 0 else [],
+                    "edges": subgraph.get_edgelist(),
+                    "weights": subgraph.es["weight"] if subgraph.ecount() > 0 else [],
+                    "entity_chunk_counts": {name: len(hipporag.ent_node_to_chunk_ids.get(name, ()))
+                                            for name in seed_names if name.startswith("entity-")},
+                })
+        return subgraphs
+
+    def get_passages(self, chunk_ids: List[str]) -> Dict[str, str]:
+        """Texts of the given passages that live in this shard."""
+        hipporag = self._prepared()
+        with hipporag.pin_snapshot():
+            chunk_store = hipporag.chunk_embedding_store
+            return {chunk_id: chunk_store.get_row(chunk_id)["content"] for chunk_id in chunk_ids
+                    if chunk_id in chunk_store.hash_id_to_row}
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    if len(scores) > k:
+        top = np.argpartition(scores, -k)[-k:]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(scores[top])[::-1]]
+
+
+def _shard_worker(global_config: BaseConfig, conn):
+    """Shard process main loop: runs (method, args) requests from the coordinator until it sends None."""
+    try:
+        shard = _IndexShard(global_config)
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+        return
+    conn.send(("ok", None))
+
+    while True:
+        request = conn.recv()
+        if request is None:
+            shard.hipporag.close()
+            break
+        method, args = request
+        try:
+            conn.send(("ok", getattr(shard, method)(*args)))
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+
+
+class ShardedHippoRAG:
+
+    def __init__(self, global_config: BaseConfig = None, num_shards: int = None, read_only: bool = None):
+        """
+        HippoRAG over a corpus partitioned across `num_shards` index shards, each a `HippoRAG` in its own process
+        with its own graph and embedding stores under `<save_dir>/shard_<i>`. Passages are assigned to shards by
+        their chunk hash id, and their triples and entities are indexed in the same shard.
+
+        Retrieval scatters the query embeddings to all shards, which score their facts and passages; the top
+        candidates are merged with min-max normalization over all shards and the facts go through recognition
+        memory in this (coordinator) process. Each shard then contributes the k-hop neighbourhood of the seed
+        entities and top passages, and PPR runs on the union of these subgraphs. Entity nodes are shared by name
+        across shards and fact edge weights add up, as they would in a single graph; synonymy edges only link
+        entities of the same shard, so sharded retrieval approximates rather than reproduces `HippoRAG`.
+
+        The coordinator holds a `HippoRAG` over `save_dir` for query encoding, recognition memory and QA, whose own
+        index stays empty.
+
+        Parameters:
+            global_config: The global configuration object; `num_shards`, `shard_*` settings apply here.
+            num_shards: Number of shards, overrides `global_config.num_shards`. Must not change for an index.
+            read_only: Serve an existing sharded index only, overrides `global_config.read_only`.
+        """
+        self.global_config = global_config if global_config is not None else BaseConfig()
+        if num_shards is not None:
+            self.global_config.num_shards = num_shards
+        if read_only is not None:
+            self.global_config.read_only = read_only
+        self.num_shards = self.global_config.num_shards
+
+        # Shard processes are started before the coordinator creates any model clients
+        mp_context = multiprocessing.get_context(self.global_config.shard_start_method)
+        self._conns, self._processes = [], []
+        for shard_idx in range(self.num_shards):
+            shard_config = replace(self.global_config, save_dir=os.path.join(self.global_config.save_dir, f"shard_{shard_idx}"))
+            parent_conn, child_conn = mp_context.Pipe()
+            process = mp_context.Process(target=_shard_worker, args=(shard_config, child_conn), daemon=True)
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+        try:
+            self._gather("startup")
+        except RuntimeError:
+            self.close()
+            raise
+
+        self.coordinator = HippoRAG(global_config=self.global_config)
+
+    def close(self):
+        """Stops the shard processes and the encode workers of the coordinator."""
+        for conn, process in zip(self._conns, self._processes):
+            if process.is_alive():
+                conn.send(None)
+            process.join()
+            conn.close()
+        self._conns, self._processes = [], []
+        if getattr(self, "coordinator", None) is not None:
+            self.coordinator.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _gather(self, method: str, sent_to: Optional[List[int]] = None) -> List[Any]:
+        sent_to = range(self.num_shards) if sent_to is None else sent_to
+        results, errors = [None] * self.num_shards, []
+        # Receive from every shard before raising, so no response is left in a pipe
+        for shard_idx in sent_to:
+            status, result = self._conns[shard_idx].recv()
+            if status == "error":
+                errors.append(f"shard {shard_idx}:\n{result}")
+            results[shard_idx] = result
+        if errors:
+            raise RuntimeError(f"ShardedHippoRAG {method} failed on " + "\n".join(errors))
+        return results
+
+    def _scatter(self, method: str, shard_args: List[Optional[tuple]]) -> List[Any]:
+        """
+        Calls `method` of every shard whose `shard_args` entry is not None, all shards working concurrently, and
+        returns their results (None for skipped shards).
+        """
+        sent_to = []
+        for shard_idx, args in enumerate(shard_args):
+            if args is not None:
+                self._conns[shard_idx].send((method, args))
+                sent_to.append(shard_idx)
+        return self._gather(method, sent_to)
+
+    def _partition(self, docs: List[str]) -> List[List[str]]:
+        partitions = [[] for _ in range(self.num_shards)]
+        for doc in docs:
+            partitions[shard_for_chunk(compute_mdhash_id(doc, prefix="chunk-"), self.num_shards)].append(doc)
+        return partitions
+
+    def index(self, docs: List[str]):
+        """Indexes each document in its shard, all shards in parallel (see `HippoRAG.index`)."""
+        self._scatter("index", [(partition,) if partition else None for partition in self._partition(docs)])
+
+    def delete(self, docs_to_delete: List[str]):
+        """Deletes each document from its shard (see `HippoRAG.delete`)."""
+        self._scatter("delete", [(partition,) if partition else None for partition in self._partition(docs_to_delete)])
+
+    def refresh(self) -> bool:
+        """Switches every shard to its latest committed index version (see `HippoRAG.refresh`)."""
+        return any(self._scatter("refresh", [()] * self.num_shards))
+
+    def retrieve(self,
+                 queries: List[str],
+                 num_to_retrieve: int = None,
+                 gold_docs: List[List[str]] = None) -> List[QuerySolution] | Tuple[List[QuerySolution], Dict]:
+        """
+        Sharded counterpart of `HippoRAG.retrieve`. A batch of queries takes three scatter-gather rounds: fact and
+        passage scoring, subgraph extraction and passage text lookup.
+
+        The stages of a sharded retrieval differ from `HippoRAG.retrieve`: `shard_scoring`, `reranking`,
+        `shard_subgraphs` and `doc_materialization` run once per batch and every query of the batch is charged the
+        batch time; `graph_search` covers phrase weighting and PPR on the union subgraph of a query.
+        """
+        if num_to_retrieve is None:
+            num_to_retrieve = self.global_config.retrieval_top_k
+        link_top_k = self.global_config.linking_top_k
+
+        query_embeddings, all_timings = self.coordinator.encode_queries_timed(queries)
+        stage_start = time.perf_counter()
+        fact_query_embeddings = query_embeddings['query_to_fact']
+        passage_query_embeddings = query_embeddings['query_to_passage']
+
+        shard_scores = self._scatter("score_queries", [(fact_query_embeddings, passage_query_embeddings, link_top_k,
+                                                        self.global_config.shard_passage_top_k)] * self.num_shards)
+
+        all_candidate_facts, all_fact_scores, all_dpr_results = [], [], []
+        for q_idx in range(len(queries)):
+            per_shard = [scores[q_idx] for scores in shard_scores]
+            candidate_facts, fact_scores = self._merge_fact_candidates(per_shard, link_top_k)
+            all_candidate_facts.append(candidate_facts)
+            all_fact_scores.append(fact_scores)
+            all_dpr_results.append(self._merge_passage_candidates(per_shard))
+        stage_start = self._record_batch_stage("shard_scoring", stage_start, all_timings)
+
+        all_top_k_facts = self._rerank(queries, all_candidate_facts, all_fact_scores)
+        stage_start = self._record_batch_stage("reranking", stage_start, all_timings)
+
+        # Queries with facts left after recognition memory go through graph search, the others fall back to DPR
+        graph_queries = [q_idx for q_idx, (top_k_fact_indices, _) in enumerate(all_top_k_facts) if len(top_k_fact_indices) > 0]
+        all_seed_names = [self._seed_names(all_top_k_facts[q_idx][1], all_dpr_results[q_idx]) for q_idx in graph_queries]
+        shard_subgraphs = self._scatter("get_subgraphs", [(all_seed_names, self.global_config.shard_subgraph_hops,
+                                                           self.global_config.shard_subgraph_max_nodes)] * self.num_shards)
+        self._record_batch_stage("shard_subgraphs", stage_start, all_timings)
+
+        all_ranked = [all_dpr_results[q_idx] for q_idx in range(len(queries))]
+        for position, q_idx in enumerate(graph_queries):
+            top_k_fact_indices, top_k_facts = all_top_k_facts[q_idx]
+            with self.retrieval_metrics.span("graph_search", all_timings[q_idx]):
+                ranked = self._graph_search([subgraphs[position] for subgraphs in shard_subgraphs],
+                                            top_k_facts,
+                                            all_fact_scores[q_idx][top_k_fact_indices],
+                                            all_dpr_results[q_idx])
+            if ranked is not None:
+                all_ranked[q_idx] = ranked
+            else:
+                logger.info('No phrases found in the graph for the given facts, return DPR results')
+
+        stage_start = time.perf_counter()
+        chunk_ids = sorted(set(chunk_id for ranked in all_ranked for chunk_id, _ in ranked[:num_to_retrieve]))
+        shard_chunk_ids = [[] for _ in range(self.num_shards)]
+        for chunk_id in chunk_ids:
+            shard_chunk_ids[shard_for_chunk(chunk_id, self.num_shards)].append(chunk_id)
+        chunk_texts = {}
+        for texts in self._scatter("get_passages", [(ids,) if ids else None for ids in shard_chunk_ids]):
+            chunk_texts.update(texts or {})
+
+        self._record_batch_stage("doc_materialization", stage_start, all_timings)
+
+        retrieval_results = []
+        for query, ranked, timings in zip(queries, all_ranked, all_timings):
+            ranked = [(chunk_id, score) for chunk_id, score in ranked[:num_to_retrieve] if chunk_id in chunk_texts]
+            retrieval_results.append(QuerySolution(question=query,
+                                                   docs=[chunk_texts[chunk_id] for chunk_id, _ in ranked],
+                                                   doc_scores=np.array([score for _, score in ranked]),
+                                                   timings=timings))
+            self.retrieval_metrics.add_query_timings(timings)
+        self.retrieval_metrics.log_summary()
+
+        if not self.global_config.read_only:
+            self.coordinator.query_embedding_cache.save()
+
+        if gold_docs is not None:
+            k_list = [1, 2, 5, 10, 20, 30, 50, 100, 150, 200]
+            overall_retrieval_result, example_retrieval_results = RetrievalRecall(global_config=self.global_config).calculate_metric_scores(
+                gold_docs=gold_docs, retrieved_docs=[retrieval_result.docs for retrieval_result in retrieval_results], k_list=k_list)
+            logger.info(f"Evaluation results for retrieval: {overall_retrieval_result}")
+            return retrieval_results, overall_retrieval_result
+        return retrieval_results
+
+    @property
+    def retrieval_metrics(self) -> RetrievalMetrics:
+        """Per-stage latency histograms of the retrievals of this instance (see `HippoRAG.retrieval_metrics`)."""
+        return self.coordinator.retrieval_metrics
+
+    def _record_batch_stage(self, stage: str, start: float, all_timings: List[Dict[str, float]]) -> float:
+        """Charges the time since `start` to `stage` of every query in the batch and returns the current time."""
+        end = time.perf_counter()
+        for timings in all_timings:
+            self.retrieval_metrics.record(stage, end - start, timings)
+        return end
+
+    @staticmethod
+    def _merge_fact_candidates(per_shard: List[Dict[str, Any]], link_top_k: int) -> Tuple[List[Tuple], np.ndarray]:
+        """Global top `link_top_k` facts, min-max normalized over the facts of all shards, highest score first."""
+        ranges = [result["fact_range"] for result in per_shard if result["fact_range"] is not None]
+        if not ranges:
+            return [], np.array([])
+        min_score, max_score = min(low for low, _ in ranges), max(high for _, high in ranges)
+
+        # A fact extracted in several shards is one candidate
+        fact_scores = {}
+        for result in per_shard:
+            for content, score in result["facts"]:
+                fact_scores[content] = score
+        ranked = sorted(fact_scores.items(), key=lambda x: x[1], reverse=True)[:link_top_k]
+
+        scores = np.array([score for _, score in ranked])
+        scores = (scores - min_score) / (max_score - min_score) if max_score > min_score else np.ones_like(scores)
+        return [ast.literal_eval(content) for content, _ in ranked], scores
+
+    @staticmethod
+    def _merge_passage_candidates(per_shard: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+        """Candidate passages of all shards as (chunk id, score) pairs, min-max normalized over all passages, best first."""
+        ranges = [result["passage_range"] for result in per_shard if result["passage_range"] is not None]
+        if not ranges:
+            return []
+        min_score, max_score = min(low for low, _ in ranges), max(high for _, high in ranges)
+        ranked = sorted((candidate for result in per_shard for candidate in result["passages"]), key=lambda x: x[1], reverse=True)
+        if max_score == min_score:
+            return [(chunk_id, 1.0) for chunk_id, _ in ranked]
+        return [(chunk_id, (score - min_score) / (max_score - min_score)) for chunk_id, score in ranked]
+
+    def _rerank(self,
+                queries: List[str],
+                all_candidate_facts: List[List[Tuple]],
+                all_fact_scores: List[np.ndarray]) -> List[Tuple[List[int], List[Tuple]]]:
+        """Recognition memory over the merged candidate facts; returns (indices into the candidates, facts) per query."""
+        rerank_filter = self.coordinator.rerank_filter
+        link_top_k = self.global_config.linking_top_k
+        results = [([], []) for _ in queries]
+        q_idxs = [q_idx for q_idx, candidate_facts in enumerate(all_candidate_facts) if len(candidate_facts) > 0]
+        if not q_idxs:
+            return results
+
+        try:
+            if rerank_filter.supports_batch_rerank:
+                reranked = rerank_filter.batch_rerank([queries[q_idx] for q_idx in q_idxs],
+                                                      [all_candidate_facts[q_idx] for q_idx in q_idxs],
+                                                      [list(range(len(all_candidate_facts[q_idx]))) for q_idx in q_idxs],
+                                                      len_after_rerank=link_top_k)
+            else:
+                max_workers = max(1, min(self.global_config.rerank_max_workers, len(q_idxs)))
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    reranked = list(executor.map(
+                        lambda q_idx: rerank_filter(queries[q_idx], all_candidate_facts[q_idx],
+                                                    list(range(len(all_candidate_facts[q_idx]))), len_after_rerank=link_top_k),
+                        q_idxs))
+        except Exception as e:
+            logger.error(f"Error in rerank: {str(e)}")
+            return results
+
+        for q_idx, (top_k_fact_indices, top_k_facts, _) in zip(q_idxs, reranked):
+            results[q_idx] = (list(top_k_fact_indices), list(top_k_facts))
+        return results
+
+    @staticmethod
+    def _seed_names(top_k_facts: List[Tuple], dpr_results: List[Tuple[str, float]]) -> List[str]:
+        phrase_keys = [compute_mdhash_id(content=phrase.lower(), prefix="entity-")
+                       for fact in top_k_facts for phrase in (fact[0], fact[2])]
+        return list(dict.fromkeys(phrase_keys + [chunk_id for chunk_id, _ in dpr_results]))
+
+    def _graph_search(self,
+                      subgraphs: List[Dict[str, Any]],
+                      top_k_facts: List[Tuple],
+                      top_k_fact_scores: np.ndarray,
+                      dpr_results: List[Tuple[str, float]]) -> Optional[List[Tuple[str, float]]]:
+        """
+        Runs PPR over the union of the shards' subgraphs, seeded like `HippoRAG.graph_search_with_fact_entities`:
+        fact entities weighted by fact score over the number of passages they occur in (summed over shards), and
+        the candidate passages by their dense score times `passage_node_weight`.
+
+        Returns:
+            Optional[List[Tuple[str, float]]]: (chunk id, PPR score) of the passages in the union subgraph, best
+            first, followed by the remaining dense retrieval candidates; None if no fact entity is in any graph.
+        """
+        name_to_idx, is_passage, edge_weights = {}, [], {}
+        entity_chunk_counts = {}
+        for subgraph in subgraphs:
+            local_to_global = []
+            for name, passage_flag in zip(subgraph["names"], subgraph["is_passage"]):
+                if name not in name_to_idx:
+                    name_to_idx[name] = len(name_to_idx)
+                    is_passage.append(passage_flag)
+                local_to_global.append(name_to_idx[name])
+            # Fact edges of passages in different shards add up, like repeated facts in a single graph
+            for (source, target), weight in zip(subgraph["edges"], subgraph["weights"]):
+                source, target = local_to_global[source], local_to_global[target]
+                key = (min(source, target), max(source, target))
+                edge_weights[key] = edge_weights.get(key, 0.0) + weight
+            for name, count in subgraph["entity_chunk_counts"].items():
+                entity_chunk_counts[name] = entity_chunk_counts.get(name, 0) + count
+
+        # Phrase weights
+        phrase_weights, number_of_occurs = {}, {}
+        for rank, fact in enumerate(top_k_facts):
+            for phrase in (fact[0].lower(), fact[2].lower()):
+                phrase_key = compute_mdhash_id(content=phrase, prefix="entity-")
+                if phrase_key not in name_to_idx:
+                    continue
+                weighted_fact_score = top_k_fact_scores[rank]
+                if entity_chunk_counts.get(phrase_key, 0) > 0:
+                    weighted_fact_score /= entity_chunk_counts[phrase_key]
+                phrase_weights[phrase_key] = phrase_weights.get(phrase_key, 0.0) + weighted_fact_score
+                number_of_occurs[phrase_key] = number_of_occurs.get(phrase_key, 0) + 1
+        if not phrase_weights:
+            return None
+        phrase_weights = {key: weight / number_of_occurs[key] for key, weight in phrase_weights.items()}
+        phrase_weights = dict(sorted(phrase_weights.items(), key=lambda x: x[1], reverse=True)[:self.global_config.linking_top_k])
+
+        reset_prob = np.zeros(len(name_to_idx))
+        for phrase_key, weight in phrase_weights.items():
+            reset_prob[name_to_idx[phrase_key]] = weight
+        for chunk_id, dpr_score in dpr_results:
+            if chunk_id in name_to_idx:
+                reset_prob[name_to_idx[chunk_id]] = dpr_score * self.global_config.passage_node_weight
+        reset_prob = np.where(np.isnan(reset_prob) | (reset_prob < 0), 0, reset_prob)
+
+        graph = ig.Graph(n=len(name_to_idx), edges=list(edge_weights.keys()), directed=False)
+        graph.es["weight"] = list(edge_weights.values())
+        damping = self.global_config.damping if self.global_config.damping is not None else 0.5
+        pagerank_scores = graph.personalized_pagerank(damping=damping, directed=False, weights='weight',
+                                                      reset=reset_prob, implementation='prpack')
+
+        names = list(name_to_idx)
+        ranked = sorted(((names[idx], pagerank_scores[idx]) for idx in range(len(names)) if is_passage[idx]),
+                        key=lambda x: x[1], reverse=True)
+        ranked_ids = set(chunk_id for chunk_id, _ in ranked)
+        return ranked + [(chunk_id, 0.0) for chunk_id, _ in dpr_results if chunk_id not in ranked_ids]
+
+    def retrieve_dpr(self, queries: List[str], num_to_retrieve: int = None) -> List[QuerySolution]:
+        """Dense passage retrieval over all shards (see `HippoRAG.retrieve_dpr`)."""
+        if num_to_retrieve is None:
+            num_to_retrieve = self.global_config.retrieval_top_k
+
+        query_embeddings, all_timings = self.coordinator.encode_queries_timed(queries)
+        stage_start = time.perf_counter()
+        passage_query_embeddings = query_embeddings['query_to_passage']
+        shard_scores = self._scatter("score_queries", [(None, passage_query_embeddings, 0,
+                                                        num_to_retrieve)] * self.num_shards)
+        all_ranked = [self._merge_passage_candidates([scores[q_idx] for scores in shard_scores])[:num_to_retrieve]
+                      for q_idx in range(len(queries))]
+        stage_start = self._record_batch_stage("shard_scoring", stage_start, all_timings)
+
+        shard_chunk_ids = [[] for _ in range(self.num_shards)]
+        for chunk_id in set(chunk_id for ranked in all_ranked for chunk_id, _ in ranked):
+            shard_chunk_ids[shard_for_chunk(chunk_id, self.num_shards)].append(chunk_id)
+        chunk_texts = {}
+        for texts in self._scatter("get_passages", [(ids,) if ids else None for ids in shard_chunk_ids]):
+            chunk_texts.update(texts or {})
+        self._record_batch_stage("doc_materialization", stage_start, all_timings)
+
+        for timings in all_timings:
+            self.retrieval_metrics.add_query_timings(timings)
+        self.retrieval_metrics.log_summary()
+        return [QuerySolution(question=query, docs=[chunk_texts[chunk_id] for chunk_id, _ in ranked],
+                              doc_scores=np.array([score for _, score in ranked]), timings=timings)
+                for query, ranked, timings in zip(queries, all_ranked, all_timings)]
+
+    def rag_qa(self,
+               queries: List[str | QuerySolution],
+               gold_docs: List[List[str]] = None,
+               gold_answers: List[List[str]] = None) -> Tuple[List[QuerySolution], List[str], List[Dict]] | Tuple[List[QuerySolution], List[str], List[Dict], Dict, Dict]:
+        """Sharded retrieval followed by QA in the coordinator; same inputs and outputs as `HippoRAG.rag_qa`."""
+        overall_retrieval_result = None
+        if not isinstance(queries[0], QuerySolution):
+            if gold_docs is not None:
+                queries, overall_retrieval_result = self.retrieve(queries=queries, gold_docs=gold_docs)
+            else:
+                queries = self.retrieve(queries=queries)
+
+        queries_solutions, all_response_message, all_metadata = self.coordinator.qa(queries)
+
+        if gold_answers is None:
+            return queries_solutions, all_response_message, all_metadata
+
+        predicted_answers = [qa_result.answer for qa_result in queries_solutions]
+        overall_qa_results, _ = QAExactMatch(global_config=self.global_config).calculate_metric_scores(
+            gold_answers=gold_answers, predicted_answers=predicted_answers, aggregation_fn=np.max)
+        overall_qa_f1_result, _ = QAF1Score(global_config=self.global_config).calculate_metric_scores(
+            gold_answers=gold_answers, predicted_answers=predicted_answers, aggregation_fn=np.max)
+        overall_qa_results.update(overall_qa_f1_result)
+        overall_qa_results = {k: round(float(v), 4) for k, v in overall_qa_results.items()}
+        logger.info(f"Evaluation results for QA: {overall_qa_results}")
+
+        for idx, q in enumerate(queries_solutions):
+            q.gold_answers = list(gold_answers[idx])
+            if gold_docs is not None:
+                q.gold_docs = gold_docs[idx]
+
+        return queries_solutions, all_response_message, all_metadata, overall_retrieval_result, overall_qa_results
@@ -1 +1,2 @@
-from .HippoRAG import HippoRAG
\ No newline at end of file
+from .HippoRAG import HippoRAG
+from .ShardedHippoRAG import ShardedHippoRAG
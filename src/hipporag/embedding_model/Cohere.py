@@ -16,6 +16,9 @@ class CohereEmbeddingModel(BaseEmbeddingModel):
     To select this implementation you can initialise HippoRAG with:
         embedding_model_name="cohere.embed-english-v3"
     """
+    # Both query instructions map to the same 'search_query' input type
+    instruction_sensitive = False
+
     def __init__(self, global_config:BaseConfig, embedding_model_name:str) -> None:
         super().__init__(global_config=global_config)
 
@@ -3,7 +3,6 @@ from typing import List, Optional
 
 import numpy as np
 import torch
-from tqdm import tqdm
 from transformers import AutoModel, AutoTokenizer
 
 from ..utils.config_utils import BaseConfig
@@ -18,6 +17,8 @@ def mean_pooling(token_embeddings, mask):
     return sentence_embeddings
 
 class ContrieverModel(BaseEmbeddingModel):
+    instruction_sensitive = False
+    supports_encode_pool = True
 
     def __init__(self, global_config: Optional[BaseConfig] = None, embedding_model_name: Optional[str] = None) -> None:
         super().__init__(global_config=global_config)
@@ -95,13 +96,8 @@ class ContrieverModel(BaseEmbeddingModel):
         if len(texts) <= batch_size:
             results = self.encode(texts)
         else:
-            pbar = tqdm(total=len(texts), desc="Batch Encoding")
-            results = []
-            for i in range(0, len(texts), batch_size):
-                results.append(self.encode(texts[i:i + batch_size]))
-                pbar.update(batch_size)
-            pbar.close()
-            results = torch.cat(results, dim=0)
+            lengths = [len(input_ids) for input_ids in self.tokenizer(texts, truncation=True)["input_ids"]]
+            results = self.encode_length_sorted(texts, lengths, self.encode)
 
         if isinstance(results, torch.Tensor):
             results = results.cpu()
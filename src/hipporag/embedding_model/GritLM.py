@@ -75,11 +75,19 @@ class GritLMEmbeddingModel(BaseEmbeddingModel):
         if kwargs: params.update(kwargs)
         if "instruction" in kwargs:
             params["instruction"] = self._get_formated_instruction(params["instruction"])
-        params["sentences"] = texts
+        batch_size = params["batch_size"]
         
         
         logger.debug(f"Calling {self.__class__.__name__} with:\n{params}")
-        results = self.embedding_model.encode(**params)
+        if len(texts) <= batch_size:
+            results = self.embedding_model.encode(sentences=texts, **params)
+        else:
+            max_length = params.get("max_length", self.global_config.embedding_max_seq_len)
+            lengths = [min(len(input_ids), max_length)
+                       for input_ids in self.embedding_model.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+            results = self.encode_length_sorted(
+                texts, lengths,
+                lambda batch: self.embedding_model.encode(sentences=batch, **dict(params, batch_size=len(batch))))
 
         if isinstance(results, torch.Tensor):
             results = results.cpu()
@@ -4,7 +4,6 @@ import os
 
 import numpy as np
 import torch
-from tqdm import tqdm
 
 # 在导入 transformers 之前设置离线环境变量
 os.environ.update({
@@ -119,14 +118,10 @@ class NVEmbedV2EmbeddingModel(BaseEmbeddingModel):
             params["prompts"] = texts  # self._add_eos(texts=texts)
             results = self.embedding_model.encode(**params)
         else:
-            pbar = tqdm(total=len(texts), desc="Batch Encoding")
-            results = []
-            for i in range(0, len(texts), batch_size):
-                params["prompts"] = texts[i:i + batch_size]
-                results.append(self.embedding_model.encode(**params))
-                pbar.update(batch_size)
-            pbar.close()
-            results = torch.cat(results, dim=0)
+            lengths = [min(len(input_ids), params["max_length"])
+                       for input_ids in self.embedding_model.tokenizer(texts, add_special_tokens=False)["input_ids"]]
+            results = self.encode_length_sorted(texts, lengths,
+                                                lambda batch: self.embedding_model.encode(**dict(params, prompts=batch)))
 
         if isinstance(results, torch.Tensor):
             results = results.cpu()
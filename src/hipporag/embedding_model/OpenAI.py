@@ -3,8 +3,6 @@ from typing import List, Optional
 
 import numpy as np
 import torch
-from tqdm import tqdm
-from transformers import AutoModel
 from openai import OpenAI
 from openai import AzureOpenAI
 
@@ -15,6 +13,7 @@ from .base import BaseEmbeddingModel, EmbeddingConfig, make_cache_embed
 logger = get_logger(__name__)
 
 class OpenAIEmbeddingModel(BaseEmbeddingModel):
+    instruction_sensitive = False
 
     def __init__(self, global_config: Optional[BaseConfig] = None, embedding_model_name: Optional[str] = None) -> None:
         super().__init__(global_config=global_config)
@@ -32,11 +31,13 @@ class OpenAIEmbeddingModel(BaseEmbeddingModel):
 
         if self.global_config.azure_embedding_endpoint is None:
             self.client = OpenAI(
-                base_url=self.global_config.embedding_base_url
+                base_url=self.global_config.embedding_base_url,
+                max_retries=self.global_config.max_retry_attempts
             )
         else:
             self.client = AzureOpenAI(api_version=self.global_config.azure_embedding_endpoint.split('api-version=')[1],
-                                      azure_endpoint=self.global_config.azure_embedding_endpoint)
+                                      azure_endpoint=self.global_config.azure_embedding_endpoint,
+                                      max_retries=self.global_config.max_retry_attempts)
 
 
     def _init_embedding_config(self) -> None:
@@ -96,17 +97,8 @@ class OpenAIEmbeddingModel(BaseEmbeddingModel):
         if len(texts) <= batch_size:
             results = self.encode(texts)
         else:
-            pbar = tqdm(total=len(texts), desc="Batch Encoding")
-            results = []
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                try:
-                    results.append(self.encode(batch))
-                except:
-                    import ipdb; ipdb.set_trace()
-                pbar.update(batch_size)
-            pbar.close()
-            results = np.concatenate(results)
+            # The client retries rate limits, 5xx and connection errors with backoff (max_retry_attempts)
+            results = self.encode_concurrent_requests(texts, self.encode, batch_size)
 
         if isinstance(results, torch.Tensor):
             results = results.cpu()
@@ -15,6 +15,9 @@ class TransformersEmbeddingModel(BaseEmbeddingModel):
     To select this implementation you can initialise HippoRAG with:
         embedding_model_name starts with "Transformers/"
     """
+    instruction_sensitive = False
+    supports_encode_pool = True
+
     def __init__(self, global_config:BaseConfig, embedding_model_name:str) -> None:
         super().__init__(global_config=global_config)
 
@@ -40,8 +43,6 @@ class TransformersEmbeddingModel(BaseEmbeddingModel):
         if len(texts) < self.batch_size:
             return self.encode(texts)
         
-        results = []
-        batch_indexes = list(range(0, len(texts), self.batch_size))
-        for i in tqdm(batch_indexes, desc="Batch Encoding"):
-            results.append(self.encode(texts[i:i + self.batch_size]))
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = list(tqdm(self.map_encode_batches(batches, self.encode), total=len(batches), desc="Batch Encoding"))
         return np.concatenate(results)
@@ -1,11 +1,36 @@
+import functools
 from typing import List
 import numpy as np
-from tqdm import tqdm
 
 from .base import BaseEmbeddingModel
 from ..utils.config_utils import BaseConfig
+from ..utils.logging_utils import get_logger
 from ..prompts.linking import get_query_instruction
 import requests
+from requests.adapters import HTTPAdapter
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+logger = get_logger(__name__)
+
+
+def _is_transient_error(exception: BaseException) -> bool:
+    if isinstance(exception, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exception, requests.HTTPError) and exception.response is not None:
+        return exception.response.status_code == 429 or exception.response.status_code >= 500
+    return False
+
+
+def transient_retry_decorator(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        dynamic_retry = retry(retry=retry_if_exception(_is_transient_error),
+                              stop=stop_after_attempt(self.max_retries),
+                              wait=wait_exponential(multiplier=0.5, max=10),
+                              before_sleep=lambda state: logger.warning(f"Retrying embedding request after: {state.outcome.exception()}"),
+                              reraise=True)
+        return dynamic_retry(func)(self, *args, **kwargs)
+    return wrapper
 
 class VLLMEmbeddingModel(BaseEmbeddingModel):
     """
@@ -13,6 +38,8 @@ class VLLMEmbeddingModel(BaseEmbeddingModel):
         embedding_model_name starts with "VLLM/"
     The embedding base url should contain the v1/embeddings.
     """
+    instruction_sensitive = False
+
     def __init__(self, global_config:BaseConfig, embedding_model_name:str) -> None:
         super().__init__(global_config=global_config)
 
@@ -22,11 +49,19 @@ class VLLMEmbeddingModel(BaseEmbeddingModel):
 
         self.url = global_config.embedding_base_url
 
+        # One keep-alive connection per concurrent request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, global_config.embedding_max_concurrent_requests))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.max_retries = global_config.max_retry_attempts
+
         self.search_query_instr = set([
             get_query_instruction('query_to_fact'),
             get_query_instruction('query_to_passage')
         ])
 
+    @transient_retry_decorator
     def call_model(self, input_text) -> List[np.ndarray]:
         if isinstance(input_text, str):
             input_text = [input_text]
@@ -39,7 +74,7 @@ class VLLMEmbeddingModel(BaseEmbeddingModel):
             "input": input_text,
         }
 
-        response = requests.post(self.base_url, headers=headers, json=payload)
+        response = self.session.post(self.url, headers=headers, json=payload)
         response.raise_for_status()
         result = response.json()
         return np.array([result["data"][i]["embedding"] for i in range(len(result["data"]))])
@@ -49,11 +84,8 @@ class VLLMEmbeddingModel(BaseEmbeddingModel):
         return response
 
     def batch_encode(self, texts: List[str], **kwargs) -> None:
+        if isinstance(texts, str): texts = [texts]
         if len(texts) < self.batch_size:
             return self.encode(texts)
-        
-        results = []
-        batch_indexes = list(range(0, len(texts), self.batch_size))
-        for i in tqdm(batch_indexes, desc="Batch Encoding"):
-            results.append(self.encode(texts[i:i + self.batch_size]))
-        return np.concatenate(results)
+
+        return self.encode_concurrent_requests(texts, self.encode, self.batch_size)
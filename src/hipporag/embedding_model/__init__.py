@@ -1,30 +1,45 @@
-from .Contriever import ContrieverModel
+import importlib
+
 from .base import EmbeddingConfig, BaseEmbeddingModel
-from .GritLM import GritLMEmbeddingModel
-from .NVEmbedV2 import NVEmbedV2EmbeddingModel
-from .OpenAI import OpenAIEmbeddingModel
-from .Cohere import CohereEmbeddingModel
-from .Transformers import TransformersEmbeddingModel
-from .VLLM import VLLMEmbeddingModel
 
 from ..utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
 
+# Backends are imported on first use so that importing hipporag does not pull in every model library
+_EMBEDDING_MODEL_CLASSES = {
+    "ContrieverModel": ".Contriever",
+    "GritLMEmbeddingModel": ".GritLM",
+    "NVEmbedV2EmbeddingModel": ".NVEmbedV2",
+    "OpenAIEmbeddingModel": ".OpenAI",
+    "CohereEmbeddingModel": ".Cohere",
+    "TransformersEmbeddingModel": ".Transformers",
+    "VLLMEmbeddingModel": ".VLLM",
+}
+
+
+def __getattr__(name: str):
+    if name in _EMBEDDING_MODEL_CLASSES:
+        return getattr(importlib.import_module(_EMBEDDING_MODEL_CLASSES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def _get_embedding_model_class(embedding_model_name: str = "nvidia/NV-Embed-v2"):
     if "GritLM" in embedding_model_name:
-        return GritLMEmbeddingModel
+        class_name = "GritLMEmbeddingModel"
     elif "NV-Embed-v2" in embedding_model_name:
-        return NVEmbedV2EmbeddingModel
+        class_name = "NVEmbedV2EmbeddingModel"
     elif "contriever" in embedding_model_name:
-        return ContrieverModel
+        class_name = "ContrieverModel"
     elif "text-embedding" in embedding_model_name:
-        return OpenAIEmbeddingModel
+        class_name = "OpenAIEmbeddingModel"
     elif "cohere" in embedding_model_name:
-        return CohereEmbeddingModel
+        class_name = "CohereEmbeddingModel"
     elif embedding_model_name.startswith("Transformers/"):
-        return TransformersEmbeddingModel
+        class_name = "TransformersEmbeddingModel"
     elif embedding_model_name.startswith("VLLM/"):
-        return VLLMEmbeddingModel
-    assert False, f"Unknown embedding model name: {embedding_model_name}"
\ No newline at end of file
+        class_name = "VLLMEmbeddingModel"
+    else:
+        assert False, f"Unknown embedding model name: {embedding_model_name}"
+    return __getattr__(class_name)
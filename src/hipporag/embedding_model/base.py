@@ -1,6 +1,7 @@
 import json
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, replace
 from typing import (
+    Iterator,
     Optional,
     Tuple,
     Any, 
@@ -10,6 +11,9 @@ from typing import (
 import numpy as np
 import threading
 import multiprocessing
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
 
 
 from ..utils.logging_utils import get_logger
@@ -108,83 +112,144 @@ from filelock import FileLock
 import sqlite3
 import hashlib
 import os
-import torch
-def make_cache_embed(encode_func, cache_file_name, device):
-    def wrapper(**kwargs):
-        # FOCUS_KEYS = ["instruction", "prompts", "max_length"]
-        instruction = kwargs.get("instruction", "")
-        max_length = kwargs.get("max_length", "")
-
-        hash_strs = []
-        for prompt in kwargs['prompts']:
-            key_str = json.dumps({
-                "instruction": instruction,
-                "promps": prompt,
-                "max_length": max_length
-            }, sort_keys=True, default=str)
-            hash_strs.append(hashlib.sha256(key_str.encode("utf-8")).hexdigest())
-
-        missed_prompts = []
-        lock_file = cache_file_name + ".lock"
-
-        with FileLock(lock_file):
-            with sqlite3.connect(cache_file_name) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS embeddings (
-                        hash TEXT PRIMARY KEY,
-                        embedding BLOB
-                    )
-                ''')
-                conn.commit()
-
-                embeddings = []
-                for i, hash_str in enumerate(hash_strs):
-                    cursor.execute('SELECT embedding FROM embeddings WHERE hash = ?', (hash_str,))
-                    result = cursor.fetchone()
-                    if result:
-                        # Convert the BLOB back to a NumPy array
-                        emb = np.frombuffer(result[0], dtype=np.float32)
-                        embeddings.append(emb)
-                    else:
-                        missed_prompts.append(i)
-                        embeddings.append(None)
-
-        if missed_prompts:
-            # Update kwargs to include only the missed prompts.
-            kwargs['prompts'] = [kwargs['prompts'][i] for i in missed_prompts]
-            # Call the encoder function (which returns a 2D torch tensor)
-            new_embeddings = encode_func(**kwargs)
-            # Insert the new embeddings back into the correct positions.
-            for idx, embedding in enumerate(new_embeddings):
-                embeddings[missed_prompts[idx]] = embedding
-
-            # Save the new embeddings to the cache.
+def make_cache_embed(encode_func, cache_file_name, key_params: Optional[Dict[str, Any]] = None,
+                     storage_dtype: str = "float32", lookup_chunk_size: int = 500):
+    """
+    Wraps `encode_func(texts, **kwargs)` with a persistent SQLite embedding cache.
+
+    Every text is keyed on its content, the call's kwargs (e.g. instruction, norm) and `key_params` (model settings
+    that change the output). Hits are fetched with chunked `IN (...)` lookups, only the distinct misses are passed to
+    `encode_func` in one call, and they are stored with a single `executemany`. Embeddings are stored as
+    `storage_dtype` ("float32" or "float16", halving the file size) and always returned as a float32 NumPy array in
+    input order.
+    """
+    lock_file = cache_file_name + ".lock"
+    with FileLock(lock_file):
+        with sqlite3.connect(cache_file_name) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    hash TEXT PRIMARY KEY,
+                    embedding BLOB,
+                    dtype TEXT
+                )
+            """)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(embeddings)")]
+            if "dtype" not in columns:
+                # Caches written before dtype was recorded hold float32 blobs
+                conn.execute("ALTER TABLE embeddings ADD COLUMN dtype TEXT DEFAULT 'float32'")
+            conn.commit()
+
+    def wrapper(texts: List[str], **kwargs) -> np.ndarray:
+        if isinstance(texts, str): texts = [texts]
+
+        call_key = json.dumps({**(key_params or {}), **kwargs}, sort_keys=True, default=str)
+        hash_strs = [hashlib.sha256(f"{call_key}\n{text}".encode("utf-8")).hexdigest() for text in texts]
+
+        found = {}
+        with sqlite3.connect(cache_file_name) as conn:
+            unique_hashes = list(dict.fromkeys(hash_strs))
+            for i in range(0, len(unique_hashes), lookup_chunk_size):
+                chunk = unique_hashes[i:i + lookup_chunk_size]
+                rows = conn.execute(f"SELECT hash, embedding, dtype FROM embeddings WHERE hash IN ({','.join('?' * len(chunk))})",
+                                    chunk).fetchall()
+                for hash_str, blob, dtype in rows:
+                    found[hash_str] = np.frombuffer(blob, dtype=dtype or "float32")
+
+        missed = {}
+        for text, hash_str in zip(texts, hash_strs):
+            if hash_str not in found and hash_str not in missed:
+                missed[hash_str] = text
+
+        if missed:
+            new_embeddings = _to_numpy(encode_func(list(missed.values()), **kwargs)).astype(np.float32, copy=False)
+            rows = []
+            for hash_str, embedding in zip(missed.keys(), new_embeddings):
+                found[hash_str] = embedding
+                rows.append((hash_str, embedding.astype(storage_dtype).tobytes(), storage_dtype))
+
             with FileLock(lock_file):
                 with sqlite3.connect(cache_file_name) as conn:
-                    cursor = conn.cursor()
-                    for i in missed_prompts:
-                        hash_str = hash_strs[i]
-                        emb = embeddings[i]
-                        # Convert torch tensor to numpy bytes if necessary.
-                        if isinstance(emb, torch.Tensor):
-                            emb_bytes = emb.cpu().numpy().tobytes()
-                        else:
-                            emb_bytes = emb.tobytes()
-                        cursor.execute('INSERT INTO embeddings (hash, embedding) VALUES (?, ?)', (hash_str, emb_bytes))
+                    conn.executemany('INSERT OR REPLACE INTO embeddings (hash, embedding, dtype) VALUES (?, ?, ?)', rows)
                     conn.commit()
 
-        # Convert all embeddings to torch tensors if they're not already
-        final_embeddings = [
-            emb if isinstance(emb, torch.Tensor) else torch.Tensor(emb.copy())
-            for emb in embeddings
-        ]
-
-        final_embeddings = [emb.to(device) for emb in final_embeddings]
-        # Return a 2D tensor where each row is an embedding.
-        return torch.stack(final_embeddings)
+        logger.debug(f"Embedding cache: {len(texts) - len(missed)} hits, {len(missed)} misses")
+        return np.stack([found[hash_str] for hash_str in hash_strs]).astype(np.float32, copy=False)
 
     return wrapper
+
+
+def length_sorted_batches(lengths: List[int], max_batch_tokens: int) -> List[List[int]]:
+    """
+    Groups text indices into batches of similar length so little compute is spent on padding.
+
+    Indices are sorted by length (longest first) and a batch is closed once adding the next text would push its padded
+    size (number of texts x longest length in the batch) over `max_batch_tokens`. Short texts therefore share large
+    batches while long ones are encoded a few at a time.
+
+    Args:
+        lengths: Token length of each text.
+        max_batch_tokens: Padded token budget of one batch. A text longer than the budget gets a batch of its own.
+
+    Returns:
+        List[List[int]]: Batches of indices into `lengths`.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches, batch = [], []
+    for i in order:
+        # The first (longest) text of a batch sets its padded length
+        if batch and (len(batch) + 1) * max(lengths[batch[0]], 1) > max_batch_tokens:
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def token_budget_batches(lengths: List[int], max_batch_tokens: int, max_batch_size: int) -> List[List[int]]:
+    """
+    Splits text indices, in input order, into contiguous batches of at most `max_batch_size` texts whose summed
+    length stays within `max_batch_tokens` (a text longer than the budget gets a batch of its own). Meant for embedding
+    servers, which do not pad a request's inputs to a common length.
+    """
+    batches, batch, batch_tokens = [], [], 0
+    for i, length in enumerate(lengths):
+        if batch and (len(batch) >= max_batch_size or batch_tokens + length > max_batch_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(i)
+        batch_tokens += length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def approx_token_len(text: str) -> int:
+    """Rough token count (~4 characters per token) used to size embedding requests without a tokenizer."""
+    return len(text) // 4 + 1
+
+
+def _to_numpy(embeddings) -> np.ndarray:
+    # torch tensors (duck-typed so API-only backends never import torch)
+    if hasattr(embeddings, "detach"):
+        embeddings = embeddings.detach().float().cpu().numpy()
+    return np.asarray(embeddings)
+
+
+# Model copy owned by an encode pool worker process, see `BaseEmbeddingModel.get_encode_pool`
+_worker_embedding_model = None
+
+
+def _init_encode_worker(model_class, global_config: BaseConfig, embedding_model_name: str, num_threads: int) -> None:
+    global _worker_embedding_model
+    import torch
+    torch.set_num_threads(num_threads)
+    _worker_embedding_model = model_class(global_config=global_config, embedding_model_name=embedding_model_name)
+
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    return _to_numpy(_worker_embedding_model.encode(texts))
+
     
 class BaseEmbeddingModel:
     global_config: BaseConfig
@@ -192,6 +257,13 @@ class BaseEmbeddingModel:
     embedding_config: EmbeddingConfig
     
     embedding_dim: int # Need subclass to init
+
+    # Whether the `instruction` passed to `batch_encode` changes the output. Models that ignore it (or map every query
+    # instruction to the same input) set this to False so callers can encode a query once for all instructions.
+    instruction_sensitive: bool = True
+
+    # Whether `encode(texts)` can run in an encode pool worker (see `get_encode_pool`)
+    supports_encode_pool: bool = False
     
     def __init__(self, global_config: Optional[BaseConfig] = None) -> None:
         if global_config is None: 
@@ -205,8 +277,141 @@ class BaseEmbeddingModel:
 
         logger.debug(f"Init {self.__class__.__name__}'s embedding_model_name with: {self.embedding_model_name}")
 
+        self._encode_pool = None
+        self._encode_pool_finalizer = None
+
+        self._cached_encode = None
+        if self.global_config.embedding_cache:
+            # The instance attribute shadows the subclass's batch_encode, which the cache calls for misses
+            self.batch_encode = self._cached_batch_encode
+
+    def _cached_batch_encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        """
+        `batch_encode` through the persistent embedding cache. The cache is opened on first use rather than in
+        `__init__`, so its file and keys use the model name a subclass constructor resolved (e.g. from its
+        `embedding_model_name` argument) instead of `global_config.embedding_model_name`.
+        """
+        if self._cached_encode is None:
+            cache_dir = os.path.join(self.global_config.save_dir, "embedding_cache")
+            os.makedirs(cache_dir, exist_ok=True)
+            cache_file_name = os.path.join(cache_dir, f"{self.embedding_model_name.replace('/', '_')}.sqlite")
+            self._cached_encode = make_cache_embed(
+                type(self).batch_encode.__get__(self), cache_file_name,
+                key_params={"model": self.embedding_model_name,
+                            "norm": self.global_config.embedding_return_as_normalized,
+                            "max_seq_len": self.global_config.embedding_max_seq_len},
+                storage_dtype=self.global_config.embedding_cache_dtype)
+        return self._cached_encode(texts, **kwargs)
+
     def batch_encode(self, texts: List[str], **kwargs) -> None:
         raise NotImplementedError
+
+    def get_max_batch_tokens(self) -> int:
+        if self.global_config.embedding_max_batch_tokens is not None:
+            return self.global_config.embedding_max_batch_tokens
+        return self.global_config.embedding_batch_size * self.global_config.embedding_max_seq_len
+
+    def encode_length_sorted(self, texts: List[str], lengths: List[int], encode_batch, desc: str = "Batch Encoding") -> np.ndarray:
+        """
+        Encodes `texts` in length-sorted, token-budgeted batches (see `length_sorted_batches`) and returns the
+        embeddings in the original order.
+
+        Args:
+            texts: Texts to encode.
+            lengths: Token length of each text (after truncation).
+            encode_batch: Callable encoding a list of texts into a 2D tensor or array.
+            desc: Progress bar description, shown when more than one batch is needed.
+        """
+        batches = length_sorted_batches(lengths, self.get_max_batch_tokens())
+
+        pbar = tqdm(total=len(texts), desc=desc) if len(batches) > 1 else None
+        results = []
+        for batch, batch_results in zip(batches, self.map_encode_batches([[texts[i] for i in batch] for batch in batches], encode_batch)):
+            results.append(batch_results)
+            if pbar is not None:
+                pbar.update(len(batch))
+        if pbar is not None:
+            pbar.close()
+
+        order = np.fromiter((i for batch in batches for i in batch), dtype=np.int64, count=len(texts))
+        results = np.concatenate(results, axis=0)
+        ordered_results = np.empty_like(results)
+        ordered_results[order] = results
+        return ordered_results
+
+    def get_encode_pool(self):
+        """
+        Returns the pool of worker processes used to encode batches on CPU, creating it on first use, or None if
+        `embedding_num_workers` <= 1, the model does not support it, or a GPU is available.
+
+        Each worker loads its own copy of the model and uses cpu_count // embedding_num_workers torch threads, so
+        the workers do not oversubscribe the cores.
+        """
+        import torch
+
+        num_workers = self.global_config.embedding_num_workers
+        if num_workers <= 1 or not self.supports_encode_pool or torch.cuda.is_available():
+            return None
+
+        if self._encode_pool is None:
+            num_threads = max(1, (os.cpu_count() or 1) // num_workers)
+            logger.info(f"Starting {num_workers} {self.__class__.__name__} encode workers with {num_threads} torch threads each")
+            # Workers must not start pools of their own
+            worker_config = replace(self.global_config, embedding_num_workers=0)
+            self._encode_pool = multiprocessing.get_context("spawn").Pool(
+                processes=num_workers,
+                initializer=_init_encode_worker,
+                initargs=(self.__class__, worker_config, self.embedding_model_name, num_threads))
+            # Stops the workers and their model copies if the model is dropped or the interpreter exits without
+            # `close_encode_pool`
+            self._encode_pool_finalizer = weakref.finalize(self, self._encode_pool.terminate)
+        return self._encode_pool
+
+    def close_encode_pool(self) -> None:
+        if self._encode_pool is not None:
+            self._encode_pool_finalizer.detach()
+            self._encode_pool.close()
+            self._encode_pool.join()
+            self._encode_pool = None
+            self._encode_pool_finalizer = None
+
+    def map_encode_batches(self, batches: List[List[str]], encode_batch) -> Iterator[np.ndarray]:
+        """
+        Encodes each batch of texts, yielding numpy embeddings in batch order. Batches are spread over the encode
+        pool workers (which call `encode`) when one is configured, else `encode_batch` runs in this process.
+        """
+        encode_pool = self.get_encode_pool() if len(batches) > 1 else None
+        if encode_pool is None:
+            for batch in batches:
+                yield _to_numpy(encode_batch(batch))
+        else:
+            yield from encode_pool.imap(_encode_in_worker, batches)
+
+    def encode_concurrent_requests(self, texts: List[str], encode_batch, max_batch_size: int, desc: str = "Batch Encoding") -> np.ndarray:
+        """
+        Encodes `texts` through a remote embedding API, keeping up to `embedding_max_concurrent_requests` requests in
+        flight. Texts are packed in order into requests of at most `max_batch_size` texts and
+        `embedding_request_max_tokens` (approximate) tokens; results are concatenated in input order.
+
+        Args:
+            texts: Texts to encode.
+            encode_batch: Callable sending one request for a list of texts and returning a 2D array. It is called
+                from worker threads and should retry transient failures itself.
+            max_batch_size: Max number of texts per request.
+            desc: Progress bar description.
+        """
+        batches = token_budget_batches([approx_token_len(text) for text in texts],
+                                       self.global_config.embedding_request_max_tokens, max_batch_size)
+        batches = [[texts[i] for i in batch] for batch in batches]
+
+        max_workers = max(1, min(self.global_config.embedding_max_concurrent_requests, len(batches)))
+        results = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor, tqdm(total=len(texts), desc=desc) as pbar:
+            # executor.map yields results in submission order while later batches are still in flight
+            for batch, batch_results in zip(batches, executor.map(encode_batch, batches)):
+                results.append(_to_numpy(batch_results))
+                pbar.update(len(batch))
+        return np.concatenate(results, axis=0)
     
     
     def get_query_doc_scores(self, query_vec: np.ndarray, doc_vecs: np.ndarray):
@@ -222,28 +427,40 @@ class BaseEmbeddingModel:
 class EmbeddingCache:
     """A multiprocessing-safe global cache for storing embeddings."""
     
-    _manager = multiprocessing.Manager()
-    _cache = _manager.dict()  # Shared dictionary for multiprocessing
+    # The manager server process is only started on first use, not at import time
+    _manager = None
+    _cache = None  # Shared dictionary for multiprocessing
     _lock = threading.Lock()  # Thread-safe lock for concurrent access
 
+    @classmethod
+    def _get_cache(cls):
+        if cls._cache is None:
+            with cls._lock:
+                if cls._cache is None:
+                    cls._manager = multiprocessing.Manager()
+                    cls._cache = cls._manager.dict()
+        return cls._cache
+
     @classmethod
     def get(cls, content):
         """Retrieve the embedding if cached."""
-        return cls._cache.get(content)
+        return cls._get_cache().get(content)
 
     @classmethod
     def set(cls, content, embedding):
         """Store an embedding in the cache."""
+        cache = cls._get_cache()
         with cls._lock:  # Ensures thread safety
-            cls._cache[content] = embedding
+            cache[content] = embedding
 
     @classmethod
     def contains(cls, content):
         """Check if the embedding exists in cache."""
-        return content in cls._cache
+        return content in cls._get_cache()
 
     @classmethod
     def clear(cls):
         """Clear the entire cache."""
+        cache = cls._get_cache()
         with cls._lock:
-            cls._cache.clear()
\ No newline at end of file
+            cache.clear()
\ No newline at end of file
@@ -1,17 +1,23 @@
 import numpy as np
 from tqdm import tqdm
 import os
+import json
+import re
+from contextlib import contextmanager
 from typing import Union, Optional, List, Dict, Set, Any, Tuple, Literal
 import logging
-from copy import deepcopy
+from copy import copy, deepcopy
 import pandas as pd
 
 from .utils.misc_utils import compute_mdhash_id, NerRawOutput, TripleRawOutput
+from .utils.manifest_utils import atomic_write_json, versioned_filename
+from .utils.profiling_utils import current_phase
 
 logger = logging.getLogger(__name__)
 
 class EmbeddingStore:
-    def __init__(self, embedding_model, db_filename, batch_size, namespace):
+    def __init__(self, embedding_model, db_filename, batch_size, namespace, read_only=False, compaction_ratio=0.2,
+                 filename=None, tombstone_filename=None):
         """
         Initializes the class with necessary configurations and sets up the working directory.
 
@@ -20,6 +26,11 @@ class EmbeddingStore:
         db_filename: The directory path where data will be stored or retrieved.
         batch_size: The batch size used for processing.
         namespace: A unique identifier for data segregation.
+        read_only: If True, the directory is never created and inserts/deletes raise a RuntimeError.
+        compaction_ratio: Deleted rows are kept as tombstones until they make up more than this fraction of all
+            rows, at which point the store is compacted (rows dropped and the parquet file rewritten).
+        filename / tombstone_filename: Files to load the store from (e.g. the versioned files of an index manifest).
+            Default to `vdb_<namespace>.parquet` and `vdb_<namespace>_tombstones.json` in `db_filename`.
 
         Functionality:
         - Assigns the provided parameters to instance variables.
@@ -31,16 +42,43 @@ class EmbeddingStore:
         self.embedding_model = embedding_model
         self.batch_size = batch_size
         self.namespace = namespace
+        self.read_only = read_only
+        self.compaction_ratio = compaction_ratio
+        self._save_deferred = False
+        self._pending_save = None
 
-        if not os.path.exists(db_filename):
+        if not os.path.exists(db_filename) and not read_only:
             logger.info(f"Creating working directory: {db_filename}")
             os.makedirs(db_filename, exist_ok=True)
 
-        self.filename = os.path.join(
+        self.filename = filename or os.path.join(
             db_filename, f"vdb_{self.namespace}.parquet"
         )
+        self.tombstone_filename = tombstone_filename or os.path.join(
+            db_filename, f"vdb_{self.namespace}_tombstones.json"
+        )
         self._load_data()
 
+    def open_version(self, filename: str, tombstone_filename: str) -> "EmbeddingStore":
+        """
+        Opens the store version made of `filename` and `tombstone_filename` (e.g. another committed index version)
+        as a new store with the same settings. If `filename` is the parquet file this store was loaded from, its
+        rows are reused and only the tombstone file is read.
+        """
+        store = copy(self)
+        store._save_deferred, store._pending_save = False, None
+        store.filename, store.tombstone_filename = filename, tombstone_filename
+
+        if filename != self.filename or not os.path.exists(filename):
+            store._load_data()
+            return store
+
+        store.hash_ids, store.texts, store.embeddings = list(self.hash_ids), list(self.texts), list(self.embeddings)
+        store._load_tombstones()
+        store._build_index()
+        logger.info(f"Reused {len(store.hash_ids)} records ({len(store.tombstones)} deleted) of {filename}")
+        return store
+
     def get_missing_string_hash_ids(self, texts: List[str]):
         nodes_dict = {}
 
@@ -61,6 +99,8 @@ class EmbeddingStore:
         return {h: {"hash_id": h, "content": t} for h, t in zip(missing_ids, texts_to_encode)}
 
     def insert_strings(self, texts: List[str]):
+        self._check_writable()
+
         nodes_dict = {}
 
         for text in texts:
@@ -76,8 +116,24 @@ class EmbeddingStore:
         # Filter out the missing hash_ids.
         missing_ids = [hash_id for hash_id in all_hash_ids if hash_id not in existing]
 
+        # Deleted records that are inserted again keep their row and embedding
+        revived_ids = [hash_id for hash_id in missing_ids if hash_id in self.tombstones]
+        if revived_ids:
+            missing_ids = [hash_id for hash_id in missing_ids if hash_id not in self.tombstones]
+
         logger.info(
-            f"Inserting {len(missing_ids)} new records, {len(all_hash_ids) - len(missing_ids)} records already exist.")
+            f"Inserting {len(missing_ids)} new records, reviving {len(revived_ids)} deleted records, "
+            f"{len(all_hash_ids) - len(missing_ids) - len(revived_ids)} records already exist.")
+        # Records that need no encoding count as cache hits of the indexing phase being profiled
+        phase = current_phase()
+        phase.add_items(len(missing_ids))
+        phase.add_cache_lookups(hits=len(all_hash_ids) - len(missing_ids), lookups=len(all_hash_ids))
+
+        if revived_ids:
+            for hash_id in revived_ids:
+                self.tombstones.pop(hash_id)
+            self._build_index()
+            self._save_tombstones()
 
         if not missing_ids:
             return  {}# All records already exist.
@@ -93,30 +149,95 @@ class EmbeddingStore:
         if os.path.exists(self.filename):
             df = pd.read_parquet(self.filename)
             self.hash_ids, self.texts, self.embeddings = df["hash_id"].values.tolist(), df["content"].values.tolist(), df["embedding"].values.tolist()
-            self.hash_id_to_idx = {h: idx for idx, h in enumerate(self.hash_ids)}
-            self.hash_id_to_row = {
-                h: {"hash_id": h, "content": t}
-                for h, t in zip(self.hash_ids, self.texts)
-            }
-            self.hash_id_to_text = {h: self.texts[idx] for idx, h in enumerate(self.hash_ids)}
-            self.text_to_hash_id = {self.texts[idx]: h  for idx, h in enumerate(self.hash_ids)}
             assert len(self.hash_ids) == len(self.texts) == len(self.embeddings)
-            logger.info(f"Loaded {len(self.hash_ids)} records from {self.filename}")
+            self._load_tombstones()
+            logger.info(f"Loaded {len(self.hash_ids)} records ({len(self.tombstones)} deleted) from {self.filename}")
         else:
             self.hash_ids, self.texts, self.embeddings = [], [], []
-            self.hash_id_to_idx, self.hash_id_to_row = {}, {}
+            self.tombstones = {}
+        self._build_index()
+
+    def _load_tombstones(self):
+        self.tombstones = {}
+        if os.path.exists(self.tombstone_filename):
+            with open(self.tombstone_filename) as f:
+                deleted_ids = set(json.load(f))
+            self.tombstones = {h: idx for idx, h in enumerate(self.hash_ids) if h in deleted_ids}
+
+    def _build_index(self):
+        """Builds the id / text lookup maps over all rows that are not tombstoned."""
+        live = [(idx, h, t) for idx, (h, t) in enumerate(zip(self.hash_ids, self.texts)) if h not in self.tombstones]
+        self.hash_id_to_row = {h: {"hash_id": h, "content": t} for _, h, t in live}
+        self.hash_id_to_idx = {h: idx for idx, h, _ in live}
+        self.hash_id_to_text = {h: t for _, h, t in live}
+        self.text_to_hash_id = {t: h for _, h, t in live}
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError(f"EmbeddingStore {self.namespace} is read-only, saving is not allowed.")
+
+    @contextmanager
+    def deferred_save(self, version: Optional[int] = None):
+        """
+        Batches persistence: inside this context inserts and deletes only update memory, and the store is written
+        once when the context exits without an error.
+
+        If `version` is given, changed files are written under new versioned names (`vdb_<namespace>.v<version>.parquet`)
+        instead of being overwritten, so the files of the previously committed version stay intact; `filename` and
+        `tombstone_filename` then point to the new files.
+        """
+        self._save_deferred, self._pending_save = True, None
+        try:
+            yield self
+        finally:
+            self._save_deferred = False
+        pending_save, self._pending_save = self._pending_save, None
+        if pending_save is None:
+            return
+        if version is not None:
+            self.tombstone_filename = versioned_filename(self._base_filename(self.tombstone_filename), version)
+            if pending_save == "data":
+                self.filename = versioned_filename(self._base_filename(self.filename), version)
+        if pending_save == "data":
+            self._save_data()
+        else:
+            self._save_tombstones()
+
+    @staticmethod
+    def _base_filename(filename: str) -> str:
+        """Strips the version from a versioned file name."""
+        return re.sub(r"\.v\d+(\.[A-Za-z]+)$", r"\1", filename)
+
+    def _save_tombstones(self):
+        self._check_writable()
+        if self._save_deferred:
+            self._pending_save = self._pending_save or "tombstones"
+            return
+        if not self.tombstones:
+            if os.path.exists(self.tombstone_filename):
+                os.remove(self.tombstone_filename)
+            return
+        atomic_write_json(self.tombstone_filename, list(self.tombstones.keys()))
 
     def _save_data(self):
+        self._check_writable()
+        if self._save_deferred:
+            self._pending_save = "data"
+            self._build_index()
+            return
         data_to_save = pd.DataFrame({
             "hash_id": self.hash_ids,
             "content": self.texts,
             "embedding": self.embeddings
         })
-        data_to_save.to_parquet(self.filename, index=False)
-        self.hash_id_to_row = {h: {"hash_id": h, "content": t} for h, t, e in zip(self.hash_ids, self.texts, self.embeddings)}
-        self.hash_id_to_idx = {h: idx for idx, h in enumerate(self.hash_ids)}
-        self.hash_id_to_text = {h: self.texts[idx] for idx, h in enumerate(self.hash_ids)}
-        self.text_to_hash_id = {self.texts[idx]: h for idx, h in enumerate(self.hash_ids)}
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "wb") as f:
+            data_to_save.to_parquet(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, self.filename)
+        self._save_tombstones()
+        self._build_index()
         logger.info(f"Saved {len(self.hash_ids)} records to {self.filename}")
 
     def _upsert(self, hash_ids, texts, embeddings):
@@ -127,20 +248,45 @@ class EmbeddingStore:
         logger.info(f"Saving new records.")
         self._save_data()
 
-    def delete(self, hash_ids):
-        indices = []
-
-        for hash in hash_ids:
-            indices.append(self.hash_id_to_idx[hash])
-
-        sorted_indices = np.sort(indices)[::-1]
-
-        for idx in sorted_indices:
-            self.hash_ids.pop(idx)
-            self.texts.pop(idx)
-            self.embeddings.pop(idx)
+    def delete(self, hash_ids) -> bool:
+        """
+        Tombstones the given records: they disappear from all lookups right away, but their rows stay in place
+        (and in the parquet file) until tombstones exceed `compaction_ratio` of all rows and `compact` runs.
+        Only the small tombstone file is written otherwise, so the cost scales with the number of deleted records.
 
-        logger.info(f"Saving record after deletion.")
+        Returns:
+            bool: Whether the store was compacted.
+        """
+        self._check_writable()
+
+        for hash_id in hash_ids:
+            idx = self.hash_id_to_idx.pop(hash_id, None)
+            if idx is None:
+                continue
+            self.tombstones[hash_id] = idx
+            self.hash_id_to_row.pop(hash_id)
+            self.text_to_hash_id.pop(self.hash_id_to_text.pop(hash_id), None)
+
+        if len(self.tombstones) > self.compaction_ratio * len(self.hash_ids):
+            self.compact()
+            return True
+
+        logger.info(f"Saving {len(self.tombstones)} tombstones after deletion.")
+        self._save_tombstones()
+        return False
+
+    def compact(self):
+        """Drops tombstoned rows and rewrites the parquet file."""
+        if not self.tombstones:
+            return
+        deleted_idxs = set(self.tombstones.values())
+        live_idxs = [idx for idx in range(len(self.hash_ids)) if idx not in deleted_idxs]
+        self.hash_ids = [self.hash_ids[idx] for idx in live_idxs]
+        self.texts = [self.texts[idx] for idx in live_idxs]
+        self.embeddings = [self.embeddings[idx] for idx in live_idxs]
+        self.tombstones = {}
+
+        logger.info(f"Compacting {self.namespace} store: dropping {len(deleted_idxs)} deleted records.")
         self._save_data()
 
     def get_row(self, hash_id):
@@ -158,6 +304,8 @@ class EmbeddingStore:
         return results
 
     def get_all_ids(self):
+        if self.tombstones:
+            return [h for h in self.hash_ids if h not in self.tombstones]
         return deepcopy(self.hash_ids)
 
     def get_all_id_to_rows(self):
@@ -0,0 +1,85 @@
+import functools
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+import igraph as ig
+import numpy as np
+
+from .embedding_store import EmbeddingStore
+from .utils.ppr_basis import PPRBasis
+
+
+@dataclass
+class IndexSnapshot:
+    """
+    Everything retrieval reads from one version of an index: the graph, the three embedding stores and the
+    retrieval objects built from them by `HippoRAG.prepare_retrieval_objects`.
+
+    `HippoRAG` exposes these fields as its own attributes (`self.graph`, `self.passage_node_keys`, ...) and
+    resolves them against the snapshot the current thread is pinned to, falling back to the active snapshot. A
+    snapshot opened with `HippoRAG.open_snapshot` is not modified by `refresh` or `swap_snapshot`, so a retrieval
+    pinned to it gives consistent results while a newer snapshot is swapped in.
+
+    Writes (`index`, `delete`, `update`, `upsert`) are not isolated: they modify the embedding stores, graph and
+    posting maps of the active snapshot in place, and `open_snapshot` shares unchanged objects with the previous
+    snapshot. Only read-only processes that pick up new versions with `refresh` get consistent retrievals while an
+    index is updated; a process that both writes and serves must not retrieve concurrently with its own writes.
+    """
+    manifest: Optional[Dict[str, Any]] = None
+    graph: Optional[ig.Graph] = None
+    chunk_embedding_store: Optional[EmbeddingStore] = None
+    entity_embedding_store: Optional[EmbeddingStore] = None
+    fact_embedding_store: Optional[EmbeddingStore] = None
+
+    entity_node_keys: List[str] = field(default_factory=list)
+    passage_node_keys: List[str] = field(default_factory=list)
+    fact_node_keys: List[str] = field(default_factory=list)
+    node_name_to_vertex_idx: Dict[str, int] = field(default_factory=dict)
+    entity_node_idxs: List[int] = field(default_factory=list)
+    passage_node_idxs: List[int] = field(default_factory=list)
+    entity_embeddings: Optional[np.ndarray] = None
+    passage_embeddings: Optional[np.ndarray] = None
+    fact_embeddings: Optional[np.ndarray] = None
+
+    chunk_to_openie_info: Dict[str, dict] = field(default_factory=dict)
+    proc_triples_to_docs: Dict[str, Set[str]] = field(default_factory=dict)
+    ent_node_to_chunk_ids: Optional[Dict[str, Set[str]]] = None
+    ppr_basis: Optional[PPRBasis] = None
+
+    ready_to_retrieve: bool = False
+
+    @property
+    def version(self) -> Optional[int]:
+        """Committed index version of the snapshot, None for an index without a manifest."""
+        return self.manifest["version"] if self.manifest is not None else None
+
+
+def snapshot_attribute(name: str, snapshot_field: Optional[str] = None) -> property:
+    """
+    A `HippoRAG` property that reads and writes `snapshot_field` (default: `name`) of the snapshot the calling
+    thread is pinned to, or of the active snapshot.
+    """
+    snapshot_field = snapshot_field or name
+
+    def getter(self):
+        return getattr(self._current_snapshot(), snapshot_field)
+
+    def setter(self, value):
+        setattr(self._current_snapshot(), snapshot_field, value)
+
+    return property(getter, setter, doc=f"`{snapshot_field}` of the current index snapshot.")
+
+
+class SnapshotPin(threading.local):
+    """Per-thread snapshot a `HippoRAG` instance resolves its index attributes against (None: the active one)."""
+    snapshot: Optional[IndexSnapshot] = None
+
+
+def pinned_to_snapshot(method):
+    """Runs a `HippoRAG` method pinned to the snapshot that is current when it is called (see `pin_snapshot`)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.pin_snapshot():
+            return method(self, *args, **kwargs)
+    return wrapper
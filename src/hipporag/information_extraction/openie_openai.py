@@ -7,9 +7,10 @@ from tqdm import tqdm
 
 from ..prompts import PromptTemplateManager
 from ..utils.logging_utils import get_logger
+from ..utils.profiling_utils import profile_phase
 from ..utils.llm_utils import fix_broken_generated_json, filter_invalid_triples
 from ..utils.misc_utils import TripleRawOutput, NerRawOutput
-from ..llm.openai_gpt import CacheOpenAI
+from ..llm.base import BaseLLM
 
 logger = get_logger(__name__)
 
@@ -37,7 +38,7 @@ def _extract_ner_from_response(real_response):
 
 
 class OpenIE:
-    def __init__(self, llm_model: CacheOpenAI):
+    def __init__(self, llm_model: BaseLLM):
         # Init prompt template manager
         self.prompt_template_manager = PromptTemplateManager(role_mapping={"system": "system", "user": "user", "assistant": "assistant"})
         self.llm_model = llm_model
@@ -154,7 +155,7 @@ class OpenIE:
         total_completion_tokens = 0
         num_cache_hit = 0
 
-        with ThreadPoolExecutor() as executor:
+        with profile_phase("openie_ner", num_items=len(chunk_passages)) as phase, ThreadPoolExecutor() as executor:
             # Create NER futures for each chunk
             ner_futures = {
                 executor.submit(self.ner, chunk_key, passage): chunk_key
@@ -167,6 +168,7 @@ class OpenIE:
                 ner_results_list.append(result)
                 # Update metrics based on the metadata from the result
                 metadata = result.metadata
+                phase.add_llm_usage(metadata)
                 total_prompt_tokens += metadata.get('prompt_tokens', 0)
                 total_completion_tokens += metadata.get('completion_tokens', 0)
                 if metadata.get('cache_hit'):
@@ -180,7 +182,7 @@ class OpenIE:
 
         triple_results_list = []
         total_prompt_tokens, total_completion_tokens, num_cache_hit = 0, 0, 0
-        with ThreadPoolExecutor() as executor:
+        with profile_phase("openie_triples", num_items=len(ner_results_list)) as phase, ThreadPoolExecutor() as executor:
             # Create triple extraction futures for each chunk
             re_futures = {
                 executor.submit(self.triple_extraction, ner_result.chunk_id,
@@ -194,6 +196,7 @@ class OpenIE:
                 result = future.result()
                 triple_results_list.append(result)
                 metadata = result.metadata
+                phase.add_llm_usage(metadata)
                 total_prompt_tokens += metadata.get('prompt_tokens', 0)
                 total_completion_tokens += metadata.get('completion_tokens', 0)
                 if metadata.get('cache_hit'):
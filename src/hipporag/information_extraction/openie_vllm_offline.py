@@ -5,6 +5,7 @@ from ..information_extraction import OpenIE
 from .openie_openai import ChunkInfo
 from ..utils.misc_utils import NerRawOutput, TripleRawOutput
 from ..utils.logging_utils import get_logger
+from ..utils.profiling_utils import profile_phase
 from ..prompts import PromptTemplateManager
 from ..llm.vllm_offline import VLLMOffline
 
@@ -35,14 +36,18 @@ class VLLMOfflineOpenIE(OpenIE):
         chunk_passages = {chunk_key: chunk["content"] for chunk_key, chunk in chunks.items()}
 
         ner_input_messages = [self.prompt_template_manager.render(name='ner', passage=p) for p in chunk_passages.values()]
-        ner_output, ner_output_metadata = self.llm_model.batch_infer(ner_input_messages, json_template='ner', max_tokens=512)
+        with profile_phase("openie_ner", num_items=len(ner_input_messages)) as phase:
+            ner_output, ner_output_metadata = self.llm_model.batch_infer(ner_input_messages, json_template='ner', max_tokens=512)
+            phase.add_llm_usage(ner_output_metadata, num_calls=len(ner_input_messages))
 
         triple_extract_input_messages = [self.prompt_template_manager.render(
             name='triple_extraction',
             passage=passage,
             named_entity_json=named_entities
         ) for passage, named_entities in zip(chunk_passages.values(), ner_output)]
-        triple_output, triple_output_metadata = self.llm_model.batch_infer(triple_extract_input_messages, json_template='triples', max_tokens=2048)
+        with profile_phase("openie_triples", num_items=len(triple_extract_input_messages)) as phase:
+            triple_output, triple_output_metadata = self.llm_model.batch_infer(triple_extract_input_messages, json_template='triples', max_tokens=2048)
+            phase.add_llm_usage(triple_output_metadata, num_calls=len(triple_extract_input_messages))
 
         ner_raw_outputs = []
         for idx, ner_output_instance in enumerate(ner_output):
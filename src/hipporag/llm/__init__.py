@@ -1,26 +1,38 @@
 import os
+import importlib
 
 from ..utils.logging_utils import get_logger
 from ..utils.config_utils import BaseConfig
 
-from .openai_gpt import CacheOpenAI
 from .base import BaseLLM
-from .bedrock_llm import BedrockLLM
-from .transformers_llm import TransformersLLM
 
 
 logger = get_logger(__name__)
 
 
+# Backends are imported on first use so that importing hipporag does not pull in litellm / transformers
+_LLM_CLASSES = {
+    "CacheOpenAI": ".openai_gpt",
+    "BedrockLLM": ".bedrock_llm",
+    "TransformersLLM": ".transformers_llm",
+}
+
+
+def __getattr__(name: str):
+    if name in _LLM_CLASSES:
+        return getattr(importlib.import_module(_LLM_CLASSES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def _get_llm_class(config: BaseConfig):
     if config.llm_base_url is not None and 'localhost' in config.llm_base_url and os.getenv('OPENAI_API_KEY') is None:
         os.environ['OPENAI_API_KEY'] = 'sk-'
 
     if config.llm_name.startswith('bedrock'):
-        return BedrockLLM(config)
+        return __getattr__("BedrockLLM")(config)
     
     if config.llm_name.startswith('Transformers/'):
-        return TransformersLLM(config)
+        return __getattr__("TransformersLLM")(config)
+    
+    return __getattr__("CacheOpenAI").from_experiment_config(config)
     
-    return CacheOpenAI.from_experiment_config(config)
-    
\ No newline at end of file
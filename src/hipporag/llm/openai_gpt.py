@@ -188,9 +188,11 @@ class CacheOpenAI(BaseLLM):
         response_message = response.choices[0].message.content
         assert isinstance(response_message, str), "response_message should be a string"
         
+        prompt_tokens_details = getattr(response.usage, "prompt_tokens_details", None)
         metadata = {
             "prompt_tokens": response.usage.prompt_tokens, 
             "completion_tokens": response.usage.completion_tokens,
+            "cached_prompt_tokens": getattr(prompt_tokens_details, "cached_tokens", None) or 0, # prompt prefix reused by the server
             "finish_reason": response.choices[0].finish_reason,
         }
 
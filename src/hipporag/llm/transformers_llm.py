@@ -7,7 +7,7 @@ import time
 import hashlib
 import torch
 
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, DynamicCache
 from filelock import FileLock
 
 from .base import BaseLLM, LLMConfig
@@ -94,6 +94,9 @@ class TransformersLLM(BaseLLM):
         self.tokenizer = AutoTokenizer.from_pretrained(self.global_config.llm_name)
 
         self.retry = 5
+
+        # (prefix input ids, KV cache) of a prompt prefix shared by many calls, see `register_prompt_prefix`
+        self._prompt_prefix = None
         
         logger.info(f"[TransformersLLM] Model-ID: {self.global_config.llm_name}, Cache: {self.cache.cache_filepath}")
 
@@ -108,9 +111,36 @@ class TransformersLLM(BaseLLM):
         self.llm_config = LLMConfig.from_dict(config_dict=config_dict)
         logger.info(f"[TransformersLLM] Config: {self.llm_config}")
 
+    def register_prompt_prefix(self, prefix_messages: List[TextChatMessage]) -> None:
+        """
+        Precomputes the KV cache of a chat prefix shared by many prompts (e.g. a system prompt followed by few-shot
+        demos). Later calls whose prompt starts with exactly these tokens only run the model over the remainder.
+        """
+        prefix_text = self.tokenizer.apply_chat_template(conversation=prefix_messages, tokenize=False, add_generation_prompt=False)
+        prefix_ids = self.tokenizer.encode(prefix_text, return_tensors="pt").to(self.model.device)
+        prefix_cache = DynamicCache()
+        with torch.no_grad():
+            self.model(prefix_ids, past_key_values=prefix_cache, use_cache=True)
+        self._prompt_prefix = (prefix_ids, prefix_cache)
+        logger.info(f"[TransformersLLM] Cached KV for a {prefix_ids.shape[1]} token prompt prefix")
+
+    def _matching_prefix_len(self, input_ids) -> int:
+        """Length of the registered prefix if `input_ids` (1 x seq_len) starts with it, else 0."""
+        if self._prompt_prefix is None:
+            return 0
+        prefix_ids = self._prompt_prefix[0]
+        prefix_len = prefix_ids.shape[1]
+        if input_ids.shape[1] <= prefix_len or not torch.equal(input_ids[0, :prefix_len].to(prefix_ids.device), prefix_ids[0]):
+            return 0
+        return prefix_len
+
     def __llm_call(self, params):
         inputs = params["prompt_text"].to(self.model.device)
-        response = self.model.generate(inputs, max_new_tokens=params.get("max_tokens", 200))
+        generate_kwargs = {}
+        if params.get("cached_prompt_tokens", 0) > 0:
+            # generate() skips the positions already covered by the cache; copy it so the prefix stays reusable
+            generate_kwargs["past_key_values"] = deepcopy(self._prompt_prefix[1])
+        response = self.model.generate(inputs, max_new_tokens=params.get("max_tokens", 200), **generate_kwargs)
         return response
     
     def infer(self, messages: List[TextChatMessage], **kwargs) -> Tuple[List[TextChatMessage], dict]:
@@ -120,6 +150,7 @@ class TransformersLLM(BaseLLM):
         params["model"] = self.global_config.llm_name
         params["messages"] = messages
         params["prompt_text"] = convert_text_chat_messages_to_input_ids(messages, self.tokenizer)
+        params["cached_prompt_tokens"] = self._matching_prefix_len(params["prompt_text"])
         
         cache_lookup = self.cache.read(params)
         if cache_lookup is not None:
@@ -128,11 +159,83 @@ class TransformersLLM(BaseLLM):
         else:
             cached = False
             response = self.__llm_call(params)
-            message = self.tokenizer.decode(response[0], skip_special_tokens=True)
+            # Only the generated text is returned and cached, as in `batch_infer`, which shares the cache keys
+            prompt_len = params["prompt_text"].shape[1]
+            message = self.tokenizer.decode(response[0][prompt_len:], skip_special_tokens=True)
             metadata = {
-                "prompt_tokens": params["prompt_text"].shape[1], 
-                "completion_tokens": response.shape[1],
+                "prompt_tokens": prompt_len, 
+                "completion_tokens": response.shape[1] - prompt_len,
+                "cached_prompt_tokens": params["cached_prompt_tokens"],
             }
             self.cache.write(params, message, metadata)
 
         return message, metadata, cached
+
+    def batch_infer(self, batch_messages: List[List[TextChatMessage]], **kwargs) -> Tuple[List[str], List[dict]]:
+        """
+        Runs inference for many chats with one padded `generate` call over all cache misses.
+
+        Returns:
+            Tuple[List[str], List[dict]]: response messages and per-chat metadata (including `cache_hit`), in input order.
+        """
+        all_params = []
+        all_messages, all_metadata = [None] * len(batch_messages), [None] * len(batch_messages)
+        missed = []
+        for i, messages in enumerate(batch_messages):
+            params = deepcopy(self.llm_config.generate_params)
+            if kwargs:
+                params.update(kwargs)
+            params["model"] = self.global_config.llm_name
+            params["messages"] = messages
+            all_params.append(params)
+
+            cache_lookup = self.cache.read(params)
+            if cache_lookup is not None:
+                all_messages[i], all_metadata[i] = cache_lookup
+                all_metadata[i]['cache_hit'] = True
+            else:
+                missed.append(i)
+
+        if missed:
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            all_input_ids = [convert_text_chat_messages_to_input_ids(batch_messages[i], self.tokenizer)[0] for i in missed]
+            prefix_len = min(self._matching_prefix_len(input_ids[None, :]) for input_ids in all_input_ids)
+
+            # Rows are padded between the shared prefix and their own suffix so the prefix KV cache lines up for
+            # every row (position ids follow the attention mask, so padding does not shift positions).
+            max_len = max(len(input_ids) for input_ids in all_input_ids)
+            padded_ids, attention_mask = [], []
+            for input_ids in all_input_ids:
+                num_pad = max_len - len(input_ids)
+                padded_ids.append(torch.cat([input_ids[:prefix_len],
+                                             torch.full((num_pad,), self.tokenizer.pad_token_id, dtype=input_ids.dtype),
+                                             input_ids[prefix_len:]]))
+                attention_mask.append(torch.cat([torch.ones(prefix_len, dtype=torch.long),
+                                                 torch.zeros(num_pad, dtype=torch.long),
+                                                 torch.ones(len(input_ids) - prefix_len, dtype=torch.long)]))
+            padded_ids = torch.stack(padded_ids).to(self.model.device)
+            attention_mask = torch.stack(attention_mask).to(self.model.device)
+
+            generate_kwargs = {}
+            if prefix_len > 0:
+                prefix_cache = deepcopy(self._prompt_prefix[1])
+                prefix_cache.batch_repeat_interleave(len(missed))
+                generate_kwargs["past_key_values"] = prefix_cache
+            with torch.no_grad():
+                response = self.model.generate(padded_ids, attention_mask=attention_mask,
+                                               max_new_tokens=kwargs.get("max_tokens", 200),
+                                               pad_token_id=self.tokenizer.pad_token_id, **generate_kwargs)
+
+            for row, i in enumerate(missed):
+                generated = response[row][max_len:]
+                message = self.tokenizer.decode(generated, skip_special_tokens=True)
+                metadata = {
+                    "prompt_tokens": len(all_input_ids[row]),
+                    "completion_tokens": int((generated != self.tokenizer.pad_token_id).sum()),
+                    "cached_prompt_tokens": prefix_len,
+                }
+                self.cache.write(all_params[i], message, metadata)
+                all_messages[i], all_metadata[i] = message, dict(metadata, cache_hit=False)
+
+        return all_messages, all_metadata
@@ -71,7 +71,8 @@ class VLLMOffline:
         completion_tokens = len(vllm_output[0].outputs[0].token_ids )
         metadata = {
             "prompt_tokens": prompt_tokens,
-            "completion_tokens": completion_tokens
+            "completion_tokens": completion_tokens,
+            "cached_prompt_tokens": getattr(vllm_output[0], 'num_cached_tokens', None) or 0, # reused through enable_prefix_caching
         }
         return response, metadata
 
@@ -96,6 +97,7 @@ class VLLMOffline:
         metadata = {
             "prompt_tokens": sum(all_prompt_tokens),
             "completion_tokens": sum(all_completion_tokens),
+            "cached_prompt_tokens": sum(getattr(completion, 'num_cached_tokens', None) or 0 for completion in vllm_output),
             "num_request": len(messages_list)
         }
         return all_responses, metadata
@@ -2,16 +2,32 @@ import json
 import difflib
 from pydantic import BaseModel, Field, TypeAdapter
 from openai import OpenAI
-from copy import deepcopy
 from typing import Union, Optional, List, Dict, Any, Tuple, Literal
 import re
 import ast
+import time
+import threading
 from .prompts.filter_default_prompt import best_dspy_prompt
+from .llm.base import BaseLLM
 
 class Fact(BaseModel):
     fact: list[list[str]] = Field(description="A list of facts, each fact is a list of 3 strings: [subject, predicate, object]")
 
 
+def normalize_fact(fact) -> Tuple[str, ...]:
+    """Case and whitespace insensitive key of a (subject, predicate, object) fact."""
+    return tuple(" ".join(str(element).lower().split()) for element in fact)
+
+
+def has_native_batch_infer(llm_model) -> bool:
+    """
+    Returns True if the given LLM implements its own `batch_infer` (e.g. local vLLM or Transformers backends),
+    in which case many prompts are better served by a single batched call than by concurrent `infer` calls.
+    """
+    batch_infer = getattr(type(llm_model), 'batch_infer', None)
+    return callable(batch_infer) and batch_infer is not BaseLLM.batch_infer
+
+
 class DSPyFilter:
     def __init__(self, hipporag):
         """
@@ -24,7 +40,8 @@ class DSPyFilter:
         dspy_file_path : The file path for reranking as specified in the global configuration.
         one_input_template : A string template for formatting the input message with placeholders for specific fields.
         one_output_template : A string template for formatting the output message with specific fields.
-        message_template : A template generated using the specified dspy file path.
+        message_template : A template generated using the specified dspy file path. It is the static prompt prefix
+            (system prompt plus few-shot demos) shared by every rerank call and is never mutated.
         llm_infer_fn : A function reference for making inferences using the provided LLM model.
         model_name : The name of the language model as specified in the global configuration.
         default_gen_kwargs : A dictionary for storing the default generation keyword arguments.
@@ -32,10 +49,16 @@ class DSPyFilter:
         dspy_file_path = hipporag.global_config.rerank_dspy_file_path
         self.one_input_template = """[[ ## question ## ]]\n{question}\n\n[[ ## fact_before_filter ## ]]\n{fact_before_filter}\n\nRespond with the corresponding output fields, starting with the field `[[ ## fact_after_filter ## ]]` (must be formatted as a valid Python Fact), and then ending with the marker for `[[ ## completed ## ]]`."""
         self.one_output_template = """[[ ## fact_after_filter ## ]]\n{fact_after_filter}\n\n[[ ## completed ## ]]"""
-        self.message_template = self.make_template(dspy_file_path)
+        self.message_template = tuple(self.make_template(dspy_file_path))
+        self.llm_model = hipporag.llm_model
         self.llm_infer_fn = hipporag.llm_model.infer
         self.model_name = hipporag.global_config.llm_name
-        self.default_gen_kwargs = {}
+        self.default_gen_kwargs = {'max_completion_tokens': 512}
+
+        self._prefix_registered = False
+        self._prefix_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.rerank_stats = {'num_calls': 0, 'prompt_tokens': 0, 'cached_prompt_tokens': 0, 'latency': 0.0}
 
     def make_template(self, dspy_file_path):
         if dspy_file_path is not None:
@@ -84,13 +107,52 @@ class DSPyFilter:
 
         return parsed
 
-    def llm_call(self, question, fact_before_filter):
-        # make prompt
-        messages = deepcopy(self.message_template)
-        messages.append({"role": "user", "content": self.one_input_template.format(question=question, fact_before_filter=fact_before_filter)})
-        # call openai
+    def build_messages(self, question, fact_before_filter):
+        # the few-shot prefix is shared (not copied) across calls, only the final user turn is new
+        return [*self.message_template,
+                {"role": "user", "content": self.one_input_template.format(question=question, fact_before_filter=fact_before_filter)}]
+
+    def register_prompt_prefix(self):
+        """
+        Lets backends that can reuse prefix computation (e.g. the Transformers backend's KV cache) precompute the
+        static few-shot prefix once. Backends without such support (OpenAI-compatible servers, where vLLM's
+        `enable_prefix_caching` handles this server-side) are left untouched.
+        """
+        if self._prefix_registered:
+            return
+        with self._prefix_lock:
+            if not self._prefix_registered:
+                if hasattr(self.llm_model, 'register_prompt_prefix'):
+                    self.llm_model.register_prompt_prefix(list(self.message_template))
+                self._prefix_registered = True
 
-        self.default_gen_kwargs['max_completion_tokens'] = 512
+    def record_call(self, latency, metadata, num_calls=1):
+        prompt_tokens = metadata.get('prompt_tokens', 0) or 0
+        cached_prompt_tokens = metadata.get('cached_prompt_tokens', 0) or 0
+        with self._stats_lock:
+            self.rerank_stats['num_calls'] += num_calls
+            self.rerank_stats['prompt_tokens'] += prompt_tokens
+            self.rerank_stats['cached_prompt_tokens'] += cached_prompt_tokens
+            self.rerank_stats['latency'] += latency
+        # per rerank figures; a batched call is amortised over its queries
+        return {'latency': latency / num_calls,
+                'prompt_tokens': prompt_tokens // num_calls,
+                'cached_prompt_tokens': cached_prompt_tokens // num_calls}
+
+    def get_rerank_stats(self) -> dict:
+        """
+        Returns aggregate prompt-prefix reuse statistics over all rerank LLM calls so far: number of calls, prompt
+        tokens sent, prompt tokens whose computation the backend reported as reused, and average latency per call.
+        """
+        with self._stats_lock:
+            stats = dict(self.rerank_stats)
+        stats['avg_latency'] = stats['latency'] / stats['num_calls'] if stats['num_calls'] > 0 else 0.0
+        stats['cached_prompt_token_ratio'] = stats['cached_prompt_tokens'] / stats['prompt_tokens'] if stats['prompt_tokens'] > 0 else 0.0
+        return stats
+
+    def llm_call(self, question, fact_before_filter):
+        self.register_prompt_prefix()
+        messages = self.build_messages(question, fact_before_filter)
 
         response = self.llm_infer_fn(
             messages=messages,
@@ -98,34 +160,228 @@ class DSPyFilter:
             **self.default_gen_kwargs
         )
 
-        if len(response) > 1:
-            return response[0]
-        return response
+        if isinstance(response, tuple) and len(response) > 1:
+            return response[0], response[1]
+        return response, {}
 
     def __call__(self, *args, **kwargs):
         return self.rerank(*args, **kwargs)
 
+    @property
+    def supports_batch_rerank(self) -> bool:
+        return has_native_batch_infer(self.llm_model)
+
     def rerank(self,
                query: str,
                candidate_items: List[Tuple],
                candidate_indices: List[int],
                len_after_rerank: int =None) -> Tuple[List[int], List[Tuple], dict]:
         fact_before_filter = {"fact": [list(candidate_item) for candidate_item in candidate_items]}
+        call_log = {}
         try:
             # prediction = self.program(question=query, fact_before_filter=json.dumps(fact_before_filter))
-            response = self.llm_call(query, json.dumps(fact_before_filter))
+            start = time.time()
+            response, metadata = self.llm_call(query, json.dumps(fact_before_filter))
+            call_log = self.record_call(time.time() - start, metadata)
             generated_facts = self.parse_filter(response)
         except Exception as e:
             print('exception', e)
             generated_facts = []
-        result_indices = []
-        for generated_fact in generated_facts:
-            closest_matched_fact = difflib.get_close_matches(str(generated_fact), [str(i) for i in candidate_items], n=1, cutoff=0.0)[0]
+        sorted_candidate_indices, sorted_candidate_items, rerank_dict = self.match_generated_facts(generated_facts, candidate_items, candidate_indices, len_after_rerank)
+        rerank_dict.update(call_log)
+        return sorted_candidate_indices, sorted_candidate_items, rerank_dict
+
+    def batch_rerank(self,
+                     queries: List[str],
+                     candidate_items_list: List[List[Tuple]],
+                     candidate_indices_list: List[List[int]],
+                     len_after_rerank: int = None) -> List[Tuple[List[int], List[Tuple], dict]]:
+        """
+        Reranks the candidate facts of several queries with a single `batch_infer` call to the LLM.
+        Only meaningful for backends with native batch inference (see `supports_batch_rerank`).
+
+        Returns:
+            List[Tuple[List[int], List[Tuple], dict]]: one `rerank` result per query, in input order.
+        """
+        self.register_prompt_prefix()
+        all_messages = []
+        for query, candidate_items in zip(queries, candidate_items_list):
+            fact_before_filter = {"fact": [list(candidate_item) for candidate_item in candidate_items]}
+            all_messages.append(self.build_messages(query, json.dumps(fact_before_filter)))
+
+        call_log = {}
+        try:
+            start = time.time()
+            responses, metadata = self.llm_model.batch_infer(all_messages, max_tokens=self.default_gen_kwargs['max_completion_tokens'])
+            # per-call metadata is a list for Transformers, a batch total for vLLM offline
+            if isinstance(metadata, list):
+                metadata = {k: sum(m.get(k, 0) or 0 for m in metadata) for k in ('prompt_tokens', 'cached_prompt_tokens')}
+            call_log = self.record_call(time.time() - start, metadata, num_calls=len(all_messages))
+        except Exception as e:
+            print('exception', e)
+            responses = [''] * len(all_messages)
+
+        results = []
+        for response, candidate_items, candidate_indices in zip(responses, candidate_items_list, candidate_indices_list):
             try:
-                result_indices.append(candidate_items.index(eval(closest_matched_fact)))
+                generated_facts = self.parse_filter(response)
             except Exception as e:
-                print('result_indices exception', e)
+                print('exception', e)
+                generated_facts = []
+            sorted_candidate_indices, sorted_candidate_items, rerank_dict = self.match_generated_facts(generated_facts, candidate_items, candidate_indices, len_after_rerank)
+            rerank_dict.update(call_log)
+            results.append((sorted_candidate_indices, sorted_candidate_items, rerank_dict))
+        return results
+
+    def match_generated_facts(self,
+                              generated_facts: List[List[str]],
+                              candidate_items: List[Tuple],
+                              candidate_indices: List[int],
+                              len_after_rerank: int = None) -> Tuple[List[int], List[Tuple], dict]:
+        result_indices = []
+        if len(generated_facts) > 0:
+            normalized_to_idx = {}
+            for idx, candidate_item in enumerate(candidate_items):
+                normalized_to_idx.setdefault(normalize_fact(candidate_item), idx)
+            candidate_strs = None
+            for generated_fact in generated_facts:
+                # exact (normalized) match first, fuzzy matching only for facts the LLM paraphrased
+                idx = normalized_to_idx.get(normalize_fact(generated_fact))
+                if idx is None:
+                    if candidate_strs is None:
+                        candidate_strs = {}
+                        for i, candidate_item in enumerate(candidate_items):
+                            candidate_strs.setdefault(str(candidate_item), i)
+                    closest_matched_fact = difflib.get_close_matches(str(tuple(generated_fact)), list(candidate_strs.keys()), n=1, cutoff=0.0)
+                    if len(closest_matched_fact) == 0:
+                        print('result_indices exception', f'no candidate matches {generated_fact}')
+                        continue
+                    idx = candidate_strs[closest_matched_fact[0]]
+                result_indices.append(idx)
 
         sorted_candidate_indices = [candidate_indices[i] for i in result_indices]
         sorted_candidate_items = [candidate_items[i] for i in result_indices]
-        return sorted_candidate_indices[:len_after_rerank], sorted_candidate_items[:len_after_rerank], {'confidence': None}
\ No newline at end of file
+        return sorted_candidate_indices[:len_after_rerank], sorted_candidate_items[:len_after_rerank], {'confidence': None}
+
+
+
+class CrossEncoderFilter:
+    def __init__(self, hipporag):
+        """
+        Recognition memory filter that scores (query, fact) pairs with a local cross-encoder instead of an LLM call.
+        Returns the same (candidate indices, candidate facts, log) contract as `DSPyFilter`.
+
+        Parameters:
+        hipporag : An object that provides the global configuration.
+        """
+        from sentence_transformers import CrossEncoder
+
+        global_config = hipporag.global_config
+        self.model_name = global_config.rerank_cross_encoder_name
+        self.batch_size = global_config.rerank_cross_encoder_batch_size
+        self.threshold = global_config.rerank_cross_encoder_threshold
+        self.model = CrossEncoder(self.model_name)
+
+        self._stats_lock = threading.Lock()
+        self.rerank_stats = {'num_calls': 0, 'prompt_tokens': 0, 'cached_prompt_tokens': 0, 'latency': 0.0}
+
+    def __call__(self, *args, **kwargs):
+        return self.rerank(*args, **kwargs)
+
+    @property
+    def supports_batch_rerank(self) -> bool:
+        return True
+
+    def get_rerank_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.rerank_stats)
+        stats['avg_latency'] = stats['latency'] / stats['num_calls'] if stats['num_calls'] > 0 else 0.0
+        stats['cached_prompt_token_ratio'] = 0.0
+        return stats
+
+    def rerank(self,
+               query: str,
+               candidate_items: List[Tuple],
+               candidate_indices: List[int],
+               len_after_rerank: int = None) -> Tuple[List[int], List[Tuple], dict]:
+        return self.batch_rerank([query], [candidate_items], [candidate_indices], len_after_rerank)[0]
+
+    def batch_rerank(self,
+                     queries: List[str],
+                     candidate_items_list: List[List[Tuple]],
+                     candidate_indices_list: List[List[int]],
+                     len_after_rerank: int = None) -> List[Tuple[List[int], List[Tuple], dict]]:
+        """
+        Scores the candidate facts of all queries in one batched cross-encoder pass.
+        """
+        pairs = [(query, " ".join(str(element) for element in candidate_item))
+                 for query, candidate_items in zip(queries, candidate_items_list)
+                 for candidate_item in candidate_items]
+
+        start = time.time()
+        scores = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False) if pairs else []
+        latency = time.time() - start
+        with self._stats_lock:
+            self.rerank_stats['num_calls'] += len(queries)
+            self.rerank_stats['latency'] += latency
+
+        results = []
+        offset = 0
+        for candidate_items, candidate_indices in zip(candidate_items_list, candidate_indices_list):
+            item_scores = [float(score) for score in scores[offset:offset + len(candidate_items)]]
+            offset += len(candidate_items)
+
+            order = sorted(range(len(candidate_items)), key=lambda i: item_scores[i], reverse=True)
+            if self.threshold is not None:
+                order = [i for i in order if item_scores[i] >= self.threshold]
+            order = order[:len_after_rerank]
+
+            results.append(([candidate_indices[i] for i in order],
+                            [candidate_items[i] for i in order],
+                            {'confidence': [item_scores[i] for i in order], 'latency': latency / max(len(queries), 1)}))
+        return results
+
+
+class EmbeddingFilter:
+    def __init__(self, hipporag):
+        """
+        Recognition memory filter that trusts the query-fact embedding similarity: the candidate facts (already
+        sorted by similarity) are kept as they are, so no model is called at all.
+        """
+        self.rerank_stats = {'num_calls': 0, 'prompt_tokens': 0, 'cached_prompt_tokens': 0, 'latency': 0.0}
+
+    def __call__(self, *args, **kwargs):
+        return self.rerank(*args, **kwargs)
+
+    @property
+    def supports_batch_rerank(self) -> bool:
+        return True
+
+    def get_rerank_stats(self) -> dict:
+        return dict(self.rerank_stats, avg_latency=0.0, cached_prompt_token_ratio=0.0)
+
+    def rerank(self,
+               query: str,
+               candidate_items: List[Tuple],
+               candidate_indices: List[int],
+               len_after_rerank: int = None) -> Tuple[List[int], List[Tuple], dict]:
+        return list(candidate_indices[:len_after_rerank]), list(candidate_items[:len_after_rerank]), {'confidence': None}
+
+    def batch_rerank(self,
+                     queries: List[str],
+                     candidate_items_list: List[List[Tuple]],
+                     candidate_indices_list: List[List[int]],
+                     len_after_rerank: int = None) -> List[Tuple[List[int], List[Tuple], dict]]:
+        return [self.rerank(query, candidate_items, candidate_indices, len_after_rerank)
+                for query, candidate_items, candidate_indices in zip(queries, candidate_items_list, candidate_indices_list)]
+
+
+def _get_rerank_filter(hipporag):
+    rerank_filter_name = hipporag.global_config.rerank_filter_name
+    if rerank_filter_name == "dspy":
+        return DSPyFilter(hipporag)
+    elif rerank_filter_name == "cross_encoder":
+        return CrossEncoderFilter(hipporag)
+    elif rerank_filter_name == "embedding":
+        return EmbeddingFilter(hipporag)
+    assert False, f"Unknown rerank filter name: {rerank_filter_name}"
@@ -76,6 +76,30 @@ class BaseConfig:
         default=None,
         metadata={"help": "Path to the rerank dspy file."}
     )
+    rerank_filter_name: Literal["dspy", "cross_encoder", "embedding"] = field(
+        default="dspy",
+        metadata={"help": "Recognition memory fact filter. 'dspy' asks the LLM to filter the candidate facts, 'cross_encoder' scores (query, fact) pairs locally with a cross-encoder, 'embedding' keeps the candidate facts in query-fact embedding similarity order without any extra model call."}
+    )
+    rerank_cross_encoder_name: str = field(
+        default="cross-encoder/ms-marco-MiniLM-L-6-v2",
+        metadata={"help": "Cross-encoder model used when rerank_filter_name is 'cross_encoder'."}
+    )
+    rerank_cross_encoder_batch_size: int = field(
+        default=64,
+        metadata={"help": "Batch size of (query, fact) pairs scored by the cross-encoder."}
+    )
+    rerank_cross_encoder_threshold: Optional[float] = field(
+        default=None,
+        metadata={"help": "If set, the cross-encoder filter drops facts scoring below this threshold. If None, all candidate facts are kept in cross-encoder score order."}
+    )
+    read_only: bool = field(
+        default=False,
+        metadata={"help": "If set to True, HippoRAG loads an existing index for retrieval/QA only: nothing is written to disk, write operations raise an error, and the LLM is only created if reranking or QA needs it."}
+    )
+    delete_compaction_ratio: float = field(
+        default=0.2,
+        metadata={"help": "Deleted documents are kept as tombstones in the embedding stores and the graph until they make up more than this fraction of the rows / vertices, at which point the store or graph is compacted."}
+    )
     passage_node_weight: float = field(
         default=0.05,
         metadata={"help": "Multiplicative factor that modified the passage node weights in PPR."}
@@ -141,6 +165,38 @@ class BaseConfig:
         default="auto",
         metadata={"help": "Data type for local embedding model."}
     )
+    embedding_cache: bool = field(
+        default=False,
+        metadata={"help": "If set to True, every embedding model caches batch_encode results in save_dir/embedding_cache/<model>.sqlite, so re-encoding the same texts (e.g. re-indexing a corpus) skips the model."}
+    )
+    embedding_cache_dtype: Literal["float32", "float16"] = field(
+        default="float32",
+        metadata={"help": "Storage dtype of the embedding cache. float16 halves its size; embeddings are returned as float32 either way."}
+    )
+    embedding_num_workers: int = field(
+        default=0,
+        metadata={"help": "Number of worker processes (each with its own model copy) encoding batches in parallel on CPU-only machines, for Contriever and Transformers/ embedding models. 0 or 1 encodes in the main process. Ignored when a GPU is available."}
+    )
+    embedding_max_concurrent_requests: int = field(
+        default=8,
+        metadata={"help": "Max number of embedding requests in flight at once for remote embedding models (OpenAI-compatible and VLLM/ servers)."}
+    )
+    embedding_request_max_tokens: int = field(
+        default=8192,
+        metadata={"help": "Approximate token budget of one request to a remote embedding model; batches are split early to stay within it."}
+    )
+    embedding_max_batch_tokens: Optional[int] = field(
+        default=None,
+        metadata={"help": "Padded token budget (texts x longest text) of one length-sorted batch for local embedding models (NV-Embed-v2, Contriever, GritLM). If None, defaults to embedding_batch_size * embedding_max_seq_len, the worst case of a fixed-size batch."}
+    )
+    query_embedding_cache_size: int = field(
+        default=10000,
+        metadata={"help": "Max number of (query, instruction) embeddings kept in the LRU query embedding cache. Set to 0 to disable caching."}
+    )
+    query_embedding_cache_persist: bool = field(
+        default=False,
+        metadata={"help": "If set to True, the query embedding cache is saved to the working dir after each retrieval call and reloaded on startup."}
+    )
     
     
     
@@ -181,6 +237,72 @@ class BaseConfig:
         default=0.5,
         metadata={"help": "Damping factor for ppr algorithm."}
     )
+    ppr_subgraph_hops: Optional[int] = field(
+        default=None,
+        metadata={"help": "If set, PPR only runs on the subgraph induced by the nodes within this many hops of the seed phrase nodes and the top `ppr_subgraph_passage_seeds` dense retrieval passages; passages outside it are ranked after the others by their dense retrieval score. None runs PPR on the whole graph."}
+    )
+    ppr_subgraph_max_nodes: int = field(
+        default=20000,
+        metadata={"help": "Max number of nodes of the PPR subgraph (closest to the seeds first). Only used if `ppr_subgraph_hops` is set."}
+    )
+    ppr_subgraph_passage_seeds: int = field(
+        default=50,
+        metadata={"help": "Number of top dense retrieval passages that seed the PPR subgraph besides the phrase nodes. Only used if `ppr_subgraph_hops` is set."}
+    )
+    use_ppr_basis: bool = field(
+        default=False,
+        metadata={"help": "Compose the PPR of queries seeded with hub entities from the PPR basis vectors precomputed by `HippoRAG.precompute_ppr_basis` (if present for the loaded index version), running PPR only for the remaining seeds."}
+    )
+    ppr_basis_num_hubs: int = field(
+        default=1000,
+        metadata={"help": "Number of highest-degree entity nodes `HippoRAG.precompute_ppr_basis` stores PPR vectors for."}
+    )
+    ppr_basis_top_k: int = field(
+        default=2000,
+        metadata={"help": "Number of passage node scores kept per precomputed hub PPR vector."}
+    )
+    rerank_max_workers: int = field(
+        default=8,
+        metadata={"help": "Max number of recognition memory (fact reranking) LLM calls issued concurrently during batch retrieval. Ignored for LLM backends with native batch inference."}
+    )
+    profile_indexing: bool = field(
+        default=False,
+        metadata={"help": "If set to True, index, delete, update and upsert record wall time, items/sec, LLM tokens, cache hit rate and peak RSS per indexing phase and write a report to `<working_dir>/profiles`."}
+    )
+    profile_indexing_phase: Optional[str] = field(
+        default=None,
+        metadata={"help": "Indexing phase (e.g. 'openie_triples', 'synonymy_knn', see `INDEXING_PHASES`) to run under a code profiler when `profile_indexing` is set; its output is written next to the report."}
+    )
+    profile_indexing_backend: Literal["cprofile", "pyinstrument"] = field(
+        default="cprofile",
+        metadata={"help": "Code profiler for `profile_indexing_phase`: cProfile (a .prof file) or pyinstrument (an HTML report, requires the pyinstrument package)."}
+    )
+    retrieval_metrics_window_size: int = field(
+        default=10000,
+        metadata={"help": "Number of most recent per-query latency samples kept for each retrieval stage to compute the p50/p95/p99 of `HippoRAG.retrieval_metrics`."}
+    )
+
+    # Sharding specific attributes (ShardedHippoRAG)
+    num_shards: int = field(
+        default=4,
+        metadata={"help": "Number of index shards (one process each) passages are partitioned across by ShardedHippoRAG."}
+    )
+    shard_start_method: Literal['spawn', 'fork', 'forkserver'] = field(
+        default='spawn',
+        metadata={"help": "multiprocessing start method of the shard processes."}
+    )
+    shard_passage_top_k: int = field(
+        default=100,
+        metadata={"help": "Number of dense retrieval candidate passages each shard returns per query. Their union seeds the PPR subgraph and backs the DPR fallback."}
+    )
+    shard_subgraph_hops: int = field(
+        default=2,
+        metadata={"help": "Each shard contributes the k-hop neighbourhood of the seed phrase and passage nodes to the union subgraph PPR runs on."}
+    )
+    shard_subgraph_max_nodes: int = field(
+        default=10000,
+        metadata={"help": "Max number of nodes each shard contributes to the union subgraph of a query."}
+    )
     
     
     # QA specific attributes
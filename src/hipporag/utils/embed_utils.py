@@ -1,7 +1,16 @@
-from typing import List
-import torch
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
 from tqdm import tqdm
 
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
 
 def retrieve_knn(query_ids: List[str], key_ids: List[str], query_vecs, key_vecs, k=2047, query_batch_size=1000,
                  key_batch_size=10000):
@@ -17,6 +26,8 @@ def retrieve_knn(query_ids: List[str], key_ids: List[str], query_vecs, key_vecs,
     Returns:
 
     """
+    import torch
+
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 
     if len(key_vecs) == 0: return {}
@@ -91,4 +102,112 @@ def retrieve_knn(query_ids: List[str], key_ids: List[str], query_vecs, key_vecs,
         torch.cuda.empty_cache()
     # end for each query batch
 
-    return results
\ No newline at end of file
+    return results
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded, thread-safe LRU cache of query embeddings keyed by (model, instruction, query text).
+
+    It lives on the HippoRAG instance rather than on the retrieval objects, so it survives re-indexing: query
+    embeddings do not depend on the corpus. If `persist_path` is given, `save()` writes the cache to disk and it is
+    reloaded on construction.
+
+    For models that ignore the instruction (`instruction_sensitive=False`), the instruction is dropped from the key
+    so one embedding serves every query instruction.
+    """
+
+    def __init__(self, model_name: str, max_size: int = 10000, persist_path: Optional[str] = None,
+                 instruction_sensitive: bool = True):
+        self.model_name = model_name
+        self.instruction_sensitive = instruction_sensitive
+        self.max_size = max_size
+        self.persist_path = persist_path
+
+        self._cache: "OrderedDict[Tuple[str, str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.persist_path is not None and os.path.exists(self.persist_path):
+            self.load()
+
+    def _key(self, text: str, instruction: str) -> Tuple[str, str, str]:
+        return self.model_name, (instruction or "") if self.instruction_sensitive else "", text
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, text: str, instruction: str = "", update_stats: bool = True) -> Optional[np.ndarray]:
+        """Returns the cached embedding (marking it most recently used) or None."""
+        key = self._key(text, instruction)
+        with self._lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+            if update_stats:
+                if embedding is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        return embedding
+
+    def put(self, text: str, instruction: str, embedding: np.ndarray) -> None:
+        if self.max_size <= 0:
+            return
+        key = self._key(text, instruction)
+        with self._lock:
+            self._cache[key] = embedding
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._dirty = True
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+            }
+
+    def save(self) -> None:
+        """Writes the cache to `persist_path` (in LRU order) if it changed since the last save or load."""
+        if self.persist_path is None or not self._dirty:
+            return
+        with self._lock:
+            keys = [json.dumps(key) for key in self._cache.keys()]
+            embeddings = list(self._cache.values())
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+        tmp_path = self.persist_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=np.array(keys, dtype=str),
+                     embeddings=np.stack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32))
+        os.replace(tmp_path, self.persist_path)
+        logger.info(f"Saved {len(keys)} query embeddings to {self.persist_path}")
+
+    def load(self) -> None:
+        data = np.load(self.persist_path, allow_pickle=False)
+        with self._lock:
+            self._cache.clear()
+            for key, embedding in zip(data["keys"], data["embeddings"]):
+                key = tuple(json.loads(str(key)))
+                if key[0] == self.model_name:
+                    self._cache[key] = embedding
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+            self._dirty = False
+        logger.info(f"Loaded {len(self._cache)} query embeddings from {self.persist_path}")
@@ -0,0 +1,222 @@
+import json
+import numbers
+import os
+from itertools import chain
+from typing import List, Optional, Sequence, Tuple
+
+import igraph as ig
+import numpy as np
+
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+GRAPH_SNAPSHOT_VERSION = 1
+GRAPH_SNAPSHOT_META = "meta.json"
+
+
+def _write_npy(path: str, array: np.ndarray) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array, allow_pickle=False)
+    os.replace(tmp_path, path)
+
+
+def _attribute_column(kind: str, attr: str, values: list) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Array of a vertex / edge attribute for the snapshot, and a validity mask if some values are None (stored as ""
+    or 0 in the array). Only str, bool and numeric values can be stored without pickling.
+    """
+    valid = np.array([value is not None for value in values], dtype=bool)
+    present = [value for value in values if value is not None]
+    if all(isinstance(value, str) for value in present) and present:
+        array = np.array([value if value is not None else "" for value in values], dtype=str)
+    elif all(isinstance(value, (numbers.Number, np.bool_)) for value in present):
+        array = np.asarray([value if value is not None else 0 for value in values])
+        if not present:
+            array = array.astype(np.float64)
+    else:
+        unsupported = sorted({type(value).__name__ for value in present
+                              if not isinstance(value, (str, numbers.Number, np.bool_))})
+        reason = f"values of type {', '.join(unsupported)}" if unsupported else "a mix of str and numeric values"
+        raise ValueError(f"Cannot save {kind} attribute '{attr}' in a graph snapshot: it holds {reason}, while only "
+                         f"str, bool and numeric values or None are supported.")
+    return array, (None if valid.all() else valid)
+
+
+def save_graph_snapshot(graph: ig.Graph, snapshot_dir: str, skip_vertex_attributes: Sequence[str] = ()) -> None:
+    """
+    Writes `graph` as a columnar snapshot:
+
+    - `edges.npy`: (#edges, 2) int32/int64 array of vertex indices,
+    - `edge_<attr>.npy`: one array per edge attribute (e.g. `weight`),
+    - `vertex_<attr>.npy`: one fixed-width string / numeric array per vertex attribute (e.g. `name`),
+    - `<edge|vertex>_<attr>.valid.npy`: validity mask of an attribute with None values,
+    - `meta.json`: counts, directedness and the attribute lists, written last so a snapshot is only picked up once
+      all of its arrays are in place.
+
+    Vertex attributes listed in `skip_vertex_attributes` (e.g. passage / entity text, which the embedding stores
+    already hold) are not written. Raises a ValueError, before anything is written, for attributes holding other
+    values than str, bool, numbers and None.
+    """
+    edge_attributes = graph.es.attributes()
+    vertex_attributes = [attr for attr in graph.vs.attributes() if attr not in skip_vertex_attributes]
+    columns = {f"edge_{attr}": _attribute_column("edge", attr, graph.es[attr]) for attr in edge_attributes}
+    columns.update({f"vertex_{attr}": _attribute_column("vertex", attr, graph.vs[attr]) for attr in vertex_attributes})
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    num_vertices = graph.vcount()
+    edge_dtype = np.int32 if num_vertices < np.iinfo(np.int32).max else np.int64
+    edges = np.array(graph.get_edgelist(), dtype=edge_dtype).reshape(-1, 2)
+    _write_npy(os.path.join(snapshot_dir, "edges.npy"), edges)
+
+    masked_attributes = []
+    for column, (array, valid) in columns.items():
+        _write_npy(os.path.join(snapshot_dir, f"{column}.npy"), array)
+        if valid is not None:
+            _write_npy(os.path.join(snapshot_dir, f"{column}.valid.npy"), valid)
+            masked_attributes.append(column)
+
+    meta = {
+        "version": GRAPH_SNAPSHOT_VERSION,
+        "directed": graph.is_directed(),
+        "num_vertices": num_vertices,
+        "num_edges": graph.ecount(),
+        "vertex_attributes": vertex_attributes,
+        "edge_attributes": edge_attributes,
+        "masked_attributes": masked_attributes,
+    }
+    meta_path = os.path.join(snapshot_dir, GRAPH_SNAPSHOT_META)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def load_graph_snapshot(snapshot_dir: str) -> Optional[ig.Graph]:
+    """
+    Loads a snapshot written by `save_graph_snapshot`, memory-mapping the arrays and building the igraph in one
+    bulk call. Returns None if there is no complete snapshot in `snapshot_dir`.
+    """
+    meta_path = os.path.join(snapshot_dir, GRAPH_SNAPSHOT_META)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get("version") != GRAPH_SNAPSHOT_VERSION:
+        logger.warning(f"Unsupported graph snapshot version {meta.get('version')} in {snapshot_dir}")
+        return None
+
+    edges = np.load(os.path.join(snapshot_dir, "edges.npy"), mmap_mode="r")
+    # A list of int pairs is igraph's fastest bulk input; passing the array (buffer) is ~2x slower
+    graph = ig.Graph(n=meta["num_vertices"], edges=list(zip(edges[:, 0].tolist(), edges[:, 1].tolist())),
+                     directed=meta["directed"])
+
+    masked_attributes = set(meta.get("masked_attributes", ()))
+
+    def load_column(column: str) -> list:
+        values = np.load(os.path.join(snapshot_dir, f"{column}.npy"), mmap_mode="r").tolist()
+        if column in masked_attributes:
+            valid = np.load(os.path.join(snapshot_dir, f"{column}.valid.npy"))
+            values = [value if is_valid else None for value, is_valid in zip(values, valid.tolist())]
+        return values
+
+    for attr in meta["vertex_attributes"]:
+        graph.vs[attr] = load_column(f"vertex_{attr}")
+    for attr in meta["edge_attributes"]:
+        graph.es[attr] = load_column(f"edge_{attr}")
+
+    return graph
+
+
+def migrate_graph_vertex_attributes(graph: ig.Graph) -> bool:
+    """
+    Brings a graph written by earlier versions to the current vertex layout in place: the `content` and `hash_id`
+    vertex attributes (copies of the embedding store rows) are dropped, the `is_passage` type flag is derived
+    from the `chunk-` name prefix if missing and all vertices are marked live if there is no `deleted` flag.
+
+    Returns:
+        bool: Whether the graph was changed.
+    """
+    vertex_attributes = graph.vs.attributes()
+    changed = False
+    for attr in ("content", "hash_id"):
+        if attr in vertex_attributes:
+            del graph.vs[attr]
+            changed = True
+    if "is_passage" not in vertex_attributes and "name" in vertex_attributes:
+        graph.vs["is_passage"] = [name.startswith("chunk-") for name in graph.vs["name"]]
+        changed = True
+    if "deleted" not in vertex_attributes and graph.vcount() > 0:
+        graph.vs["deleted"] = False
+        changed = True
+    return changed
+
+
+def neighbourhood_vertices(graph: ig.Graph, seeds: Sequence[int], hops: int, max_nodes: Optional[int] = None) -> List[int]:
+    """
+    Collects the live vertices within `hops` hops of `seeds` breadth-first, closest first. Once `max_nodes`
+    vertices are collected, farther vertices are left out (seeds are always kept).
+
+    Returns:
+        List[int]: Vertex indices, seeds first.
+    """
+    excluded = np.zeros(graph.vcount(), dtype=bool)
+    if "deleted" in graph.vs.attributes():
+        excluded[graph.vs.select(deleted=True).indices] = True
+
+    seeds = _unique_in_order(np.asarray(seeds, dtype=np.int64))
+    frontier = seeds[~excluded[seeds]]
+    excluded[frontier] = True
+    collected = [frontier]
+    num_collected = len(frontier)
+
+    for _ in range(hops):
+        if len(frontier) == 0 or (max_nodes is not None and num_collected >= max_nodes):
+            break
+        neighbours = np.fromiter(chain.from_iterable(graph.neighborhood(frontier.tolist(), order=1, mindist=1)), dtype=np.int64)
+        frontier = _unique_in_order(neighbours[~excluded[neighbours]])
+        if max_nodes is not None:
+            frontier = frontier[:max_nodes - num_collected]
+        excluded[frontier] = True
+        collected.append(frontier)
+        num_collected += len(frontier)
+
+    return np.concatenate(collected).tolist()
+
+
+def _unique_in_order(values: np.ndarray) -> np.ndarray:
+    _, first_idxs = np.unique(values, return_index=True)
+    return values[np.sort(first_idxs)]
+
+
+def subgraph_personalized_pagerank(graph: ig.Graph,
+                                   reset_prob: np.ndarray,
+                                   seeds: Sequence[int],
+                                   hops: int,
+                                   max_nodes: Optional[int] = None,
+                                   damping: float = 0.5) -> np.ndarray:
+    """
+    Personalized PageRank restricted to the subgraph induced by the `hops`-hop neighbourhood of `seeds` (at most
+    `max_nodes` vertices, see `neighbourhood_vertices`). Most of the PPR mass stays close to the seeds, so this
+    approximates full-graph PPR at a cost that depends on the neighbourhood size rather than the graph size.
+
+    Returns:
+        np.ndarray: PPR score of every vertex of `graph`; vertices outside the subgraph score 0.
+    """
+    vertices = sorted(neighbourhood_vertices(graph, seeds, hops, max_nodes=max_nodes))
+    scores = np.zeros(graph.vcount())
+    sub_reset = reset_prob[vertices]
+    if len(vertices) == 0 or sub_reset.sum() <= 0:
+        return scores
+
+    subgraph = graph.induced_subgraph(vertices)
+    scores[vertices] = subgraph.personalized_pagerank(
+        damping=damping,
+        directed=False,
+        weights='weight' if 'weight' in subgraph.es.attributes() else None,
+        reset=sub_reset,
+        implementation='prpack'
+    )
+    return scores
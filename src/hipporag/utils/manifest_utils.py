@@ -0,0 +1,157 @@
+import json
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, Optional, Set
+
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_FORMAT_VERSION = 1
+
+# Artifacts written by a commit carry its version, e.g. `vdb_chunk.v12.parquet` or the `graph/v12` snapshot directory
+_VERSIONED_NAME = re.compile(r"(^v\d+$)|(\.v\d+\.)")
+_VERSIONED_MANIFEST_NAME = re.compile(r"^manifest\.v\d+\.json$")
+
+
+def versioned_filename(filename: str, version: int) -> str:
+    """`dir/vdb_chunk.parquet` -> `dir/vdb_chunk.v<version>.parquet`."""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.v{version}{ext}"
+
+
+def atomic_write_json(path: str, obj: Any, fsync: bool = True) -> None:
+    """Writes `obj` as JSON to a temporary file and renames it over `path`, so readers never see a partial file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(obj, f)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def versioned_manifest_filename(version: int) -> str:
+    """Name of the retained copy of the manifest of index version `version`."""
+    return versioned_filename(MANIFEST_FILENAME, version)
+
+
+def load_manifest(working_dir: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Loads the manifest of the last committed index version in `working_dir`, or None for an index written before
+    manifests were introduced (or an empty working dir).
+
+    If `version` is given, the manifest of that version is loaded instead; only the last two committed versions
+    are retained, a ValueError is raised for any other version.
+    """
+    manifest_path = os.path.join(working_dir, MANIFEST_FILENAME)
+    if version is not None:
+        versioned_path = os.path.join(working_dir, versioned_manifest_filename(version))
+        if os.path.exists(versioned_path):
+            manifest_path = versioned_path
+        else:
+            manifest = load_manifest(working_dir)
+            if manifest is None or manifest["version"] != version:
+                raise ValueError(f"Index version {version} is not available in {working_dir}")
+            return manifest
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != MANIFEST_FORMAT_VERSION:
+        raise ValueError(f"Unsupported index manifest format {manifest.get('format_version')} in {manifest_path}")
+    return manifest
+
+
+def commit_manifest(working_dir: str, version: int, artifacts: Dict[str, Any],
+                    previous_manifest: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Commits an index version: all artifacts must already be written under new (versioned) names; the manifest
+    pointing to them is then written and atomically renamed into place, which is the commit point. A crash before
+    the rename leaves the previous version intact.
+
+    The previous version's artifacts are recorded as well, so `collect_garbage` keeps them for readers that
+    loaded the previous manifest and are still opening its files. A copy of the manifest is kept as
+    `manifest.v<version>.json`, so both retained versions can be opened by number (see `load_manifest`).
+
+    Parameters:
+        working_dir: Index working directory; artifact paths are relative to it.
+        version: Version being committed.
+        artifacts: Artifact name -> relative path (or dict of relative paths / None).
+        previous_manifest: Manifest of the version this one replaces, if any.
+
+    Returns:
+        Dict[str, Any]: The committed manifest.
+    """
+    manifest = {
+        "format_version": MANIFEST_FORMAT_VERSION,
+        "version": version,
+        "committed_at": time.time(),
+        "artifacts": artifacts,
+        "previous_version": previous_manifest["version"] if previous_manifest is not None else None,
+        "previous_artifacts": previous_manifest["artifacts"] if previous_manifest is not None else None,
+    }
+    atomic_write_json(os.path.join(working_dir, versioned_manifest_filename(version)), manifest)
+    atomic_write_json(os.path.join(working_dir, MANIFEST_FILENAME), manifest)
+
+    # Make the rename itself durable
+    dir_fd = os.open(working_dir, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+    logger.info(f"Committed index version {version} to {working_dir}")
+    return manifest
+
+
+def _referenced_paths(artifacts: Optional[Dict[str, Any]]) -> Set[str]:
+    if artifacts is None:
+        return set()
+    paths = set()
+    for value in artifacts.values():
+        if isinstance(value, dict):
+            paths.update(path for path in value.values() if path is not None)
+        elif value is not None:
+            paths.add(value)
+    return set(os.path.normpath(path) for path in paths)
+
+
+def collect_garbage(working_dir: str, manifest: Dict[str, Any]) -> None:
+    """
+    Removes versioned artifacts in the artifact directories of `working_dir` that neither the committed manifest
+    nor its predecessor references (older versions and leftovers of commits that crashed before the manifest
+    was renamed into place), as well as the retained manifest copies of those versions. Files written before
+    manifests were introduced are never touched.
+    """
+    referenced = _referenced_paths(manifest["artifacts"]) | _referenced_paths(manifest.get("previous_artifacts"))
+    artifact_dirs = set(os.path.dirname(path) for path in referenced)
+
+    for artifact_dir in artifact_dirs:
+        abs_dir = os.path.join(working_dir, artifact_dir)
+        if not os.path.isdir(abs_dir):
+            continue
+        for name in os.listdir(abs_dir):
+            rel_path = os.path.normpath(os.path.join(artifact_dir, name))
+            if rel_path in referenced or not _VERSIONED_NAME.search(name):
+                continue
+            abs_path = os.path.join(working_dir, rel_path)
+            logger.debug(f"Removing unreferenced index artifact {abs_path}")
+            if os.path.isdir(abs_path):
+                shutil.rmtree(abs_path, ignore_errors=True)
+            else:
+                os.remove(abs_path)
+
+    retained_manifests = {versioned_manifest_filename(manifest["version"])}
+    if manifest.get("previous_version") is not None:
+        retained_manifests.add(versioned_manifest_filename(manifest["previous_version"]))
+    for name in os.listdir(working_dir):
+        if _VERSIONED_MANIFEST_NAME.match(name) and name not in retained_manifests:
+            logger.debug(f"Removing index manifest {name}")
+            os.remove(os.path.join(working_dir, name))
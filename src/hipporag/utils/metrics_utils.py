@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+# Retrieval stages in pipeline order
+RETRIEVAL_STAGES = (
+    "query_encoding",
+    "fact_scoring",
+    "reranking",
+    "phrase_weighting",
+    "dpr",
+    "ppr",
+    "doc_materialization",
+)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class StageHistogram:
+    """
+    Latency samples of one stage: exact count and sum since the last reset, and the most recent `window_size`
+    samples for the quantiles.
+    """
+
+    def __init__(self, window_size: int):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.samples: Deque[float] = deque(maxlen=window_size)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        quantiles = np.quantile(np.fromiter(self.samples, dtype=np.float64), QUANTILES) if self.samples else [0.0] * len(QUANTILES)
+        summary = {"count": self.count,
+                   "sum": self.sum,
+                   "mean": self.sum / self.count if self.count else 0.0,
+                   "max": self.max}
+        summary.update({f"p{int(q * 100)}": float(value) for q, value in zip(QUANTILES, quantiles)})
+        return summary
+
+
+class RetrievalMetrics:
+    """
+    Thread-safe per-stage latency histograms of retrieval.
+
+    A retrieval wraps each query in `track_query()`, which collects the seconds spent in every stage of that query
+    into a dict (attached to its `QuerySolution` as `timings`) and adds them to the stage histograms when the query
+    is done, so each histogram holds one sample per query. `span(stage)` times a block and adds it to the timings of
+    the query tracked by the calling thread, or straight to the histogram outside of a tracked query. Stages that
+    run once for a batch of queries (e.g. query encoding) are recorded with `record(stage, seconds, timings)` for
+    every query of the batch, since each query waited for the whole batch.
+
+    `summary()` reports count, sum, mean, max and p50/p95/p99 per stage; `to_json()` and `to_prometheus()` export it.
+    """
+
+    def __init__(self, window_size: int = 10000, stages: Optional[List[str]] = None):
+        self.window_size = window_size
+        self.stages = list(stages or RETRIEVAL_STAGES)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._histograms: Dict[str, StageHistogram] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """Drops all recorded samples."""
+        with self._lock:
+            self._histograms = {stage: StageHistogram(self.window_size) for stage in self.stages}
+
+    def record(self, stage: str, seconds: float, timings: Optional[Dict[str, float]] = None) -> None:
+        """
+        Adds `seconds` spent in `stage` to `timings` (default: the timings of the query tracked by the calling thread)
+        or, if there is none, directly to the stage histogram. Time spent in the same stage several times for one
+        query is summed.
+        """
+        timings = timings if timings is not None else getattr(self._local, "timings", None)
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+        else:
+            self.add_query_timings({stage: seconds})
+
+    def add_query_timings(self, timings: Dict[str, float]) -> None:
+        """Adds the per-stage timings of a finished query to the stage histograms."""
+        with self._lock:
+            for stage, seconds in timings.items():
+                if stage not in self._histograms:
+                    self.stages.append(stage)
+                    self._histograms[stage] = StageHistogram(self.window_size)
+                self._histograms[stage].add(seconds)
+
+    @contextmanager
+    def span(self, stage: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """Times the enclosed block as `stage`, see `record`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, timings)
+
+    @contextmanager
+    def track_query(self, timings: Optional[Dict[str, float]] = None) -> Iterator[Dict[str, float]]:
+        """
+        Makes `timings` (default: a new dict) the per-query timings the spans of the calling thread are added to,
+        and adds them to the stage histograms at the end of the block.
+        """
+        timings = timings if timings is not None else {}
+        previous = getattr(self._local, "timings", None)
+        self._local.timings = timings
+        try:
+            yield timings
+        finally:
+            self._local.timings = previous
+            self.add_query_timings(timings)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count, sum, mean, max and p50/p95/p99 latency in seconds, for the stages seen at least once."""
+        with self._lock:
+            return {stage: self._histograms[stage].summary() for stage in self.stages if self._histograms[stage].count > 0}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps({"unit": "seconds", "stages": self.summary()}, indent=indent)
+
+    def to_prometheus(self, namespace: str = "hipporag") -> str:
+        """The histograms in the Prometheus text exposition format, as one summary metric labelled by stage."""
+        name = f"{namespace}_retrieval_stage_seconds"
+        lines = [f"# HELP {name} Latency of HippoRAG retrieval stages per query.",
+                 f"# TYPE {name} summary"]
+        for stage, summary in self.summary().items():
+            for q in QUANTILES:
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {summary[f"p{int(q * 100)}"]:.9g}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {summary["sum"]:.9g}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {summary["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def log_summary(self) -> None:
+        for stage, summary in self.summary().items():
+            logger.info(f"Retrieval stage {stage}: {summary['count']} samples, total {summary['sum']:.2f}s, "
+                        f"p50 {summary['p50'] * 1000:.1f}ms, p95 {summary['p95'] * 1000:.1f}ms, p99 {summary['p99'] * 1000:.1f}ms")
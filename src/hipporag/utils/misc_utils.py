@@ -39,6 +39,7 @@ class QuerySolution:
     answer: str = None
     gold_answers: List[str] = None
     gold_docs: Optional[List[str]] = None
+    timings: Optional[Dict[str, float]] = None
 
 
     def to_dict(self):
@@ -49,6 +50,7 @@ class QuerySolution:
             "docs": self.docs[:5],
             "doc_scores": [round(v, 4) for v in self.doc_scores.tolist()[:5]]  if self.doc_scores is not None else None,
             "gold_docs": self.gold_docs,
+            "timings": {stage: round(seconds, 6) for stage, seconds in self.timings.items()} if self.timings is not None else None,
         }
 
 def text_processing(text):
@@ -0,0 +1,97 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class PPRBasis:
+    """
+    Precomputed Personalized PageRank vectors of hub entity nodes, truncated to the `top_k` highest scoring passage
+    nodes and stored sparse (CSR rows, one per hub).
+
+    PPR is linear in the reset distribution, so the PPR of a query whose seeds include hubs is the reset-weighted
+    sum of the hubs' vectors plus the PPR of the remaining (residual) seeds, see `compose`.
+    """
+    version: Optional[int]
+    damping: float
+    num_vertices: int
+    hub_vertices: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    values: np.ndarray
+
+    @classmethod
+    def from_vectors(cls, version: Optional[int], damping: float, num_vertices: int, hub_vertices: np.ndarray,
+                     vectors, candidate_vertices: np.ndarray, top_k: int) -> "PPRBasis":
+        """Builds a basis from full PPR `vectors` (one per hub), keeping the `top_k` best `candidate_vertices` of each."""
+        indptr, indices, values = [0], [], []
+        for vector in vectors:
+            scores = np.asarray(vector)[candidate_vertices]
+            top = np.argsort(scores)[::-1][:top_k]
+            top = top[scores[top] > 0]
+            indices.append(candidate_vertices[top])
+            values.append(scores[top])
+            indptr.append(indptr[-1] + len(top))
+        return cls(version=version,
+                   damping=damping,
+                   num_vertices=num_vertices,
+                   hub_vertices=np.asarray(hub_vertices, dtype=np.int64),
+                   indptr=np.asarray(indptr, dtype=np.int64),
+                   indices=np.concatenate(indices).astype(np.int64) if indices else np.zeros(0, dtype=np.int64),
+                   values=np.concatenate(values).astype(np.float32) if values else np.zeros(0, dtype=np.float32))
+
+    def save(self, path: str) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f,
+                     version=np.array(-1 if self.version is None else self.version),
+                     damping=np.array(self.damping),
+                     num_vertices=np.array(self.num_vertices),
+                     hub_vertices=self.hub_vertices,
+                     indptr=self.indptr,
+                     indices=self.indices,
+                     values=self.values)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved PPR basis of {len(self.hub_vertices)} hubs ({len(self.values)} entries) to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PPRBasis"]:
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            return cls(version=None if version < 0 else version,
+                       damping=float(data["damping"]),
+                       num_vertices=int(data["num_vertices"]),
+                       hub_vertices=data["hub_vertices"],
+                       indptr=data["indptr"],
+                       indices=data["indices"],
+                       values=data["values"])
+
+    def split_reset(self, reset_prob: np.ndarray):
+        """
+        Splits a reset vector into the weights of its cached hub seeds (one per hub, mostly 0) and the residual
+        reset vector of all other seeds.
+        """
+        hub_weights = reset_prob[self.hub_vertices]
+        residual = reset_prob.copy()
+        residual[self.hub_vertices] = 0
+        return hub_weights, residual
+
+    def compose(self, hub_weights: np.ndarray, residual_scores: np.ndarray, residual_weight: float) -> np.ndarray:
+        """
+        Composes the PPR of `hub weights + residual reset` from the cached hub vectors and the (normalized) PPR
+        `residual_scores` of the residual reset, whose total weight is `residual_weight`.
+        """
+        total_weight = hub_weights.sum() + residual_weight
+        scores = residual_scores * (residual_weight / total_weight)
+        for hub_position in np.nonzero(hub_weights)[0]:
+            start, end = self.indptr[hub_position], self.indptr[hub_position + 1]
+            scores[self.indices[start:end]] += self.values[start:end] * (hub_weights[hub_position] / total_weight)
+        return scores
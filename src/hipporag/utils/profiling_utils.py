@@ -0,0 +1,281 @@
+import contextvars
+import cProfile
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+# Indexing phases in pipeline order
+INDEXING_PHASES = (
+    "delete",
+    "chunk_encoding",
+    "openie_ner",
+    "openie_triples",
+    "entity_encoding",
+    "fact_encoding",
+    "graph_build",
+    "synonymy_knn",
+    "persistence",
+)
+
+_active_profiler: contextvars.ContextVar = contextvars.ContextVar("active_indexing_profiler", default=None)
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, None where `/proc` is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def process_peak_rss() -> int:
+    """Peak resident set size of this process since it started, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PhaseStats:
+    """What one indexing phase took; a phase entered several times (e.g. per document batch) adds up."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_time = 0.0
+        self.num_calls = 0
+        self.num_items = 0
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hits = 0
+        self.cache_lookups = 0
+        self.peak_rss: Optional[int] = None
+        self.rss_delta = 0
+
+    def add_items(self, num_items: int) -> None:
+        self.num_items += num_items
+
+    def add_llm_usage(self, metadata: Dict[str, Any], num_calls: int = 1) -> None:
+        """
+        Adds the token counts of `num_calls` LLM calls (one call, or a batch with summed counts) from the metadata
+        the LLM classes return, and their cache hit if the LLM has a response cache.
+        """
+        self.llm_calls += num_calls
+        self.prompt_tokens += metadata.get("prompt_tokens", 0) or 0
+        self.completion_tokens += metadata.get("completion_tokens", 0) or 0
+        if "cache_hit" in metadata:
+            self.add_cache_lookups(hits=1 if metadata["cache_hit"] else 0, lookups=num_calls)
+
+    def add_cache_lookups(self, hits: int, lookups: int) -> None:
+        self.cache_hits += hits
+        self.cache_lookups += lookups
+
+    def to_dict(self) -> Dict[str, Any]:
+        mb = 1024 * 1024
+        return {
+            "wall_time_s": round(self.wall_time, 4),
+            "calls": self.num_calls,
+            "items": self.num_items,
+            "items_per_s": round(self.num_items / self.wall_time, 2) if self.wall_time > 0 else None,
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cache_hits": self.cache_hits,
+            "cache_lookups": self.cache_lookups,
+            "cache_hit_rate": round(self.cache_hits / self.cache_lookups, 4) if self.cache_lookups > 0 else None,
+            "peak_rss_mb": round(self.peak_rss / mb, 1) if self.peak_rss is not None else None,
+            "rss_delta_mb": round(self.rss_delta / mb, 1),
+        }
+
+
+class _NullPhase(PhaseStats):
+    """Phase handed out while no profiler is active; records nothing."""
+
+    def add_items(self, num_items: int) -> None:
+        pass
+
+    def add_llm_usage(self, metadata: Dict[str, Any], num_calls: int = 1) -> None:
+        pass
+
+    def add_cache_lookups(self, hits: int, lookups: int) -> None:
+        pass
+
+
+_NULL_PHASE = _NullPhase("null")
+
+
+class _RSSSampler(threading.Thread):
+    """Samples the RSS of the process every `interval` seconds to find the peak within a phase."""
+
+    def __init__(self, interval: float):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            rss = current_rss()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def stop(self) -> Optional[int]:
+        self._stop_event.set()
+        self.join()
+        rss = current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+        return self.peak
+
+
+class IndexingProfiler:
+    """
+    Per-phase wall time, throughput, LLM token usage, cache hit rate and peak RSS of an indexing run.
+
+    While `activate()` is in effect, code anywhere in the indexing pipeline reports through the module-level
+    `profile_phase(name)`, which is a no-op without an active profiler, so the profiled code paths take no
+    profiler argument. Phases are not nested. The phase named `profile_phase_name` additionally runs under
+    cProfile or pyinstrument (`profiler_backend`) and its output is written next to the report.
+    """
+
+    def __init__(self,
+                 report_dir: str,
+                 run_label: Optional[str] = None,
+                 profile_phase_name: Optional[str] = None,
+                 profiler_backend: str = "cprofile",
+                 rss_sample_interval: float = 0.05):
+        self.report_dir = report_dir
+        self.run_label = run_label
+        self.profile_phase_name = profile_phase_name
+        self.profiler_backend = profiler_backend
+        self.rss_sample_interval = rss_sample_interval
+        self.phases: Dict[str, PhaseStats] = {}
+        self.current_phase: Optional[PhaseStats] = None
+        self.profile_outputs: List[str] = []
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def activate(self) -> Iterator["IndexingProfiler"]:
+        token = _active_profiler.set(self)
+        try:
+            yield self
+        finally:
+            _active_profiler.reset(token)
+
+    @contextmanager
+    def phase(self, name: str, num_items: Optional[int] = None) -> Iterator[PhaseStats]:
+        stats = self.phases.setdefault(name, PhaseStats(name))
+        if num_items is not None:
+            stats.add_items(num_items)
+
+        sampler = _RSSSampler(self.rss_sample_interval)
+        sampler.start()
+        rss_start = sampler.peak
+        code_profiler = self._start_code_profiler() if name == self.profile_phase_name else None
+        self.current_phase = stats
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.wall_time += time.perf_counter() - start
+            self.current_phase = None
+            stats.num_calls += 1
+            if code_profiler is not None:
+                self._save_code_profile(name, code_profiler)
+            peak = sampler.stop()
+            if peak is not None:
+                stats.peak_rss = peak if stats.peak_rss is None else max(stats.peak_rss, peak)
+                stats.rss_delta += (current_rss() or peak) - (rss_start or peak)
+
+    def _start_code_profiler(self):
+        if self.profiler_backend == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError as e:
+                raise ImportError("profiler_backend='pyinstrument' requires the pyinstrument package.") from e
+            code_profiler = Profiler()
+            code_profiler.start()
+        elif self.profiler_backend == "cprofile":
+            code_profiler = cProfile.Profile()
+            code_profiler.enable()
+        else:
+            assert False, f"Unknown profiler backend {self.profiler_backend}"
+        return code_profiler
+
+    def _save_code_profile(self, name: str, code_profiler) -> None:
+        os.makedirs(self.report_dir, exist_ok=True)
+        stem = os.path.join(self.report_dir, f"{self._run_name()}.{name}.{len(self.profile_outputs)}")
+        if self.profiler_backend == "cprofile":
+            code_profiler.disable()
+            path = stem + ".prof"
+            code_profiler.dump_stats(path)
+        else:
+            code_profiler.stop()
+            path = stem + ".html"
+            with open(path, "w") as f:
+                f.write(code_profiler.output_html())
+        self.profile_outputs.append(path)
+        logger.info(f"Wrote {self.profiler_backend} profile of indexing phase {name} to {path}")
+
+    def _run_name(self) -> str:
+        run_name = "index_" + time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        return run_name + f"_{self.run_label}" if self.run_label else run_name
+
+    def report(self) -> Dict[str, Any]:
+        phases = sorted(self.phases.values(),
+                        key=lambda stats: INDEXING_PHASES.index(stats.name) if stats.name in INDEXING_PHASES else len(INDEXING_PHASES))
+        return {
+            "started_at": self.started_at,
+            "wall_time_s": round(time.perf_counter() - self._start, 4),
+            "process_peak_rss_mb": round(process_peak_rss() / (1024 * 1024), 1),
+            "phases": {stats.name: stats.to_dict() for stats in phases},
+            "profiles": self.profile_outputs,
+        }
+
+    def save_report(self, extra: Optional[Dict[str, Any]] = None) -> str:
+        """Writes the report as `<report_dir>/index_<timestamp>[_<run_label>].json` and returns its path."""
+        report = self.report()
+        report.update(extra or {})
+        os.makedirs(self.report_dir, exist_ok=True)
+        path = os.path.join(self.report_dir, f"{self._run_name()}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+        for name, stats in report["phases"].items():
+            logger.info(f"Indexing phase {name}: {stats['wall_time_s']:.2f}s, {stats['items']} items "
+                        f"({stats['items_per_s'] or 0:.1f}/s), {stats['prompt_tokens'] + stats['completion_tokens']} LLM tokens, "
+                        f"peak RSS {stats['peak_rss_mb']} MB")
+        logger.info(f"Wrote indexing profile to {path}")
+        return path
+
+
+@contextmanager
+def profile_phase(name: str, num_items: Optional[int] = None) -> Iterator[PhaseStats]:
+    """Records the enclosed block as indexing phase `name` of the active `IndexingProfiler`, if there is one."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield _NULL_PHASE
+    else:
+        with profiler.phase(name, num_items) as stats:
+            yield stats
+
+
+def current_phase() -> PhaseStats:
+    """
+    Stats of the phase the active `IndexingProfiler` is in, for code that reports items or cache lookups without
+    opening a phase itself (see `EmbeddingStore.insert_strings`); a stats object that records nothing otherwise.
+    """
+    profiler = _active_profiler.get()
+    if profiler is None or profiler.current_phase is None:
+        return _NULL_PHASE
+    return profiler.current_phase
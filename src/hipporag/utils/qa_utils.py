@@ -3,7 +3,7 @@ from typing import Dict, List, Union, Any, Optional
 
 from ..prompts.prompt_template_manager import PromptTemplateManager
 from .logging_utils import get_logger
-from ..llm.openai_gpt import CacheOpenAI
+from ..llm.base import BaseLLM
 
 logger = get_logger(__name__)
 
@@ -31,7 +31,7 @@ def merge_elements_with_same_first_line(elements, prefix='Wikipedia Title: '):
     return merged_elements
 
 
-def reason_step(dataset, prompt_template_manager: PromptTemplateManager, query: str, passages: list, thoughts: list, llm_client: CacheOpenAI):
+def reason_step(dataset, prompt_template_manager: PromptTemplateManager, query: str, passages: list, thoughts: list, llm_client: BaseLLM):
     """
     Given few-shot samples, query, previous retrieved passages, and previous thoughts, generate the next thought with OpenAI models. The generated thought is used for further retrieval step.
     :return: next thought
@@ -0,0 +1,105 @@
+import os
+from typing import List
+import json
+import argparse
+import logging
+
+from src.hipporag import HippoRAG, ShardedHippoRAG
+from src.hipporag.utils.config_utils import BaseConfig
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Local multi-process test of the sharded HippoRAG index")
+    parser.add_argument('--num_shards', type=int, default=3, help='Number of index shards (processes)')
+    parser.add_argument('--start_method', type=str, default='spawn', help='multiprocessing start method of the shards')
+    args = parser.parse_args()
+
+    # Prepare datasets and evaluation
+    docs = [
+        "Oliver Badman is a politician.",
+        "George Rankin is a politician.",
+        "Thomas Marwick is a politician.",
+        "Cinderella attended the royal ball.",
+        "The prince used the lost glass slipper to search the kingdom.",
+        "When the slipper fit perfectly, Cinderella was reunited with the prince.",
+        "Erik Hort's birthplace is Montebello.",
+        "Marina is bom in Minsk.",
+        "Montebello is a part of Rockland County."
+    ]
+
+    save_dir = 'outputs/sharded_test'  # Define save directory for HippoRAG objects (each shard lives in its own shard_<i> subdirectory)
+    llm_model_name = 'gpt-4o-mini'  # Any OpenAI model name
+    embedding_model_name = 'text-embedding-3-small'  # Embedding model name (NV-Embed, GritLM or Contriever for now)
+
+    def make_config(save_dir, read_only=False):
+        return BaseConfig(save_dir=save_dir,
+                          llm_name=llm_model_name,
+                          embedding_model_name=embedding_model_name,
+                          shard_start_method=args.start_method,
+                          read_only=read_only)
+
+    queries = [
+        "What is George Rankin's occupation?",
+        "How did Cinderella reach her happy ending?",
+        "What county is Erik Hort's birthplace a part of?"
+    ]
+
+    # For Evaluation
+    answers = [
+        ["Politician"],
+        ["By going to the ball."],
+        ["Rockland County"]
+    ]
+
+    gold_docs = [
+        ["George Rankin is a politician."],
+        ["Cinderella attended the royal ball.",
+         "The prince used the lost glass slipper to search the kingdom.",
+         "When the slipper fit perfectly, Cinderella was reunited with the prince."],
+        ["Erik Hort's birthplace is Montebello.",
+         "Montebello is a part of Rockland County."]
+    ]
+
+    # Startup a sharded HippoRAG instance; every shard indexes its passages in its own process
+    with ShardedHippoRAG(global_config=make_config(save_dir), num_shards=args.num_shards) as sharded_hipporag:
+        sharded_hipporag.index(docs=docs)
+
+        print(sharded_hipporag.rag_qa(queries=queries,
+                                      gold_docs=gold_docs,
+                                      gold_answers=answers)[-2:])
+
+        # Single-process reference over the same corpus
+        hipporag = HippoRAG(global_config=make_config(os.path.join(save_dir, 'unsharded')))
+        hipporag.index(docs=docs)
+
+        sharded_results = sharded_hipporag.retrieve(queries=queries, num_to_retrieve=5)
+        results = hipporag.retrieve(queries=queries, num_to_retrieve=5)
+        for sharded_result, result in zip(sharded_results, results):
+            print(result.question)
+            print("  sharded:  ", sharded_result.docs)
+            print("  unsharded:", result.docs)
+
+        new_docs = [
+            "Tom Hort's birthplace is Montebello.",
+            "Sam Hort's birthplace is Montebello.",
+            "Bill Hort's birthplace is Montebello.",
+            "Cam Hort's birthplace is Montebello.",
+            "Montebello is a part of Rockland County.."]
+
+        # Run indexing
+        sharded_hipporag.index(docs=new_docs)
+
+        print(sharded_hipporag.rag_qa(queries=queries,
+                                      gold_docs=gold_docs,
+                                      gold_answers=answers)[-2:])
+
+        sharded_hipporag.delete(new_docs)
+
+    # Serve the sharded index from read-only shard processes
+    with ShardedHippoRAG(global_config=make_config(save_dir, read_only=True), num_shards=args.num_shards) as sharded_hipporag:
+        print(sharded_hipporag.rag_qa(queries=queries,
+                                      gold_docs=gold_docs,
+                                      gold_answers=answers)[-2:])
+
+if __name__ == "__main__":
+    main()